@@ -0,0 +1,230 @@
+"""Pre-flight cost estimates and admission control for simulation requests.
+
+``estimate_run`` counts the projects, staff, cost lines, supports, policies and
+steps a scenario will simulate and predicts its work (budget rows, the unit the
+engine's run time and memory scale with) and peak memory. ``Admission`` then
+decides how the request runs:
+
+- ``run``: small runs start at once, so interactive requests keep low latency;
+- ``heavy``: larger runs wait for one of ``SIM_HEAVY_CONCURRENCY`` slots;
+- ``queue``: very large runs (or requests with ``async``) go to the job queue
+  and are fetched from ``/simulate/jobs/<job_id>``;
+- ``reject``: runs above the hard limits are refused with 413.
+
+Environment variables:
+    SIM_HEAVY_WORK: Work above which a run counts as heavy (default 100000)
+    SIM_ASYNC_WORK: Work above which a run is queued (default 1000000)
+    SIM_MAX_WORK: Work above which a run is rejected (default 10000000)
+    SIM_MAX_MEMORY_MB: Predicted memory above which a run is rejected (default 8192)
+    SIM_HEAVY_CONCURRENCY: Heavy runs (queued jobs included) at a time (default 2)
+    SIM_HEAVY_WAIT: Seconds a heavy request waits for a slot before 503 (default 30)
+    SIM_JOB_WORKERS: Threads dispatching queued jobs to worker processes (default 2);
+        the pool of worker processes is as large, or as ``SIM_HEAVY_CONCURRENCY``
+        if that is smaller
+    SIM_JOB_CACHE: Finished jobs kept for retrieval (default 64)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sim import constants
+
+RUN, HEAVY, QUEUE, REJECT = "run", "heavy", "queue", "reject"
+
+# Approximate bytes held per budget row and ledger transaction while a result
+# is built and serialised (DataFrame, record dicts and JSON text).
+BUDGET_ROW_BYTES = 800
+LEDGER_ROW_BYTES = 400
+
+
+def _int(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def estimate_run(events, steps: int) -> dict:
+    """Predict the size of a run of parsed ``events`` over ``steps`` steps."""
+    events = events if isinstance(events, list) else []
+    fcr_items = len(constants.FCRDATA)
+    counts = {"projects": 0, "staff": 0, "cost_lines": 0, "supports": 0, "policies": 0, "project_steps": 0}
+    work = ledger_rows = 0
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        # triggered events may start at any step; assume the earliest
+        start = _int(event.get("time", 0))
+        span = max(min(_int(event.get("term", 0)), steps - start), 0)
+        staff = len(event.get("staffing") or [])
+        costs = len(event.get("directcosts") or [])
+        supports = len(event.get("supports") or [])
+        policies = event.get("policies") or []
+        recovered = any(isinstance(p, dict) and p.get("policy") == "FullCostRecovery" for p in policies)
+
+        counts["projects"] += 1
+        counts["staff"] += staff
+        counts["cost_lines"] += costs
+        counts["supports"] += supports
+        counts["policies"] += len(policies)
+        counts["project_steps"] += span
+        # per step: salary, NI and pension rows per staff member, one row per cost
+        # line and support, and one per FCR item and staff member under full cost recovery
+        work += span * (staff * (3 + (fcr_items if recovered else 0)) + costs + supports + 1)
+        ledger_rows += 2 * span + len(policies)
+
+    memory_mb = (work * BUDGET_ROW_BYTES + ledger_rows * LEDGER_ROW_BYTES) / 2**20
+    return {**counts, "steps": steps, "work": work, "ledger_rows": ledger_rows, "memory_mb": round(memory_mb, 1)}
+
+
+class Busy(Exception):
+    """Raised when no heavy-run slot frees up in time."""
+
+
+class Admission:
+    """
+    Limits deciding whether a run starts, waits for a slot, is queued or refused.
+    Attributes:
+        heavy_work (int): Work above which a run needs a heavy-run slot.
+        async_work (int): Work above which a run is queued.
+        max_work (int): Work above which a run is rejected.
+        max_memory_mb (float): Predicted memory above which a run is rejected.
+        wait (float): Seconds a synchronous heavy run waits for a slot.
+    """
+
+    def __init__(
+        self,
+        heavy_work: int = 100_000,
+        async_work: int = 1_000_000,
+        max_work: int = 10_000_000,
+        max_memory_mb: float = 8192,
+        concurrency: int = 2,
+        wait: float = 30.0,
+    ):
+        self.heavy_work = heavy_work
+        self.async_work = async_work
+        self.max_work = max_work
+        self.max_memory_mb = max_memory_mb
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def decide(self, estimate: dict, asynchronous: bool = False) -> tuple[str, str | None]:
+        """Return the decision for an estimate and, for rejections, the reason."""
+        if estimate["work"] > self.max_work:
+            return REJECT, f"Estimated work {estimate['work']} exceeds the limit of {self.max_work}"
+        if estimate["memory_mb"] > self.max_memory_mb:
+            return REJECT, f"Estimated memory {estimate['memory_mb']} MB exceeds the limit of {self.max_memory_mb} MB"
+        if asynchronous or estimate["work"] > self.async_work:
+            return QUEUE, None
+        if estimate["work"] > self.heavy_work:
+            return HEAVY, None
+        return RUN, None
+
+    @contextlib.contextmanager
+    def slot(self, decision: str, block: bool = False):
+        """Hold a heavy-run slot for heavy and queued runs; small runs pass straight through.
+
+        Synchronous requests wait at most ``wait`` seconds; queued jobs (``block``) wait their turn.
+        """
+        if decision == RUN:
+            yield
+            return
+        if not self._slots.acquire(timeout=None if block else self.wait):
+            raise Busy("Too many large simulations running, try again later")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+class JobQueue:
+    """
+    Background runs of queued simulations, kept by job id until evicted.
+    Attributes:
+        capacity (int): Finished jobs kept for retrieval.
+        processes (int): Size of the worker process pool shared by all jobs.
+    """
+
+    def __init__(self, workers: int = 2, capacity: int = 64, processes: int | None = None):
+        self.capacity = capacity
+        self.processes = processes or workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sim-job")
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def run_in_process(self, fn, *args):
+        """Run ``fn(*args)`` in the shared worker pool and return its result.
+
+        The pool is started on first use and reused by every later job; a pool
+        broken by a crashed worker is replaced for the next one.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes)
+            pool = self._pool
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+
+    def submit(self, fn, *args, **kwargs) -> str:
+        """Queue ``fn(*args, **kwargs)`` and return the job id."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {"status": "queued", "submitted": time.time()}
+            self._evict()
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, fn, args, kwargs):
+        self._update(job_id, status="running", started=time.time())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), finished=time.time())
+        else:
+            self._update(job_id, status="done", result=result, finished=time.time())
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _evict(self):
+        # drop the oldest finished jobs beyond capacity; queued and running jobs stay
+        finished = [key for key, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for key in finished[: max(len(self._jobs) - self.capacity, 0)]:
+            del self._jobs[key]
+
+    def get(self, job_id: str) -> dict | None:
+        """Return a copy of the job's state, or ``None`` if unknown or evicted."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+
+admission = Admission(
+    int(os.environ.get("SIM_HEAVY_WORK", 100_000)),
+    int(os.environ.get("SIM_ASYNC_WORK", 1_000_000)),
+    int(os.environ.get("SIM_MAX_WORK", 10_000_000)),
+    float(os.environ.get("SIM_MAX_MEMORY_MB", 8192)),
+    int(os.environ.get("SIM_HEAVY_CONCURRENCY", 2)),
+    float(os.environ.get("SIM_HEAVY_WAIT", 30)),
+)
+jobs = JobQueue(
+    int(os.environ.get("SIM_JOB_WORKERS", 2)),
+    int(os.environ.get("SIM_JOB_CACHE", 64)),
+    min(int(os.environ.get("SIM_JOB_WORKERS", 2)), int(os.environ.get("SIM_HEAVY_CONCURRENCY", 2))),
+)
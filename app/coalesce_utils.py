@@ -0,0 +1,121 @@
+"""Single-flight coalescing of identical concurrent simulations.
+
+Requests for the same scenario (same events, steps, engine options and
+reference data) share one computation: the first request to arrive runs the
+simulation, and duplicates arriving while it runs wait for it and receive the
+same result object. The key is a canonical hash of the scenario, computed once
+it has been parsed and its reference data installed.
+
+A flight only accepts joiners until its deadline, so a stuck computation is
+never joined by new requests, and a waiting duplicate gives up with
+``FlightTimeout`` at that deadline.
+
+Environment variables:
+    SIM_COALESCE: Set to 0 to run every request separately (default 1)
+    SIM_COALESCE_TIMEOUT: Seconds duplicates wait on a flight (default 120)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from sim import constants
+from sim.refdata import content_digest, digest_of
+
+from .metrics_utils import counter
+
+
+def _catalogue_digest(rows: list) -> str:
+    # installed shared catalogues already know their digest; hash anything else
+    return digest_of(rows) or content_digest(list(rows))
+
+
+def scenario_key(events, steps: int, options: dict) -> str:
+    """Canonical hash of a parsed scenario and the reference data it runs with."""
+    return content_digest(
+        [
+            {
+                "events": events,
+                "steps": steps,
+                "options": options,
+                "fcrdata": _catalogue_digest(constants.FCRDATA),
+                "supportdata": _catalogue_digest(constants.SUPPORTDATA),
+            }
+        ]
+    )
+
+
+class FlightTimeout(Exception):
+    """Raised when a duplicate request gives up waiting on a computation."""
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "deadline")
+
+    def __init__(self, deadline: float):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.deadline = deadline
+
+
+class SingleFlight:
+    """
+    In-flight computations by key.
+    Attributes:
+        timeout (float): Seconds a flight accepts and holds waiting duplicates.
+        computations (Counter): Computations run.
+        saved (Counter): Requests served from another request's computation.
+        timeouts (Counter): Duplicates that gave up waiting.
+    """
+
+    def __init__(self, timeout: float = 120.0, enabled: bool = True):
+        self.timeout = timeout
+        self.enabled = enabled
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.computations = counter("sim_coalesce_computations_total", "Simulations computed.")
+        self.saved = counter("sim_coalesce_saved_total", "Simulations served from a concurrent identical request.")
+        self.timeouts = counter("sim_coalesce_timeouts_total", "Duplicate requests that gave up waiting.")
+
+    def do(self, key: str, fn):
+        """Return ``fn()``, sharing one call among concurrent callers with the same key."""
+        if not self.enabled:
+            return fn()
+        now = time.monotonic()
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None or now >= flight.deadline
+            if leader:
+                flight = _Flight(now + self.timeout)
+                self._flights[key] = flight
+
+        if not leader:
+            if not flight.done.wait(max(flight.deadline - now, 0)):
+                self.timeouts.inc()
+                raise FlightTimeout("Timed out waiting for an identical simulation to finish")
+            if flight.error is not None:
+                raise flight.error
+            self.saved.inc()
+            return flight.result
+
+        self.computations.inc()
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+
+flights = SingleFlight(
+    float(os.environ.get("SIM_COALESCE_TIMEOUT", 120)),
+    os.environ.get("SIM_COALESCE", "1").strip().lower() not in ("0", "false", "no", "off"),
+)
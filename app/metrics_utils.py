@@ -0,0 +1,180 @@
+"""Per-phase timings of simulation requests.
+
+Code on the request path wraps its phases in ``phase(name)`` and records sizes
+with ``count(name, value)``:
+
+    with phase("run"):
+        portfolio.run(steps)
+    count("transactions", len(portfolio.consolidated_account.register))
+
+The blueprint hooks start a ``RequestTimer`` for each request, send its phases
+and counts back in a ``Server-Timing`` header and fold them into histograms
+served in Prometheus text format by ``/metrics``. Outside a timed request (or
+with metrics disabled) ``phase`` returns a shared no-op context manager and
+``count`` returns immediately.
+
+Environment variables:
+    SIM_METRICS: Set to 0 to disable timing and the histograms (default 1)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+ENABLED = os.environ.get("SIM_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+_current: ContextVar["RequestTimer | None"] = ContextVar("sim_request_timer", default=None)
+_NULL = contextlib.nullcontext()
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with one series per label value."""
+
+    def __init__(self, name: str, help: str, label: str, buckets: tuple):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, value: float):
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[key] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key in sorted(series):
+            counts, total = series[key]
+            label = f'{self.label}="{key}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic Prometheus counter."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+class RequestTimer:
+    """
+    Phase durations and counts of one request.
+    Attributes:
+        endpoint (str): Endpoint the request was routed to.
+        phases (dict): Seconds spent per phase name, summed over repeated phases.
+        counts (dict): Sizes recorded with ``count`` (projects, steps, ...).
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.phases = {}
+        self.counts = {}
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - began
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: phase durations in ms, then counts."""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        if self.elapsed is not None:
+            parts.append(f"total;dur={self.elapsed * 1000:.2f}")
+        parts += [f'{name};desc="{value}"' for name, value in self.counts.items()]
+        return ", ".join(parts)
+
+
+phase_seconds = Histogram("sim_phase_seconds", "Time spent in each phase of simulation requests.", "phase", DURATION_BUCKETS)
+request_seconds = Histogram("sim_request_seconds", "Duration of timed requests.", "endpoint", DURATION_BUCKETS)
+run_size = Histogram("sim_run_size", "Projects, steps, transactions and budget rows per simulation.", "quantity", SIZE_BUCKETS)
+counters: list[Counter] = []
+
+
+def counter(name: str, help: str) -> Counter:
+    """Create a counter included in ``/metrics``."""
+    created = Counter(name, help)
+    counters.append(created)
+    return created
+
+
+def start(endpoint: str) -> RequestTimer | None:
+    """Start timing the current request; ``None`` when metrics are disabled."""
+    if not ENABLED:
+        return None
+    timer = RequestTimer(endpoint)
+    _current.set(timer)
+    return timer
+
+
+def finish() -> RequestTimer | None:
+    """Stop timing the current request and fold it into the histograms."""
+    timer = _current.get()
+    if timer is None:
+        return None
+    _current.set(None)
+    timer.elapsed = time.perf_counter() - timer.started
+    request_seconds.observe(timer.endpoint, timer.elapsed)
+    for name, seconds in timer.phases.items():
+        phase_seconds.observe(name, seconds)
+    for name, value in timer.counts.items():
+        run_size.observe(name, value)
+    return timer
+
+
+def phase(name: str):
+    """Context manager timing ``name`` within the current request (no-op otherwise)."""
+    timer = _current.get()
+    return _NULL if timer is None else timer.phase(name)
+
+
+def count(name: str, value: int):
+    """Record a size for the current request (no-op outside a timed request)."""
+    timer = _current.get()
+    if timer is not None:
+        timer.counts[name] = value
+
+
+def render() -> str:
+    """All histograms and counters in Prometheus text exposition format."""
+    lines = []
+    for histogram in (request_seconds, phase_seconds, run_size):
+        lines += histogram.render()
+    for created in counters:
+        lines += created.render()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,142 @@
+"""Opt-in cProfile and tracemalloc capture of single simulation requests.
+
+A request carrying the admin token in an ``X-Profile-Token`` header runs under
+cProfile and tracemalloc; the token is never read from the query string, which
+ends up in access logs. The top functions by cumulative time and the
+allocation hotspots by file and line in ``sim/`` are stored under an id,
+returned in the ``X-Profile-Id`` response header and fetched from
+``/simulate/profiles/<profile_id>`` (with the same token).
+
+Profiling is off unless a token is configured. Only one capture runs at a time
+and captures are at least ``SIM_PROFILE_INTERVAL`` seconds apart; a request
+that asks for a profile otherwise runs normally with an ``X-Profile-Skipped``
+header.
+
+cProfile only follows the request's thread, but tracemalloc is process-wide:
+allocations made by other threads while a capture runs, such as concurrent
+requests, show up in its allocation hotspots too.
+
+Environment variables:
+    SIM_PROFILE_TOKEN: Admin token enabling profiling (optional)
+    SIM_PROFILE_INTERVAL: Minimum seconds between captures (default 60)
+    SIM_PROFILE_CACHE: Number of captures kept in memory (default 16)
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+
+SIM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sim")
+
+
+class Capture:
+    """
+    A running cProfile and tracemalloc capture.
+    Attributes:
+        endpoint (str): Endpoint being profiled.
+        profile (cProfile.Profile): Profiler enabled for the request's thread.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self._tracing = tracemalloc.is_tracing()
+        if not self._tracing:
+            tracemalloc.start()
+        self.profile.enable()
+
+    def stop(self, limit: int = 25) -> dict:
+        """Stop profiling and summarise the top functions and allocation sites."""
+        self.profile.disable()
+        elapsed = time.perf_counter() - self.started
+        snapshot = tracemalloc.take_snapshot()
+        if not self._tracing:
+            tracemalloc.stop()
+
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        functions = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in sorted(
+            stats.stats.items(), key=lambda item: item[1][3], reverse=True
+        )[:limit]:
+            functions.append(
+                {"function": name, "file": filename, "line": line, "calls": calls, "tottime": own, "cumtime": cumulative}
+            )
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(True, os.path.join(SIM_DIR, "*"))])
+        allocations = [
+            {
+                "file": os.path.relpath(stat.traceback[0].filename, os.path.dirname(SIM_DIR)),
+                "line": stat.traceback[0].lineno,
+                "size_kb": stat.size / 1024,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
+        return {"endpoint": self.endpoint, "elapsed": elapsed, "functions": functions, "allocations": allocations}
+
+
+class Profiler:
+    """Access control, rate limit and store for request profiles."""
+
+    def __init__(self, token: str | None = None, interval: float = 60.0, capacity: int = 16):
+        self.token = token
+        self.interval = interval
+        self.capacity = capacity
+        self._profiles: OrderedDict[str, dict] = OrderedDict()
+        self._running = threading.Lock()
+        self._lock = threading.Lock()
+        self._last = None
+
+    def authorized(self, token: str | None) -> bool:
+        """Whether ``token`` matches the configured admin token."""
+        return bool(self.token) and token is not None and hmac.compare_digest(token, self.token)
+
+    def begin(self, endpoint: str) -> Capture | None:
+        """Start a capture unless one is running or the last was too recent."""
+        if not self._running.acquire(blocking=False):
+            return None
+        now = time.monotonic()
+        if self._last is not None and now - self._last < self.interval:
+            self._running.release()
+            return None
+        self._last = now
+        try:
+            return Capture(endpoint)
+        except Exception:
+            self._running.release()
+            raise
+
+    def end(self, capture: Capture) -> str:
+        """Stop ``capture``, store its summary and return the profile id."""
+        try:
+            summary = capture.stop()
+        finally:
+            self._running.release()
+        profile_id = uuid.uuid4().hex
+        with self._lock:
+            self._profiles[profile_id] = summary
+            while len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> dict | None:
+        """Return the stored summary for ``profile_id``, or ``None`` if unknown or evicted."""
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+profiler = Profiler(
+    os.environ.get("SIM_PROFILE_TOKEN") or None,
+    float(os.environ.get("SIM_PROFILE_INTERVAL", 60)),
+    int(os.environ.get("SIM_PROFILE_CACHE", 16)),
+)
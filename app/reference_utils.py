@@ -0,0 +1,116 @@
+"""Registry of versioned FCR and support reference datasets.
+
+Clients register a dataset once and refer to it by its id in later ``/simulate``
+calls instead of re-uploading the YAML. The id hashes the kind together with
+the content, so the same rows registered as both kinds get two ids. Parsed catalogues are
+kept in an in-memory LRU and persisted to disk so they survive restarts and are
+shared by every worker reading the same directory.
+
+Environment variables:
+    SIM_REFERENCE_DIR: Directory for persisted datasets (optional)
+    SIM_REFERENCE_CACHE: Number of parsed datasets kept in memory (default 16)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sim.refdata import content_digest
+
+KINDS = ("fcr", "support")
+_ID_PATTERN = re.compile(r"^[0-9a-f]{8,64}$")
+
+
+def _dataset_id(kind: str, digest: str) -> str:
+    """Id of the ``kind`` dataset whose rows have content hash ``digest``."""
+    return hashlib.sha256(f"{kind}:{digest}".encode("utf-8")).hexdigest()[:24]
+
+
+def _entry(dataset_id: str, kind: str, rows: list[dict], digest: str) -> dict:
+    """Build a cache entry with the rows indexed by item name (first row wins)."""
+    index = {}
+    for row in rows:
+        if "item" in row:
+            index.setdefault(row["item"], row)
+    return {"id": dataset_id, "kind": kind, "digest": digest, "rows": rows, "index": index}
+
+
+class ReferenceRegistry:
+    """LRU of parsed reference datasets with on-disk persistence."""
+
+    def __init__(self, directory: str | None = None, capacity: int = 16):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "simreference")
+        self.capacity = capacity
+        self._cache: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, dataset_id: str) -> str:
+        return os.path.join(self.directory, f"{dataset_id}.json")
+
+    def _remember(self, dataset_id: str, entry: dict):
+        self._cache[dataset_id] = entry
+        self._cache.move_to_end(dataset_id)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def register(self, kind: str, rows: list[dict]) -> dict:
+        """Register parsed ``rows`` and return the dataset metadata including its id."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown reference data kind '{kind}', expected one of {KINDS}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Reference data must be a list of mappings")
+        digest = content_digest(rows)
+        key = _dataset_id(kind, digest)
+        entry = _entry(key, kind, rows, digest)
+        path = self._path(key)
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"id": key, "kind": kind, "digest": digest, "rows": rows}, f)
+            os.replace(tmp, path)
+        with self._lock:
+            self._remember(key, entry)
+        return self.describe(entry)
+
+    def get(self, dataset_id: str) -> dict | None:
+        """Return the cached entry for ``dataset_id``, loading it from disk if needed."""
+        if not _ID_PATTERN.match(dataset_id or ""):
+            return None
+        with self._lock:
+            entry = self._cache.get(dataset_id)
+            if entry is not None:
+                self._cache.move_to_end(dataset_id)
+                return entry
+        try:
+            with open(self._path(dataset_id), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        digest = stored.get("digest") or content_digest(stored["rows"])
+        entry = _entry(dataset_id, stored["kind"], stored["rows"], digest)
+        with self._lock:
+            self._remember(dataset_id, entry)
+        return entry
+
+    @staticmethod
+    def describe(entry: dict) -> dict:
+        """Metadata returned to clients for a dataset."""
+        return {
+            "id": entry["id"],
+            "kind": entry["kind"],
+            "rows": len(entry["rows"]),
+            "items": list(entry["index"]),
+        }
+
+
+registry = ReferenceRegistry(
+    os.environ.get("SIM_REFERENCE_DIR"),
+    int(os.environ.get("SIM_REFERENCE_CACHE", 16)),
+)
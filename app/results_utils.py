@@ -0,0 +1,49 @@
+"""In-memory store of recent simulation results for follow-up queries.
+
+``/simulate`` keeps a :class:`sim.ledger.LedgerIndex` of each run's ledger and
+returns its ``result_id``; the ``/simulate/results/<result_id>/...`` endpoints
+then answer balance and cash-flow questions without re-running or re-scanning.
+
+Environment variables:
+    SIM_RESULT_CACHE: Number of results kept in memory (default 32)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from sim.ledger import LedgerIndex
+
+
+class ResultStore:
+    """LRU of ledger indexes of recent simulation runs, keyed by result id."""
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self._results: OrderedDict[str, LedgerIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, transactions: list[dict]) -> str:
+        """Index a run's ledger transactions and return the new result id."""
+        index = LedgerIndex(transactions)
+        index.refresh()
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = index
+            while len(self._results) > self.capacity:
+                self._results.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str) -> LedgerIndex | None:
+        """Return the ledger index for ``result_id``, or ``None`` if unknown or evicted."""
+        with self._lock:
+            index = self._results.get(result_id)
+            if index is not None:
+                self._results.move_to_end(result_id)
+            return index
+
+
+results = ResultStore(int(os.environ.get("SIM_RESULT_CACHE", 32)))
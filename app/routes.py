@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request, render_template, redirect, url_for, session
+from flask import Blueprint, Response, g, jsonify, request, render_template, redirect, url_for, session
 from flask_dance.contrib.google import google
 
 # Import the OAuth blueprint created in app.__init__
@@ -9,7 +9,13 @@ import math
 
 from .openai_utils import summarize
 from .astra_utils import update_record
-from .simulation_utils import run_simulation
+from .simulation_utils import run_portfolio, run_simulation
+from .reference_utils import registry as reference_registry
+from .results_utils import results as result_store
+from . import metrics_utils as metrics
+from .admission_utils import HEAVY, QUEUE, REJECT, Busy, admission, estimate_run, jobs
+from .coalesce_utils import FlightTimeout, flights, scenario_key
+from .profile_utils import profiler
 
 
 class NaNSafeJSONEncoder(json.JSONEncoder):
@@ -66,6 +72,13 @@ def safe_jsonify(data):
         return jsonify({"error": "Internal error processing response"}), 500
 
 
+def _flag(value) -> bool:
+    """Interpret a JSON or form field as a boolean option."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
 openai_bp = Blueprint("openai", __name__, url_prefix="/openai")
 astra_bp = Blueprint("astra", __name__, url_prefix="/astra")
 sim_bp = Blueprint("sim", __name__, url_prefix="/simulate")
@@ -78,6 +91,61 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
+def _profile_token():
+    # header only: query strings end up in access logs and proxy caches
+    return request.headers.get("X-Profile-Token")
+
+
+@sim_bp.before_request
+def start_request_timer():
+    metrics.start(request.endpoint)
+
+
+@sim_bp.before_request
+def start_profiler():
+    """Profile this request for holders of the admin token."""
+    token = _profile_token()
+    if token is not None and request.endpoint != "sim.get_profile":
+        if not profiler.authorized(token):
+            return jsonify({"error": "Profiling not permitted"}), 403
+        g.profile = profiler.begin(request.endpoint)
+
+
+@sim_bp.after_request
+def add_server_timing(response):
+    """Report the request's phase timings and counts in a Server-Timing header."""
+    timer = metrics.finish()
+    if timer is not None:
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+
+@sim_bp.after_request
+def add_profile_id(response):
+    """Stop this request's capture and name it in an X-Profile-Id header."""
+    if "profile" in g:
+        capture = g.pop("profile")
+        if capture is not None:
+            response.headers["X-Profile-Id"] = profiler.end(capture)
+        else:
+            response.headers["X-Profile-Skipped"] = "busy or rate limited"
+    return response
+
+
+@sim_bp.teardown_request
+def release_profiler(exc):
+    # a request that raised never reached add_profile_id
+    capture = g.pop("profile", None)
+    if capture is not None:
+        profiler.end(capture)
+
+
+@root_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Phase and request duration histograms in Prometheus text format."""
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
 @openai_bp.route("/summarize", methods=["POST"])
 def openai_summarize():
     data = request.get_json(silent=True) or {}
@@ -113,6 +181,21 @@ def simulate_run():
         - supportdata_file: YAML file for support data (optional)
         - steps: Number of simulation steps (optional, default: 12)
 
+    Set ``sparse`` to omit zero budget rows and ledger postings and
+    ``compact_ledger`` to merge ledger entries per project and step.
+
+    Reference data registered with /simulate/reference can be used instead of
+    uploading it again by passing ``fcrdata_id`` / ``supportdata_id`` (as JSON
+    keys or form fields).
+
+    The response includes a ``result_id`` for the /simulate/results/<result_id>/
+    balance, min_balance and flows queries.
+
+    Runs are estimated before they start: oversized runs are refused with 413,
+    very large runs (or any run with ``async`` set) are queued and answered with
+    202 and a ``job_id`` for /simulate/jobs/<job_id>, and large runs wait for a
+    slot (503 if none frees up in time).
+
     For backward compatibility, fcrdata and supportdata can also be provided
     as JSON strings in form fields.
     """
@@ -122,6 +205,50 @@ def simulate_run():
     logger.debug(f"Request files: {list(request.files.keys())}")
     logger.debug(f"Request form: {dict(request.form)}")
 
+    parsed = _read_simulation_request()
+    if isinstance(parsed, tuple):
+        return parsed
+    events, steps, options, asynchronous = parsed["events"], parsed["steps"], parsed["options"], parsed["async"]
+
+    # Admission control: refuse oversized runs, queue very large ones and
+    # limit how many large runs execute at once
+    with metrics.phase("admission"):
+        estimate = estimate_run(events, steps)
+        decision, reason = admission.decide(estimate, asynchronous=asynchronous)
+    if decision == REJECT:
+        return jsonify({"error": reason, "estimate": estimate}), 413
+    if decision == QUEUE:
+        from sim.constants import FCRDATA, SUPPORTDATA
+
+        job_id = jobs.submit(_queued_simulation, events, steps, options, list(FCRDATA), list(SUPPORTDATA))
+        return jsonify({"job_id": job_id, "status": "queued", "estimate": estimate}), 202
+
+    # Run the simulation; identical concurrent requests share one run
+    try:
+        with metrics.phase("coalesce"):
+            key = scenario_key(events, steps, options)
+
+        def compute():
+            with admission.slot(decision):
+                return _simulate(events, steps, options)
+
+        result = flights.do(key, compute)
+        with metrics.phase("encode"):
+            return safe_jsonify(result)
+    except Busy as e:
+        return jsonify({"error": str(e), "estimate": estimate}), 503, {"Retry-After": "30"}
+    except FlightTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": f"Simulation failed: {str(e)}"}), 500
+
+
+def _read_simulation_request():
+    """Read the scenario of a /simulate request and install its reference data.
+
+    Returns the events, steps, engine options and ``async`` flag, or an error
+    response tuple.
+    """
     # Check if a YAML file was uploaded
     if "yaml_file" in request.files:
         yaml_file = request.files["yaml_file"]
@@ -130,7 +257,8 @@ def simulate_run():
                 yaml_content = yaml_file.read().decode("utf-8")
                 from sim.utils import parseYAML
 
-                events = parseYAML(yaml_content)
+                with metrics.phase("parse"):
+                    events = parseYAML(yaml_content)
             except Exception as e:
                 return jsonify({"error": f"Failed to parse YAML file: {str(e)}"}), 400
         else:
@@ -140,6 +268,10 @@ def simulate_run():
         steps = int(request.form.get("steps", 12))
         fcrdata = []
         supportdata = []
+        fcrdata_id = request.form.get("fcrdata_id")
+        supportdata_id = request.form.get("supportdata_id")
+        options = {key: _flag(request.form.get(key)) for key in ("sparse", "compact_ledger")}
+        asynchronous = _flag(request.form.get("async"))
 
         # Check for additional YAML file uploads
         if "fcrdata_file" in request.files:
@@ -187,38 +319,82 @@ def simulate_run():
         steps = data.get("steps", 12)
         fcrdata = data.get("fcrdata", [])
         supportdata = data.get("supportdata", [])
+        fcrdata_id = data.get("fcrdata_id")
+        supportdata_id = data.get("supportdata_id")
+        options = {key: _flag(data.get(key)) for key in ("sparse", "compact_ledger")}
+        asynchronous = _flag(data.get("async"))
 
         # If events is a string, try to parse it as YAML
         if isinstance(events, str):
             try:
                 from sim.utils import parseYAML
 
-                events = parseYAML(events)
+                with metrics.phase("parse"):
+                    events = parseYAML(events)
             except Exception as e:
                 return jsonify({"error": f"Failed to parse YAML string: {str(e)}"}), 400
 
-    # Populate FCRDATA and SUPPORTDATA if provided
-    if fcrdata:
-        from sim.constants import FCRDATA
+    # Resolve registered reference datasets; an inline upload takes precedence over an id
+    fcr_digest = support_digest = None
+    if fcrdata_id and not fcrdata:
+        entry = reference_registry.get(fcrdata_id)
+        if entry is None:
+            return jsonify({"error": f"Unknown fcrdata_id: {fcrdata_id}"}), 404
+        if entry["kind"] != "fcr":
+            return jsonify({"error": f"fcrdata_id {fcrdata_id} is a {entry['kind']} dataset, expected fcr"}), 400
+        fcrdata, fcr_digest = entry["rows"], entry["digest"]
+    if supportdata_id and not supportdata:
+        entry = reference_registry.get(supportdata_id)
+        if entry is None:
+            return jsonify({"error": f"Unknown supportdata_id: {supportdata_id}"}), 404
+        if entry["kind"] != "support":
+            return jsonify({"error": f"supportdata_id {supportdata_id} is a {entry['kind']} dataset, expected support"}), 400
+        supportdata, support_digest = entry["rows"], entry["digest"]
+
+    # Populate FCRDATA and SUPPORTDATA if provided. Uploads are published to shared
+    # memory so every worker maps one copy; otherwise pick up the current shared version.
+    with metrics.phase("reference"):
+        try:
+            from sim import refdata
 
-        FCRDATA.clear()  # Clear existing data
-        FCRDATA.extend(fcrdata)
+            if fcrdata:
+                refdata.publish("fcr", fcrdata, fcr_digest)
+            if supportdata:
+                refdata.publish("support", supportdata, support_digest)
+            refdata.install()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Shared reference data unavailable, using per-process copies: {e}")
+            if fcrdata:
+                from sim.constants import FCRDATA
 
-    if supportdata:
-        from sim.constants import SUPPORTDATA
+                FCRDATA.clear()  # Clear existing data
+                FCRDATA.extend(fcrdata)
 
-        SUPPORTDATA.clear()  # Clear existing data
-        SUPPORTDATA.extend(supportdata)
+            if supportdata:
+                from sim.constants import SUPPORTDATA
+
+                SUPPORTDATA.clear()  # Clear existing data
+                SUPPORTDATA.extend(supportdata)
+
+    return {"events": events, "steps": steps, "options": options, "async": asynchronous}
+
+
+def _simulate(events, steps: int, options: dict) -> dict:
+    """Run a simulation, index its ledger and add the budget pivot."""
+    return _complete(run_simulation(events, steps=steps, **options))
 
-    # Run the simulation
-    try:
-        result = run_simulation(events, steps=steps)
 
-        # Add pivot table data for better visualization
-        if "budget" in result and result["budget"]:
-            from sim.utils import pivotbudget
-            import pandas as pd
+def _complete(result: dict) -> dict:
+    """Index a simulation result's ledger and add the budget pivot."""
+    with metrics.phase("index"):
+        result["result_id"] = result_store.put(result["transactions"])
 
+    # Add pivot table data for better visualization
+    if "budget" in result and result["budget"]:
+        from sim.utils import pivotbudget
+        import pandas as pd
+
+        with metrics.phase("pivot"):
             try:
                 # Convert budget data to DataFrame
                 budget_df = pd.DataFrame(result["budget"])
@@ -235,11 +411,209 @@ def simulate_run():
             except Exception as e:
                 logger.error(f"Error creating pivot table: {e}")
                 result["budget_pivot_error"] = str(e)
+    return result
+
+
+def _run_job(fcrdata, supportdata, events, steps: int, options: dict) -> dict:
+    """Run a queued simulation in a job worker process with the catalogues it was submitted with."""
+    from sim.parallel import _init_worker
+
+    _init_worker(fcrdata, supportdata)
+    return run_simulation(events, steps=steps, **options)
+
+
+def _queued_simulation(events, steps: int, options: dict, fcrdata: list, supportdata: list) -> dict:
+    """Run a queued simulation with the reference data it was submitted with.
+
+    The run happens in the job queue's worker pool, seeded per job with those
+    catalogues (shared ones travel by digest), so the job never swaps the
+    reference data of requests running in this process.
+    """
+    from sim.parallel import _portable
+
+    with admission.slot(QUEUE, block=True):
+        try:
+            result = jobs.run_in_process(_run_job, _portable(fcrdata), _portable(supportdata), events, steps, options)
+        except FileNotFoundError:
+            # a shared catalogue was replaced and unlinked since the job was queued
+            result = jobs.run_in_process(_run_job, list(fcrdata), list(supportdata), events, steps, options)
+    return _complete(result)
+
+
+@sim_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Return the status of a queued simulation, with its result once done."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown or expired job_id: {job_id}"}), 404
+    return safe_jsonify({"job_id": job_id, **job})
+
+
+@sim_bp.route("/export", methods=["POST"])
+def simulate_export():
+    """Run a portfolio simulation and download one of its tables as a columnar file.
+
+    Takes the same JSON or form request as /simulate. Query parameters:
+        - table: budget (default), pivot or ledger
+        - format: parquet (default) or arrow (Arrow IPC stream)
+
+    The file is streamed while it is written: budgets one row group per
+    project (with a ``project`` column), ledgers in fixed-size chunks. Oversized
+    runs are refused with 413; exports are never queued, so very large runs
+    wait for a slot like large ones (503 if none frees up in time).
+    """
+    from sim import export
+
+    table = request.args.get("table", "budget")
+    fmt = request.args.get("format", "parquet")
+    if table not in export.TABLES:
+        return jsonify({"error": f"Unknown table: {table}. Use one of {', '.join(export.TABLES)}"}), 400
+    if fmt not in export.FORMATS:
+        return jsonify({"error": f"Unknown format: {fmt}. Use one of {', '.join(export.FORMATS)}"}), 400
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return jsonify({"error": "Columnar export needs pyarrow installed on the server"}), 501
 
-        return safe_jsonify(result)
+    parsed = _read_simulation_request()
+    if isinstance(parsed, tuple):
+        return parsed
+    events, steps, options = parsed["events"], parsed["steps"], parsed["options"]
+
+    with metrics.phase("admission"):
+        estimate = estimate_run(events, steps)
+        decision, reason = admission.decide(estimate)
+    if decision == REJECT:
+        return jsonify({"error": reason, "estimate": estimate}), 413
+
+    try:
+        with admission.slot(HEAVY if decision == QUEUE else decision):
+            portfolio = run_portfolio(events, steps=steps, **options)
+    except Busy as e:
+        return jsonify({"error": str(e), "estimate": estimate}), 503, {"Retry-After": "30"}
     except Exception as e:
         return jsonify({"error": f"Simulation failed: {str(e)}"}), 500
 
+    filename = f"{table}{export.FORMATS[fmt]}"
+    return Response(
+        export.stream(portfolio, table=table, format=fmt),
+        mimetype=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@sim_bp.route("/reference", methods=["POST"])
+def register_reference():
+    """Register an FCR or support dataset and return its content-hash id.
+
+    Accepts either a YAML upload (form fields ``file`` and ``kind``) or JSON:
+        {
+            "kind": "fcr" | "support",
+            "data": [...] or "yaml": "..."
+        }
+    """
+    from sim.utils import parseYAML
+
+    if "file" in request.files:
+        kind = request.form.get("kind", "")
+        upload = request.files["file"]
+        if not (upload.filename and upload.filename.endswith((".yaml", ".yml"))):
+            return jsonify({"error": "Invalid file type. Please upload a .yaml or .yml file"}), 400
+        try:
+            rows = parseYAML(upload.read().decode("utf-8"))
+        except Exception as e:
+            return jsonify({"error": f"Failed to parse reference YAML file: {str(e)}"}), 400
+    else:
+        data = request.get_json(silent=True) or {}
+        kind = data.get("kind", "")
+        rows = data.get("data")
+        if rows is None and isinstance(data.get("yaml"), str):
+            try:
+                rows = parseYAML(data["yaml"])
+            except Exception as e:
+                return jsonify({"error": f"Failed to parse reference YAML string: {str(e)}"}), 400
+
+    try:
+        return jsonify(reference_registry.register(kind, rows))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@sim_bp.route("/reference/<dataset_id>", methods=["GET"])
+def get_reference(dataset_id):
+    """Describe a registered reference dataset."""
+    entry = reference_registry.get(dataset_id)
+    if entry is None:
+        return jsonify({"error": f"Unknown reference dataset id: {dataset_id}"}), 404
+    return jsonify(reference_registry.describe(entry))
+
+
+def _query_args(*names):
+    """Read optional integer step arguments from the query string."""
+    return {name: request.args.get(name, type=int) for name in names}
+
+
+@sim_bp.route("/results/<result_id>/balance", methods=["GET"])
+def result_balance(result_id):
+    """Balance at the end of a step of a stored result.
+
+    Query parameters: ``step`` (required) and ``project`` (optional; gives the
+    project's net contribution).
+    """
+    index = result_store.get(result_id)
+    if index is None:
+        return jsonify({"error": f"Unknown or expired result id: {result_id}"}), 404
+    step = request.args.get("step", type=int)
+    if step is None:
+        return jsonify({"error": "Query parameter 'step' is required"}), 400
+    project = request.args.get("project")
+    return jsonify({"step": step, "project": project, "balance": index.balance_at(step, project)})
+
+
+@sim_bp.route("/results/<result_id>/min_balance", methods=["GET"])
+def result_min_balance(result_id):
+    """Lowest end-of-step balance of a stored result and the step it occurs.
+
+    Query parameters: ``start``, ``stop`` (exclusive) and ``project``, all optional.
+    """
+    index = result_store.get(result_id)
+    if index is None:
+        return jsonify({"error": f"Unknown or expired result id: {result_id}"}), 404
+    args = _query_args("start", "stop")
+    project = request.args.get("project")
+    found = index.min_balance(args["start"] or 0, args["stop"], project)
+    balance, step = found if found is not None else (None, None)
+    return jsonify({"project": project, **args, "balance": balance, "step": step})
+
+
+@sim_bp.route("/results/<result_id>/flows", methods=["GET"])
+def result_flows(result_id):
+    """Sum of ledger amounts of a stored result over a window of steps.
+
+    Query parameters: ``start``, ``stop`` (exclusive), ``project`` and ``type``
+    (e.g. ``expenditure`` or ``income``), all optional. Income amounts are
+    negative, as in the ledger.
+    """
+    index = result_store.get(result_id)
+    if index is None:
+        return jsonify({"error": f"Unknown or expired result id: {result_id}"}), 404
+    args = _query_args("start", "stop")
+    project, kind = request.args.get("project"), request.args.get("type")
+    total = index.total(args["start"] or 0, args["stop"], project, kind)
+    return jsonify({"project": project, "type": kind, **args, "total": total})
+
+
+@sim_bp.route("/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    """Return a stored request profile: top functions by cumulative time and
+    allocation hotspots in sim/. Requires the admin token."""
+    if not profiler.authorized(_profile_token()):
+        return jsonify({"error": "Profiling not permitted"}), 403
+    summary = profiler.get(profile_id)
+    if summary is None:
+        return jsonify({"error": f"Unknown or expired profile_id: {profile_id}"}), 404
+    return safe_jsonify({"profile_id": profile_id, **summary})
+
 
 @sim_bp.route("/example", methods=["GET"])
 def get_example_yaml():
@@ -374,8 +748,8 @@ def simulate_pivot():
     # Get the simulation result first
     result = simulate_run()
 
-    # If it's an error response, return it as-is
-    if isinstance(result, tuple) and len(result) == 2:
+    # If it's an error (or queued) response, return it as-is
+    if isinstance(result, tuple):
         return result
 
     # Extract the JSON data from the response
@@ -388,23 +762,25 @@ def simulate_pivot():
         from sim.utils import pivotbudget
         import pandas as pd
 
-        try:
-            # Convert budget data to DataFrame
-            budget_df = pd.DataFrame(data["budget"])
+        with metrics.phase("pivot"):
+            try:
+                # Convert budget data to DataFrame
+                budget_df = pd.DataFrame(data["budget"])
 
-            # Apply pivot transformation
-            pivot_df = pivotbudget(budget_df)
+                # Apply pivot transformation
+                pivot_df = pivotbudget(budget_df)
 
-            # Convert back to dict format
-            pivot_data = pivot_df.reset_index().to_dict("records")
+                # Convert back to dict format
+                pivot_data = pivot_df.reset_index().to_dict("records")
 
-            # Update the result with pivot data
-            data["budget_pivot"] = pivot_data
-        except Exception as e:
-            logger.error(f"Error creating pivot table: {e}")
-            data["budget_pivot_error"] = str(e)
+                # Update the result with pivot data
+                data["budget_pivot"] = pivot_data
+            except Exception as e:
+                logger.error(f"Error creating pivot table: {e}")
+                data["budget_pivot_error"] = str(e)
 
-    return safe_jsonify(data)
+    with metrics.phase("encode"):
+        return safe_jsonify(data)
 
 
 @root_bp.route("/debug-auth")
@@ -4,10 +4,43 @@ from __future__ import annotations
 
 from typing import Any
 
-from sim import Portfolio, parseYAML
+from sim import Portfolio, RingBufferSink, Tracer, parseYAML
 
+from .metrics_utils import count, phase
 
-def run_simulation(events: Any | None = None, *, steps: int = 12) -> dict:
+# Most recent trace events returned with each result
+TRACE_CAPACITY = 1000
+
+
+def run_portfolio(
+    events: list | None,
+    *,
+    steps: int = 12,
+    sparse: bool = False,
+    compact_ledger: bool = False,
+    tracer: Tracer | None = None,
+) -> Portfolio:
+    """Set up a portfolio from parsed ``events`` and run it for ``steps`` steps."""
+    portfolio = Portfolio(sparse=sparse, compact_ledger=compact_ledger, tracer=tracer)
+
+    if events:
+        with phase("setup"):
+            portfolio.set_portfolio(events)
+
+    with phase("run"):
+        portfolio.run(steps)
+    count("projects", len(portfolio.projects))
+    count("steps", steps)
+    return portfolio
+
+
+def run_simulation(
+    events: Any | None = None,
+    *,
+    steps: int = 12,
+    sparse: bool = False,
+    compact_ledger: bool = False,
+) -> dict:
     """Run a simple portfolio simulation.
 
     Parameters
@@ -17,28 +50,38 @@ def run_simulation(events: Any | None = None, *, steps: int = 12) -> dict:
         projects to create.
     steps : int, optional
         Number of simulation steps to run, by default 12.
+    sparse : bool, optional
+        Omit zero budget rows and zero ledger postings, by default False.
+    compact_ledger : bool, optional
+        Merge ledger entries into one net entry per project and step, by default False.
 
     Returns
     -------
     dict
-        Simulation results containing projects, transactions and budget records.
+        Simulation results containing projects, transactions, budget records
+        and the run's trace events.
     """
+    tracer = Tracer(RingBufferSink(TRACE_CAPACITY))
     if isinstance(events, str):
-        try:
-            events = parseYAML(events)
-        except Exception:
-            events = []
+        with phase("parse"):
+            try:
+                events = parseYAML(events, tracer=tracer)
+            except Exception:
+                events = []
     events = events or []
 
-    portfolio = Portfolio()
-
-    if events:
-        portfolio.set_portfolio(events)
+    portfolio = run_portfolio(events, steps=steps, sparse=sparse, compact_ledger=compact_ledger, tracer=tracer)
 
-    portfolio.run(steps)
+    with phase("budget"):
+        budget = portfolio.getbudget()
 
-    return {
-        "projects": portfolio.list_projects().to_dict(orient="records"),
-        "transactions": portfolio.list_transactions().to_dict(orient="records"),
-        "budget": portfolio.getbudget().to_dict(orient="records"),
-    }
+    with phase("serialize"):
+        result = {
+            "projects": portfolio.list_projects().to_dict(orient="records"),
+            "transactions": portfolio.list_transactions().to_dict(orient="records"),
+            "budget": budget.to_dict(orient="records"),
+        }
+        result["trace"] = [event.to_dict() for event in tracer.events()]
+    count("transactions", len(result["transactions"]))
+    count("budget_rows", len(result["budget"]))
+    return result
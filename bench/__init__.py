@@ -0,0 +1,11 @@
+"""Performance harness for the simulation engine.
+
+``bench.generator`` builds seeded synthetic portfolios and ``python -m bench``
+times each phase of a run (parse, run, budget, pivot, serialization), writes
+the results as JSON and flags regressions against a stored baseline.
+"""
+
+from .generator import generate
+from .engine import compare, run_benchmark
+
+__all__ = ["generate", "run_benchmark", "compare"]
@@ -0,0 +1,84 @@
+"""Command line entry point: ``python -m bench``.
+
+Usage example:
+    python -m bench --projects 200 --horizon 60 --repeat 5 --output bench.json
+    python -m bench --projects 200 --baseline bench.json --tolerance 0.15
+
+Exits with status 1 when a phase regresses against the baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from .engine import PHASES, compare, run_benchmark
+from .generator import generate
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Time the phases of a synthetic simulation run.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--staff", type=int, default=3, help="staff per project")
+    parser.add_argument("--costs", type=int, default=4, help="direct cost lines per project")
+    parser.add_argument("--fcr-items", type=int, default=5)
+    parser.add_argument("--supports", type=int, default=2, help="support entries per project")
+    parser.add_argument("--horizon", type=int, default=60, help="steps to simulate")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--sparse", action="store_true")
+    parser.add_argument("--compact-ledger", action="store_true")
+    parser.add_argument("--event-driven", action="store_true")
+    parser.add_argument("--parallel", type=int, default=0, metavar="PROCESSES", help="run in a process pool")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown as a fraction (default 0.2)")
+    args = parser.parse_args(argv)
+
+    scenario = generate(
+        seed=args.seed,
+        projects=args.projects,
+        staff=args.staff,
+        costs=args.costs,
+        fcr_items=args.fcr_items,
+        supports=args.supports,
+        horizon=args.horizon,
+    )
+    settings = {"vectorized": args.vectorized, "sparse": args.sparse, "compact_ledger": args.compact_ledger}
+    run_options = {}
+    if args.event_driven:
+        run_options["event_driven"] = True
+    if args.parallel:
+        run_options.update(parallel=True, processes=args.parallel)
+    result = run_benchmark(scenario, args.repeat, settings, run_options)
+
+    print(f"{'phase':<12} {'min (s)':>10} {'median (s)':>11} {'max (s)':>10}")
+    for phase in PHASES:
+        timing = result["phases"][phase]
+        print(f"{phase:<12} {timing['min']:>10.4f} {timing['median']:>11.4f} {timing['max']:>10.4f}")
+    print(", ".join(f"{key}: {value}" for key, value in result["counts"].items()))
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        result["regressions"] = compare(result, baseline, args.tolerance)
+        for regression in result["regressions"]:
+            print(
+                f"REGRESSION {regression['phase']}: {regression['current']:.4f}s vs "
+                f"{regression['baseline']:.4f}s baseline ({regression['ratio']:.2f}x)"
+            )
+        if not result["regressions"]:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        status = 1 if result["regressions"] else 0
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Differential harness: every alternative engine mode against the reference run.
+
+Random scenarios, seeded and biased towards edge cases (annual costs with
+offset or out-of-term steps, zero FTE, missing support items, zero units,
+unknown frequencies, one-step projects, staff joining and leaving, pay rises
+and step expressions), are run through the reference engine (the plain
+step-by-step ``Portfolio.run``) and through each alternative mode. Budgets,
+ledgers, project accumulators and account totals are compared within a
+tolerance, at the granularity each mode promises:
+
+- ``vectorized`` and ``parallel`` modes produce the same ledger rows;
+- ``sparse``, ``compact_ledger`` and ``event_driven`` keep the net flow per
+  project and step.
+
+Usage example:
+    python -m bench.differential --scenarios 200
+    python -m bench.differential --seed 17 --scenarios 1 --verbose
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import io
+import math
+import random
+import sys
+from collections import defaultdict
+
+from sim import Portfolio, constants
+
+# name -> (portfolio settings, run options, ledger granularity)
+ENGINES = {
+    "vectorized": ({"vectorized": True}, {}, "rows"),
+    "parallel": ({}, {"parallel": True, "processes": 2}, "rows"),
+    "vectorized_parallel": ({"vectorized": True}, {"parallel": True, "processes": 2}, "rows"),
+    "sparse": ({"sparse": True}, {}, "step"),
+    "compact_ledger": ({"compact_ledger": True}, {}, "step"),
+    "event_driven": ({}, {"event_driven": True}, "step"),
+    "vectorized_event_driven": ({"vectorized": True}, {"event_driven": True}, "step"),
+}
+
+FREQUENCIES = ("monthly", "annual", "oneoff", "quarterly")
+
+
+def scenario(seed: int, projects: int = 8) -> dict:
+    """Random scenario with catalogues, events and a horizon."""
+    r = random.Random(seed)
+    fcrdata = [
+        {"item": "Line Management", "daysperfte": r.choice((0, 1, 2)), "dayrate": 300, "frequency": "monthly", "description": "LM"}
+    ]
+    for i in range(r.randint(0, 4)):
+        fcrdata.append(
+            {
+                "item": f"FCR {i}",
+                "daysperfte": r.choice((0, 0.5, 1, 3)),
+                "dayrate": r.choice((0, 150, 400)),
+                "frequency": r.choice(FREQUENCIES),
+                "description": f"FCR {i}",
+            }
+        )
+    supportdata = [{"item": "Comms", "dayrate": 400, "daysperunit": 1.5}, {"item": "Legal", "dayrate": 600, "daysperunit": 2}]
+    horizon = r.randint(1, 40)
+
+    events = []
+    for p in range(projects):
+        term = r.choice((0, 1, 2, r.randint(3, 36)))
+        staffing = []
+        for _ in range(r.randint(0, 3)):
+            person = {
+                "position": r.choice(("PM", "Officer", "Analyst")),
+                "salary": r.choice((0, 18000, 30000, 45000)),
+                "fte": r.choice((0, 0.1, 0.5, 1.0)),
+                "linemanagerrate": r.choice((0, 350)),
+            }
+            if r.random() < 0.3:
+                person["start"] = r.randint(0, max(term, 1))
+            if r.random() < 0.3:
+                person["end"] = r.randint(0, term + 2)
+            if r.random() < 0.2:
+                person["payrises"] = [{"step": r.randint(0, term + 1), "rate": r.choice((0.02, 0.1))}]
+            staffing.append(person)
+        directcosts = []
+        for c in range(r.randint(0, 4)):
+            cost = r.choice((0, r.randint(1, 900), "{100 + step * 5}", "{where(month < 3, 50, 0)}"))
+            directcosts.append(
+                {"item": f"cost {c}", "cost": cost, "frequency": r.choice(FREQUENCIES), "step": r.randint(0, 30)}
+            )
+        supports = [
+            {
+                "item": r.choice(("Comms", "Legal", "Missing")),
+                "units": r.choice((0, 1, 3)),
+                "frequency": r.choice(FREQUENCIES),
+                "step": r.randint(0, 14),
+            }
+            for _ in range(r.randint(0, 2))
+        ]
+        policies = []
+        if r.random() < 0.6:
+            policies.append({"policy": "FullCostRecovery"})
+        if r.random() < 0.5:
+            policies.append({"policy": "Grant", "amount": r.randint(0, 9) * 1000, "fund": "F", "step": r.randint(0, term + 2)})
+        if r.random() < 0.2:
+            policies.append({"policy": "Finance", "capital": 10000, "rate": r.choice((0, 0.01)), "term": r.randint(1, 8)})
+        if r.random() < 0.1:
+            policies.append({"policy": "Subsidy"})
+        if r.random() < 0.15:
+            policies.append(
+                {
+                    "policy": "CarbonFinancing",
+                    "investment": 50000,
+                    "tree_planting_cost_per_unit": 5,
+                    "carbon_credit_per_unit": 20,
+                    "horizon": r.choice((12, 48)),
+                    "book_sales": r.random() < 0.5,
+                }
+            )
+        # JSON bodies often carry whole-number start times as floats
+        start = r.randint(0, horizon)
+        events.append(
+            {
+                "name": f"P{p}",
+                "time": float(start) if r.random() < 0.2 else start,
+                "term": term,
+                "budget": r.randint(0, 100000),
+                "staffing": staffing,
+                "directcosts": directcosts,
+                "supports": supports,
+                "policies": policies,
+            }
+        )
+    return {"fcrdata": fcrdata, "supportdata": supportdata, "events": events, "steps": horizon}
+
+
+def execute(case: dict, settings: dict | None = None, run_options: dict | None = None) -> Portfolio:
+    """Run a scenario with the given engine settings, suppressing engine output."""
+    constants.FCRDATA[:] = case["fcrdata"]
+    constants.SUPPORTDATA[:] = case["supportdata"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        portfolio = Portfolio(**(settings or {}))
+        portfolio.set_portfolio(copy.deepcopy(case["events"]))
+        portfolio.run(case["steps"], **(run_options or {}))
+    return portfolio
+
+
+def _budget(portfolio) -> dict:
+    totals = defaultdict(float)
+    for prj in portfolio.projects:
+        for row in prj.getbudgetadjusted().to_dict(orient="records"):
+            totals[(prj.name, row.get("item"), row.get("step"))] += row.get("budget", 0) or 0
+    return totals
+
+
+def _ledger(portfolio, granularity: str):
+    register = portfolio.consolidated_account.register
+    if granularity == "rows":
+        return [(t["date"], t["type"], t["title"], t["project"], t["amount"]) for t in register]
+    totals = defaultdict(float)
+    for t in register:
+        key = (t["date"], t["project"]) if granularity == "step" else (t["project"], t["type"])
+        totals[key] += t["amount"]
+    return totals
+
+
+def _close(a, b, tolerance: float) -> bool:
+    return math.isclose(a or 0, b or 0, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def _compare_totals(name: str, expected: dict, actual: dict, tolerance: float) -> list[str]:
+    problems = []
+    for key in expected.keys() | actual.keys():
+        if not _close(expected.get(key, 0), actual.get(key, 0), tolerance):
+            problems.append(f"{name} {key}: expected {expected.get(key, 0)!r}, got {actual.get(key, 0)!r}")
+    return problems
+
+
+def differences(reference: Portfolio, candidate: Portfolio, granularity: str, tolerance: float = 1e-6) -> list[str]:
+    """Differences between a candidate run and the reference run."""
+    problems = []
+    for attr in ("total_payments", "total_income", "balance"):
+        expected = getattr(reference.consolidated_account, attr)
+        actual = getattr(candidate.consolidated_account, attr)
+        if not _close(expected, actual, tolerance):
+            problems.append(f"account {attr}: expected {expected!r}, got {actual!r}")
+
+    accumulators = lambda p: {(prj.name, k): getattr(prj, k) for prj in p.projects for k in ("cost", "income", "current_step")}
+    problems += _compare_totals("project", accumulators(reference), accumulators(candidate), tolerance)
+    problems += _compare_totals("budget", _budget(reference), _budget(candidate), tolerance)
+
+    expected, actual = _ledger(reference, granularity), _ledger(candidate, granularity)
+    if granularity == "rows":
+        if len(expected) != len(actual):
+            problems.append(f"ledger rows: expected {len(expected)}, got {len(actual)}")
+        for index, (row, other) in enumerate(zip(expected, actual)):
+            if row[:4] != other[:4] or not _close(row[4], other[4], tolerance):
+                problems.append(f"ledger row {index}: expected {row}, got {other}")
+                break
+    else:
+        problems += _compare_totals(f"ledger by {granularity}", expected, actual, tolerance)
+    return problems
+
+
+def check(seed: int, engines=ENGINES, tolerance: float = 1e-6) -> dict:
+    """Run one scenario through the reference and every engine; returns problems per engine."""
+    case = scenario(seed)
+    reference = execute(case)
+    report = {}
+    for name in engines:
+        settings, run_options, granularity = ENGINES[name]
+        try:
+            candidate = execute(case, settings, run_options)
+        except Exception as e:
+            report[name] = [f"raised {type(e).__name__}: {e}"]
+            continue
+        problems = differences(reference, candidate, granularity, tolerance)
+        if problems:
+            report[name] = problems
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.differential", description="Compare engine modes against the reference run.")
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--scenarios", type=int, default=50)
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma separated subset of: " + ", ".join(ENGINES))
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    parser.add_argument("--verbose", action="store_true", help="list every difference")
+    args = parser.parse_args(argv)
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+
+    failures = defaultdict(list)
+    for seed in range(args.seed, args.seed + args.scenarios):
+        for name, problems in check(seed, engines, args.tolerance).items():
+            failures[name].append(seed)
+            print(f"seed {seed} {name}: {len(problems)} difference(s), first: {problems[0]}")
+            if args.verbose:
+                for problem in problems[1:]:
+                    print(f"    {problem}")
+
+    for name in engines:
+        seeds = failures.get(name, [])
+        status = "ok" if not seeds else f"FAILED on seeds {seeds[:10]}{' ...' if len(seeds) > 10 else ''}"
+        print(f"{name:<24} {args.scenarios - len(seeds)}/{args.scenarios} {status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
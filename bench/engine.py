@@ -0,0 +1,110 @@
+"""Per-phase timing of simulation runs and regression checks against a baseline."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import platform
+import statistics
+import time
+
+from sim import Portfolio, constants, parseYAML, pivotbudget
+
+PHASES = ("parse", "run", "getbudget", "pivotbudget", "serialize")
+
+
+def _timed(timings: dict, phase: str, func, *args, **kwargs):
+    began = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[phase] = time.perf_counter() - began
+    return result
+
+
+def _serialize(portfolio, budget) -> str:
+    """Serialize a run the way the /simulate endpoint does."""
+    return json.dumps(
+        {
+            "projects": portfolio.list_projects().to_dict(orient="records"),
+            "transactions": portfolio.list_transactions().to_dict(orient="records"),
+            "budget": budget.to_dict(orient="records"),
+        },
+        default=str,
+    )
+
+
+def run_once(scenario: dict, settings: dict | None = None, run_options: dict | None = None) -> tuple[dict, dict]:
+    """Run a scenario once and return ``(timings, counts)``; engine output is suppressed."""
+    settings = settings or {}
+    run_options = run_options or {}
+    timings = {}
+    constants.FCRDATA[:] = scenario["fcrdata"]
+    constants.SUPPORTDATA[:] = scenario["supportdata"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        events = _timed(timings, "parse", parseYAML, scenario["events"])
+        portfolio = Portfolio(**settings)
+        portfolio.set_portfolio(events)
+        _timed(timings, "run", portfolio.run, scenario["steps"], **run_options)
+        budget = _timed(timings, "getbudget", portfolio.getbudget)
+        _timed(timings, "pivotbudget", pivotbudget, budget)
+        payload = _timed(timings, "serialize", _serialize, portfolio, budget)
+    counts = {
+        "projects": len(portfolio.projects),
+        "ledger_rows": len(portfolio.consolidated_account.register),
+        "budget_rows": len(budget),
+        "payload_bytes": len(payload),
+    }
+    return timings, counts
+
+
+def run_benchmark(
+    scenario: dict,
+    repeat: int = 3,
+    settings: dict | None = None,
+    run_options: dict | None = None,
+) -> dict:
+    """Time every phase ``repeat`` times and summarise the results.
+
+    Returns a JSON-serialisable dict with the scenario parameters, engine
+    settings, environment and, per phase, the min/median/max of the runs.
+    """
+    runs = []
+    counts = {}
+    for _ in range(repeat):
+        timings, counts = run_once(scenario, settings, run_options)
+        runs.append(timings)
+    phases = {}
+    for phase in PHASES:
+        values = [timings[phase] for timings in runs]
+        phases[phase] = {
+            "min": min(values),
+            "median": statistics.median(values),
+            "max": max(values),
+            "runs": values,
+        }
+    return {
+        "params": scenario["params"],
+        "settings": dict(settings or {}, **(run_options or {})),
+        "environment": {"python": platform.python_version(), "machine": platform.machine()},
+        "counts": counts,
+        "phases": phases,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float = 0.2, statistic: str = "median") -> list[dict]:
+    """Phases slower than the baseline by more than ``tolerance`` (a fraction).
+
+    Each entry gives the phase, baseline and current times and their ratio.
+    Phases missing from the baseline are not flagged.
+    """
+    regressions = []
+    for phase, current in result["phases"].items():
+        reference = baseline.get("phases", {}).get(phase)
+        if not reference or not reference.get(statistic):
+            continue
+        ratio = current[statistic] / reference[statistic]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {"phase": phase, "baseline": reference[statistic], "current": current[statistic], "ratio": ratio}
+            )
+    return regressions
@@ -0,0 +1,219 @@
+"""Load test for the Flask simulation endpoints.
+
+Drives ``/simulate`` and ``/simulate/pivot`` either in-process (each worker
+process imports the app and uses Flask's test client, like a gunicorn worker)
+or against a running server with ``--url``. Every configuration ``WxT`` runs
+W client processes with T threads each and reports throughput, p50/p95/p99
+latency, errors and peak RSS.
+
+Each request sends a scenario generated from its own seed, so concurrent
+requests never share a computation through single-flight coalescing. With
+``--coalesce`` every request sends the same scenario instead, to measure what
+coalescing saves.
+
+The simulation endpoints do not require a Google login, so the OAuth blueprint
+is left registered but never exercised.
+
+Usage example:
+    python -m bench.loadtest --configs 1x1,1x4,2x2,4x1 --requests 40 --projects 20
+    python -m bench.loadtest --url http://127.0.0.1:8080 --server-pid 12345 --configs 1x8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .generator import generate
+
+ENDPOINTS = {"simulate": "/simulate", "pivot": "/simulate/pivot"}
+
+
+def _payload(scenario: dict) -> bytes:
+    return json.dumps(
+        {
+            "events": scenario["events"],
+            "steps": scenario["steps"],
+            "fcrdata": scenario["fcrdata"],
+            "supportdata": scenario["supportdata"],
+        }
+    ).encode("utf-8")
+
+
+def _in_process_sender():
+    """Return a function posting JSON to the app in this process; one test client per thread."""
+    from app import app
+
+    local = threading.local()
+
+    def send(path: str, body: bytes) -> int:
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client.post(path, data=body, content_type="application/json").status_code
+
+    return send
+
+
+def _http_sender(url: str):
+    """Return a function posting JSON to a running server."""
+
+    def send(path: str, body: bytes) -> int:
+        request = urllib.request.Request(
+            url.rstrip("/") + path, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    return send
+
+
+def _client_process(job: tuple) -> dict:
+    """Send each of ``bodies`` once, from ``threads`` threads, and report the timings."""
+    url, path, bodies, threads = job
+    # the engine prints progress for every project and the routes log every
+    # request at debug level; keep both out of the measurements
+    sys.stdout = open(os.devnull, "w")
+    logging.disable(logging.INFO)
+    send = _http_sender(url) if url else _in_process_sender()
+    send(path, bodies[0])  # warm-up, not measured
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    shares = [bodies[i::threads] for i in range(threads)]
+
+    def loop(share: list[bytes]):
+        for body in share:
+            began = time.perf_counter()
+            try:
+                status = send(path, body)
+            except Exception:
+                status = None
+            elapsed = time.perf_counter() - began
+            with lock:
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append(status)
+
+    workers = [threading.Thread(target=loop, args=(share,)) for share in shares]
+    started = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return {
+        "started": started,
+        "finished": time.time(),
+        "latencies": latencies,
+        "errors": len(errors),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _server_peak_rss(pid: int) -> float | None:
+    """Peak resident set size (VmHWM) of a local server process in MB."""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def run_config(endpoint: str, processes: int, threads: int, bodies: list[bytes], url: str | None = None) -> dict:
+    """Send every body once from a ``processes x threads`` configuration and summarise it."""
+    path = ENDPOINTS[endpoint]
+    shares = [bodies[i::processes] for i in range(processes)]
+    jobs = [(url, path, share, threads) for share in shares if share]
+    with ProcessPoolExecutor(max_workers=len(jobs), mp_context=multiprocessing.get_context("spawn")) as executor:
+        reports = list(executor.map(_client_process, jobs))
+    latencies = np.array([latency for report in reports for latency in report["latencies"]])
+    wall = max(r["finished"] for r in reports) - min(r["started"] for r in reports)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "endpoint": endpoint,
+        "config": f"{processes}x{threads}",
+        "requests": int(len(latencies)),
+        "errors": sum(r["errors"] for r in reports),
+        "throughput": len(latencies) / wall if wall > 0 else 0.0,
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in reports) if url is None else None,
+    }
+
+
+def _parse_configs(text: str) -> list[tuple[int, int]]:
+    configs = []
+    for part in text.split(","):
+        processes, _, threads = part.strip().lower().partition("x")
+        configs.append((int(processes), int(threads or 1)))
+    return configs
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.loadtest", description="Load test the simulation endpoints.")
+    parser.add_argument("--url", help="base URL of a running server (default: drive the app in-process)")
+    parser.add_argument("--server-pid", type=int, help="pid of the local server, to report its peak RSS")
+    parser.add_argument("--endpoints", default="simulate,pivot", help="comma separated: simulate, pivot")
+    parser.add_argument("--configs", default="1x1,1x4,2x2,4x1", help="comma separated PROCESSESxTHREADS")
+    parser.add_argument("--requests", type=int, default=20, help="measured requests per configuration")
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--staff", type=int, default=3)
+    parser.add_argument("--costs", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first request's scenario")
+    parser.add_argument(
+        "--coalesce", action="store_true", help="send the same scenario every time, so concurrent requests share runs"
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    def scenario(seed: int) -> dict:
+        return generate(seed=seed, projects=args.projects, staff=args.staff, costs=args.costs, horizon=args.horizon)
+
+    first = scenario(args.seed)
+    if args.coalesce:
+        bodies = [_payload(first)] * args.requests
+    else:
+        bodies = [_payload(first)] + [_payload(scenario(args.seed + i)) for i in range(1, args.requests)]
+    results = []
+    header = f"{'endpoint':<10} {'config':>7} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'peak RSS':>9}"
+    print(header)
+    for endpoint in [e.strip() for e in args.endpoints.split(",")]:
+        for processes, threads in _parse_configs(args.configs):
+            result = run_config(endpoint, processes, threads, bodies, args.url)
+            if args.server_pid:
+                result["peak_rss_mb"] = _server_peak_rss(args.server_pid)
+            results.append(result)
+            rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+            print(
+                f"{endpoint:<10} {result['config']:>7} {result['requests']:>6} {result['errors']:>6} "
+                f"{result['throughput']:>8.2f} {result['p50']:>8.3f} {result['p95']:>8.3f} {result['p99']:>8.3f} {rss:>9}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"params": first["params"], "coalesce": args.coalesce, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
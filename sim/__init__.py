@@ -14,15 +14,32 @@ from .constants import (
     FCRDATA,
     SUPPORTDATA,
 )
-from .models import Worker, ConsolidatedAccount
+from .expressions import StepExpression
+from .ledger import LedgerIndex
+from .models import Worker, WorkerCosts, ConsolidatedAccount, LedgerRegister
 from .portfolio import Portfolio
+from .snapshot import PortfolioSnapshot
+from .triggers import TriggerIndex
+from .tracing import Tracer, TraceEvent, NullSink, RingBufferSink, ConsoleSink, JSONLogSink
+from .finance import LoanSchedule, CreditSchedule, amortize, credit_schedule
 from .project import Project
-from .policies import Policy, FullCostRecovery, Grant, Subsidy, Rename, Finance, CarbonFinancing
+from .policies import (
+    Policy,
+    PolicySchedule,
+    StepPolicyAdapter,
+    FullCostRecovery,
+    Grant,
+    Subsidy,
+    Rename,
+    Finance,
+    CarbonFinancing,
+)
 from .utils import (
     get_current_month,
     printtimestamp,
     pivotbudget,
     parseYAML,
+    expand_staffing_templates,
     yaml_to_react_flow_json,
     react_flow_to_yaml,
 )
@@ -36,9 +53,25 @@ __all__ = [
     "Portfolio",
     "Project",
     "Worker",
+    "WorkerCosts",
     "ConsolidatedAccount",
+    "LedgerRegister",
+    "LedgerIndex",
+    "PortfolioSnapshot",
+    "TriggerIndex",
+    "Tracer",
+    "TraceEvent",
+    "NullSink",
+    "RingBufferSink",
+    "ConsoleSink",
+    "JSONLogSink",
+    "LoanSchedule",
+    "CreditSchedule",
+    "StepExpression",
     # Policies
     "Policy",
+    "PolicySchedule",
+    "StepPolicyAdapter",
     "FullCostRecovery",
     "Grant",
     "Subsidy",
@@ -46,10 +79,13 @@ __all__ = [
     "Finance",
     "CarbonFinancing",
     # Utilities
+    "amortize",
+    "credit_schedule",
     "get_current_month",
     "printtimestamp",
     "pivotbudget",
     "parseYAML",
+    "expand_staffing_templates",
     "yaml_to_react_flow_json",
     "react_flow_to_yaml",
     # Constants
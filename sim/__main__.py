@@ -0,0 +1,225 @@
+"""Command line batch runner: ``python -m sim``.
+
+Runs every scenario YAML in the given directories, globs or files against
+shared FCR and support catalogues, in a process pool, and writes the budgets
+and ledgers of all scenarios to consolidated columnar files (with a
+``scenario`` column) in the output directory.
+
+Each finished scenario is written to ``parts/`` and recorded in
+``manifest.json``, so an interrupted or partly failed batch is resumed by
+running the same command again: scenarios already done with the same input,
+reference data, steps and engine options are skipped, failed ones are retried.
+
+Usage example:
+    python -m sim scenarios/ --fcr fcr.yaml --support support.yaml --steps 36 --output out/
+    python -m sim "reforecast/*.yaml" --fcr fcr.yaml --support support.yaml --processes 8 --vectorized
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from . import Portfolio, parseYAML
+from .parallel import _init_worker
+from .refdata import content_digest
+
+FORMATS = {"parquet": ".parquet", "csv": ".csv"}
+
+
+def find_scenarios(sources: list[str]) -> dict[str, str]:
+    """Map scenario names to YAML paths for directories, glob patterns and files."""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths += [os.path.join(source, f) for f in sorted(os.listdir(source)) if f.endswith((".yaml", ".yml"))]
+        else:
+            paths += sorted(glob.glob(source, recursive=True)) or [source]
+    scenarios = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        unique, n = name, 1
+        while unique in scenarios:
+            n += 1
+            unique = f"{name}_{n}"
+        scenarios[unique] = path
+    return scenarios
+
+
+def load_reference(path: str | None) -> list[dict]:
+    """Parse an FCR or support catalogue file once for the whole batch."""
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        rows = parseYAML(f.read())
+    if isinstance(rows, dict):
+        rows = next((v for v in rows.values() if isinstance(v, list)), [])
+    return list(rows or [])
+
+
+def _write(df: pd.DataFrame, path: str, fmt: str):
+    """Write a frame atomically so a crash never leaves a half-written part."""
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False, compression="zstd")
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _read(path: str, fmt: str) -> pd.DataFrame:
+    return pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path)
+
+
+def part_path(parts: str, name: str, kind: str, fmt: str) -> str:
+    """Path of one scenario's budget or ledger part."""
+    return os.path.join(parts, f"{name}.{kind}{FORMATS[fmt]}")
+
+
+def run_scenario(job: tuple) -> dict:
+    """Run one scenario file in a worker and write its budget and ledger parts."""
+    name, path, steps, settings, run_options, parts, fmt = job
+    began = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        events = parseYAML(f.read())
+    portfolio = Portfolio(name, **settings)
+    portfolio.set_portfolio(events)
+    portfolio.run(steps, **run_options)
+    budget = portfolio.getbudget()
+    ledger = portfolio.list_transactions()
+    for kind, df in (("budget", budget), ("ledger", ledger)):
+        df.insert(0, "scenario", name)
+        _write(df, part_path(parts, name, kind, fmt), fmt)
+    return {
+        "projects": len(portfolio.projects),
+        "budget_rows": len(budget),
+        "ledger_rows": len(ledger),
+        "balance": portfolio.consolidated_account.balance,
+        "seconds": round(time.perf_counter() - began, 3),
+    }
+
+
+def _load_manifest(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"scenarios": {}}
+
+
+def _save_manifest(manifest: dict, path: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def consolidate(names: list[str], parts: str, output: str, fmt: str):
+    """Combine the per-scenario parts into one budget and one ledger file."""
+    for kind in ("budget", "ledger"):
+        files = [part_path(parts, name, kind, fmt) for name in names]
+        frames = [_read(f, fmt) for f in files if os.path.exists(f)]
+        if frames:
+            _write(pd.concat(frames, ignore_index=True), os.path.join(output, f"{kind}{FORMATS[fmt]}"), fmt)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sim", description="Run a batch of scenario files.")
+    parser.add_argument("scenarios", nargs="+", help="directories, glob patterns or YAML files")
+    parser.add_argument("--fcr", help="FCR catalogue YAML shared by all scenarios")
+    parser.add_argument("--support", help="support catalogue YAML shared by all scenarios")
+    parser.add_argument("--steps", type=int, default=12)
+    parser.add_argument("--output", default="sim-output", help="output directory (default: sim-output)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: every CPU)")
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--sparse", action="store_true")
+    parser.add_argument("--compact-ledger", action="store_true")
+    parser.add_argument("--event-driven", action="store_true")
+    parser.add_argument("--fresh", action="store_true", help="ignore the manifest and rerun every scenario")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output needs pyarrow (pip install pyarrow) or use --format csv")
+
+    scenarios = find_scenarios(args.scenarios)
+    missing = [path for path in scenarios.values() if not os.path.isfile(path)]
+    if missing:
+        parser.error(f"scenario files not found: {', '.join(missing)}")
+    if not scenarios:
+        parser.error("no scenario files found")
+
+    fcrdata, supportdata = load_reference(args.fcr), load_reference(args.support)
+    settings = {"vectorized": args.vectorized, "sparse": args.sparse, "compact_ledger": args.compact_ledger}
+    run_options = {"event_driven": True} if args.event_driven else {}
+
+    parts = os.path.join(args.output, "parts")
+    os.makedirs(parts, exist_ok=True)
+    manifest_path = os.path.join(args.output, "manifest.json")
+    manifest = {"scenarios": {}} if args.fresh else _load_manifest(manifest_path)
+    recorded = manifest.setdefault("scenarios", {})
+    batch = {
+        "steps": args.steps,
+        "settings": settings,
+        "run_options": run_options,
+        "format": args.format,
+        "fcrdata": content_digest(fcrdata),
+        "supportdata": content_digest(supportdata),
+    }
+
+    # A scenario is up to date if its input and the batch inputs are unchanged
+    # and its parts are still on disk
+    digests = {}
+    for name, path in scenarios.items():
+        with open(path, "rb") as f:
+            digests[name] = content_digest([{"file": hashlib.sha256(f.read()).hexdigest(), **batch}])
+
+    def up_to_date(name: str) -> bool:
+        entry = recorded.get(name, {})
+        return (
+            entry.get("status") == "done"
+            and entry.get("digest") == digests[name]
+            and all(os.path.exists(part_path(parts, name, kind, args.format)) for kind in ("budget", "ledger"))
+        )
+
+    todo = [name for name in scenarios if not up_to_date(name)]
+    skipped = len(scenarios) - len(todo)
+    print(f"{len(scenarios)} scenarios, {skipped} up to date, {len(todo)} to run")
+
+    jobs = [(name, scenarios[name], args.steps, settings, run_options, parts, args.format) for name in todo]
+    failed = 0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=args.processes, initializer=_init_worker, initargs=(fcrdata, supportdata)) as executor:
+            futures = {executor.submit(run_scenario, job): job[0] for job in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                entry = {"source": scenarios[name], "digest": digests[name]}
+                try:
+                    entry.update(status="done", **future.result())
+                    note = f"ok {entry['seconds']:.2f}s, {entry['projects']} projects, {entry['budget_rows']} budget rows"
+                except Exception as e:
+                    failed += 1
+                    entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+                    note = f"FAILED {entry['error']}"
+                recorded[name] = entry
+                _save_manifest(manifest, manifest_path)
+                print(f"[{done}/{len(jobs)}] {name}: {note}", flush=True)
+
+    done_names = [name for name in scenarios if recorded.get(name, {}).get("status") == "done"]
+    consolidate(done_names, parts, args.output, args.format)
+    print(f"Wrote budget and ledger for {len(done_names)} scenarios to {args.output}" + (f"; {failed} failed" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
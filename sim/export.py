@@ -0,0 +1,244 @@
+"""Columnar export of budgets, pivots and ledgers to Parquet and Arrow IPC.
+
+Label columns (items, descriptions, types, projects, ...) are written as
+dictionary columns, steps and dates as 32-bit integers and amounts as
+float64, so the files load back into pandas as categoricals and numbers
+without any parsing. Arrow output uses the IPC stream format (read it with
+``pyarrow.ipc.open_stream``), which lets every batch carry its own label
+dictionaries.
+
+``write`` builds the whole table in memory. For large runs ``stream`` yields
+the same table in chunks instead, one row group (Parquet) or record batch (Arrow)
+per project for budgets and per ``LEDGER_CHUNK_ROWS`` transactions for
+ledgers, so only one project's budget is held at a time.
+
+Requires pyarrow (``pip install pyarrow``), imported on first use.
+
+Usage example:
+    from sim import export
+    export.write(portfolio, "budget.parquet", table="budget")
+    with open("ledger.arrows", "wb") as f:
+        for chunk in export.stream(portfolio, table="ledger", format="arrow"):
+            f.write(chunk)
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import pandas as pd
+
+from .utils import pivotbudget
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrows"}
+MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.stream"}
+TABLES = ("budget", "pivot", "ledger")
+
+# Column kinds: "label" columns are dictionary encoded, "int" columns int32
+BUDGET_COLUMNS = {
+    "project": "label",
+    "item": "label",
+    "step": "int",
+    "budget": "float",
+    "description": "label",
+    "type": "label",
+    "position": "label",
+}
+LEDGER_COLUMNS = {
+    "type": "label",
+    "title": "label",
+    "project": "label",
+    "amount": "float",
+    "date": "int",
+    "balance": "float",
+}
+PIVOT_COLUMNS = {"item": "label", "description": "label", "type": "label"}
+
+LEDGER_CHUNK_ROWS = 65_536
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImportError("Columnar export needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def _arrow_type(pa, kind: str):
+    if kind == "label":
+        return pa.dictionary(pa.int32(), pa.string())
+    if kind == "int":
+        return pa.int32()
+    return pa.float64()
+
+
+def _column_name(name) -> str:
+    # pivot step columns come out of pivot_table as floats
+    if isinstance(name, float) and name.is_integer():
+        return str(int(name))
+    return str(name)
+
+
+def _column(pa, series: pd.Series, kind: str | None):
+    """Convert one column to Arrow with the type of its kind."""
+    if kind is None:
+        if isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series.dtype):
+            kind = "label"
+        else:
+            return pa.array(series, from_pandas=True)
+    if kind != "label":
+        return pa.array(series, type=_arrow_type(pa, kind), from_pandas=True)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        indices = pa.array(codes, type=pa.int32(), mask=codes < 0)
+        dictionary = pa.array([str(c) for c in series.cat.categories], type=pa.string())
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+    values = [None if pd.isna(v) else str(v) for v in series.astype(object)]
+    return pa.array(values, type=pa.string()).dictionary_encode()
+
+
+def to_table(df: pd.DataFrame, columns: dict | None = None):
+    """Convert a frame to a ``pyarrow.Table`` with the dtypes of the ``columns`` kinds.
+
+    Columns not listed are dictionary encoded if they hold labels and
+    converted as they are otherwise.
+    """
+    pa = _pyarrow()
+    columns = columns or {}
+    names = [_column_name(name) for name in df.columns]
+    arrays = [_column(pa, df.iloc[:, i], columns.get(name)) for i, name in enumerate(names)]
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def schema(table: str):
+    """Fixed Arrow schema of a streamed ``budget`` or ``ledger`` table."""
+    pa = _pyarrow()
+    kinds = BUDGET_COLUMNS if table == "budget" else LEDGER_COLUMNS
+    return pa.schema([(name, _arrow_type(pa, kind)) for name, kind in kinds.items()])
+
+
+def budget_table(portfolio):
+    """Every project's budget as one Arrow table with the ``schema("budget")`` columns.
+
+    Built from ``budget_batches``, so it matches what ``stream`` writes.
+    """
+    batches = list(budget_batches(portfolio))
+    if not batches:
+        return schema("budget").empty_table()
+    return _pyarrow().concat_tables(batches)
+
+
+def pivot_table(portfolio):
+    """Budget pivot (items by step) as an Arrow table with one column per step."""
+    return to_table(pivotbudget(portfolio.getbudget()).reset_index(), PIVOT_COLUMNS)
+
+
+def ledger_table(portfolio):
+    """Consolidated ledger (``Portfolio.list_transactions``) as an Arrow table."""
+    return to_table(portfolio.list_transactions(), LEDGER_COLUMNS)
+
+
+def _check(table: str, format: str):
+    if table not in TABLES:
+        raise ValueError(f"Unknown table {table!r}, expected one of {', '.join(TABLES)}")
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of {', '.join(FORMATS)}")
+
+
+def write(portfolio, path, table: str = "budget", format: str = "parquet", compression: str = "zstd"):
+    """Write one table of a finished portfolio to a file path or binary file object."""
+    _check(table, format)
+    builders = {"budget": budget_table, "pivot": pivot_table, "ledger": ledger_table}
+    arrow = builders[table](portfolio)
+    pa = _pyarrow()
+    if format == "parquet":
+        pa.parquet.write_table(arrow, path, compression=compression)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.ipc.new_stream(path, arrow.schema, options=options) as writer:
+            writer.write_table(arrow)
+
+
+def budget_batches(portfolio) -> Iterator:
+    """Yield each project's budget as an Arrow table with a leading ``project`` column."""
+    target = schema("budget")
+    for prj in portfolio.projects:
+        df = prj.getbudgetadjusted()
+        if df.empty:
+            continue
+        df.insert(0, "project", prj.name)
+        df = df.reindex(columns=target.names)
+        yield to_table(df, BUDGET_COLUMNS).cast(target)
+
+
+def ledger_batches(portfolio, rows: int = LEDGER_CHUNK_ROWS) -> Iterator:
+    """Yield the ledger in chunks of ``rows`` transactions as Arrow tables."""
+    register = portfolio.consolidated_account.register
+    target = schema("ledger")
+    for start in range(0, len(register), rows):
+        df = pd.DataFrame(list(register[start : start + rows]))
+        df = df.reindex(columns=target.names)
+        yield to_table(df, LEDGER_COLUMNS).cast(target)
+
+
+class _Chunks:
+    """Write-only file object collecting what a writer produces until drained."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream(portfolio, table: str = "budget", format: str = "parquet", compression: str = "zstd") -> Iterator[bytes]:
+    """Yield one table of a finished portfolio as file bytes, written batch by batch.
+
+    Budgets are written per project and carry a ``project`` column; ledgers
+    in chunks of ``LEDGER_CHUNK_ROWS``; the pivot, which needs every budget
+    row, in one batch.
+    """
+    _check(table, format)
+    pa = _pyarrow()
+    if table == "budget":
+        target, batches = schema("budget"), budget_batches(portfolio)
+    elif table == "ledger":
+        target, batches = schema("ledger"), ledger_batches(portfolio)
+    else:
+        arrow = pivot_table(portfolio)
+        target, batches = arrow.schema, iter([arrow])
+
+    sink = _Chunks()
+    if format == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, target, compression=compression)
+    else:
+        writer = pa.ipc.new_stream(sink, target, options=pa.ipc.IpcWriteOptions(compression=compression))
+    with writer:
+        for batch in batches:
+            writer.write_table(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
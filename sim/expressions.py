@@ -0,0 +1,147 @@
+"""Step-dependent cost expressions.
+
+A direct cost may be written as an expression of the simulation step, e.g.
+
+    cost: "{1000 * (1 + inflation) ** year}"
+    cost: "{where(month < 6, 200, 50)}"
+
+``step`` is the project step, ``year`` is ``step // 12`` and ``month`` is
+``step % 12``; a YAML variable of the same name takes precedence. The
+expression is parsed and checked once, then evaluated for the whole term in a
+single vectorized pass; the values are cached per term.
+"""
+
+from __future__ import annotations
+
+import ast
+
+import numpy as np
+
+STEP_NAMES = ("step", "year", "month")
+
+FUNCTIONS = {
+    "min": np.minimum,
+    "max": np.maximum,
+    "where": np.where,
+    "abs": np.abs,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "sin": np.sin,
+    "cos": np.cos,
+    "exp": np.exp,
+    "log": np.log,
+}
+
+# compiled code by source, shared by every expression with the same text
+_COMPILED: dict = {}
+
+_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+)
+
+
+def names_in(source: str) -> set[str]:
+    """Variable names referenced by an expression (function names excluded)."""
+    tree = ast.parse(source.strip(), mode="eval")
+    called = {node.func.id for node in ast.walk(tree) if isinstance(node, ast.Call) and isinstance(node.func, ast.Name)}
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)} - called
+
+
+def is_step_expression(source: str, variables: dict | None = None) -> bool:
+    """Whether an expression depends on the step and must be evaluated by the engine.
+
+    Step names defined in ``variables`` are ordinary variables and do not count.
+    """
+    try:
+        return bool(names_in(source) & (set(STEP_NAMES) - set(variables or ())))
+    except SyntaxError:
+        return False
+
+
+class StepExpression:
+    """
+    Arithmetic expression of ``step``, ``year`` and ``month`` compiled once.
+    Attributes:
+        source (str): Expression text, without curly braces.
+        variables (dict): Values bound to the other names in the expression.
+    """
+
+    def __init__(self, source: str, variables: dict | None = None):
+        source = source.strip()
+        if source.startswith("{") and source.endswith("}"):
+            source = source[1:-1].strip()
+        self.source = source
+        names = names_in(source)
+        self.variables = {name: value for name, value in (variables or {}).items() if name in names}
+        unknown = names - set(STEP_NAMES) - set(self.variables)
+        if unknown:
+            raise ValueError(f"Unknown variable(s) in expression '{source}': {sorted(unknown)}")
+        self._code = None
+        self._values = {}
+
+    def compile(self):
+        """Check the expression only uses arithmetic, comparisons and known functions, and compile it."""
+        if self._code is None and self.source in _COMPILED:
+            self._code = _COMPILED[self.source]
+        if self._code is None:
+            tree = ast.parse(self.source, mode="eval")
+            for node in ast.walk(tree):
+                if not isinstance(node, _NODES):
+                    raise ValueError(f"Unsupported expression element {type(node).__name__} in '{self.source}'")
+                if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS):
+                    raise ValueError(f"Unsupported function in '{self.source}'")
+            self._code = _COMPILED[self.source] = compile(tree, f"<cost {self.source}>", "eval")
+        return self._code
+
+    def evaluate(self, steps) -> np.ndarray:
+        """Evaluate the expression over an array of steps."""
+        steps = np.asarray(steps)
+        namespace = {**FUNCTIONS, "step": steps, "year": steps // 12, "month": steps % 12, **self.variables}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = eval(self.compile(), {"__builtins__": {}}, namespace)
+        values = np.broadcast_to(np.asarray(values, dtype=float), steps.shape)
+        # non-finite results are treated as zero, as for parse-time expressions
+        return np.where(np.isfinite(values), values, 0.0)
+
+    def values(self, term: int) -> list[float]:
+        """Values at steps ``0 .. term-1``, computed once per term."""
+        values = self._values.get(term)
+        if values is None:
+            values = self._values[term] = self.evaluate(np.arange(term)).tolist()
+        return values
+
+    def at(self, step: int, term: int) -> float:
+        """Value at ``step`` of a project with the given ``term``."""
+        if 0 <= step < term:
+            return self.values(term)[step]
+        return float(self.evaluate(np.array([step]))[0])
+
+    def changes(self, term: int) -> list[int]:
+        """Steps at which the value differs from the previous step."""
+        values = np.asarray(self.values(term))
+        return [0] + (np.flatnonzero(np.diff(values)) + 1).tolist() if term else []
+
+    def __getstate__(self):
+        return {"source": self.source, "variables": self.variables}
+
+    def __setstate__(self, state):
+        self.source = state["source"]
+        self.variables = state["variables"]
+        self._code = None
+        self._values = {}
+
+    def __repr__(self):
+        return f"StepExpression({self.source!r})"
+
+    def __str__(self):
+        return f"{{{self.source}}}"
@@ -0,0 +1,175 @@
+"""Loan amortization schedules.
+
+``amortize`` computes the whole repayment schedule of a loan (principal,
+interest, payment and balance per period) in one vectorized computation. The
+capital, rate and term arguments broadcast against each other, so a sweep over
+many rates and terms is a single array operation:
+
+    sweep = amortize(100000, rates[:, None], terms[None, :], profile="annuity")
+    sweep.total_interest  # shape (len(rates), len(terms))
+
+Rates are per period (per simulation step). Periods beyond a loan's own term
+are zero-filled when terms of different lengths are broadcast together.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+PROFILES = ("straight", "annuity", "interest_only")
+
+
+class LoanSchedule:
+    """
+    Amortization schedule for one loan or a broadcast grid of loans.
+    Attributes:
+        principal (np.ndarray): Capital repaid in each period.
+        interest (np.ndarray): Interest charged in each period.
+        payment (np.ndarray): Total payment (principal + interest) in each period.
+        opening (np.ndarray): Outstanding balance at the start of each period.
+        balance (np.ndarray): Outstanding balance at the end of each period.
+    """
+
+    def __init__(self, principal, interest, opening):
+        self.principal = principal
+        self.interest = interest
+        self.payment = principal + interest
+        self.opening = opening
+        self.balance = opening - principal
+
+    @property
+    def periods(self) -> int:
+        """Number of periods covered by the schedule (the longest term)."""
+        return self.payment.shape[-1]
+
+    @property
+    def total_interest(self):
+        """Interest paid over the life of the loan."""
+        return self.interest.sum(axis=-1)
+
+    @property
+    def total_paid(self):
+        """Total of all payments over the life of the loan."""
+        return self.payment.sum(axis=-1)
+
+
+def amortize(capital, rate, term, profile: str = "straight") -> LoanSchedule:
+    """Compute a loan's full amortization schedule.
+
+    Parameters
+    ----------
+    capital : float | array-like
+        Amount borrowed.
+    rate : float | array-like
+        Interest rate per period.
+    term : int | array-like
+        Number of repayment periods.
+    profile : str, optional
+        ``"straight"`` repays equal principal each period with interest on the
+        opening balance (the engine's historic behaviour), ``"annuity"`` makes
+        level payments and ``"interest_only"`` pays interest each period and
+        the capital in the final one. By default ``"straight"``.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown repayment profile '{profile}', expected one of {PROFILES}")
+    capital, rate, term = np.broadcast_arrays(
+        np.asarray(capital, dtype=float), np.asarray(rate, dtype=float), np.asarray(term)
+    )
+    if np.any(term < 1):
+        raise ValueError("Loan term must be at least one period")
+    periods = int(term.max())
+    k = np.arange(periods)
+    capital, rate, term = capital[..., None], rate[..., None], term[..., None]
+    active = k < term
+
+    if profile == "straight":
+        principal = np.where(active, capital / term, 0.0)
+        opening = np.where(active, capital - k * (capital / term), 0.0)
+    elif profile == "interest_only":
+        principal = np.where(k == term - 1, capital, 0.0)
+        opening = np.where(active, capital, 0.0)
+    else:
+        growth = (1.0 + rate) ** k
+        with np.errstate(divide="ignore", invalid="ignore"):
+            level = np.where(rate == 0, capital / term, capital * rate / (1.0 - (1.0 + rate) ** -term))
+            paid = np.where(rate == 0, level * k, level * (growth - 1.0) / rate)
+        opening = np.where(active, capital * np.where(rate == 0, 1.0, growth) - paid, 0.0)
+        principal = np.where(active, level - rate * opening, 0.0)
+    interest = np.where(active, rate * opening, 0.0)
+    return LoanSchedule(principal, interest, opening)
+
+
+class CreditSchedule:
+    """
+    Carbon credit vesting and sale schedule over a horizon of steps.
+    Attributes:
+        vested (np.ndarray): Credits vesting at each step (one vintage per year).
+        sold (np.ndarray): Credits sold at each step.
+        price (np.ndarray): Credit price applying at each step.
+        income (np.ndarray): Sale income at each step.
+    """
+
+    def __init__(self, vested, sold, price):
+        self.vested = vested
+        self.sold = sold
+        self.price = price
+        self.income = sold * price
+
+    @property
+    def total_income(self) -> float:
+        """Income from all credit sales."""
+        return float(self.income.sum())
+
+    def nonzero(self):
+        """Steps with sale income, and the income at each of them."""
+        steps = np.flatnonzero(self.income)
+        return steps.tolist(), self.income[steps].tolist()
+
+
+def credit_schedule(
+    credits: float,
+    horizon: int = 480,
+    vesting=None,
+    price: float = 0.0,
+    price_growth: float = 0.0,
+    price_path=None,
+    sale_lag: int = 0,
+) -> CreditSchedule:
+    """Vest ``credits`` in annual vintages over ``horizon`` steps and sell them.
+
+    Parameters
+    ----------
+    credits : float
+        Total credits generated over the horizon.
+    horizon : int, optional
+        Number of steps over which credits vest, by default 480 (40 years).
+    vesting : list[float], optional
+        Relative share of credits vesting in each year; by default equal shares.
+        Vintage ``y`` vests at the last step of year ``y``.
+    price : float, optional
+        Credit price in year 0.
+    price_growth : float, optional
+        Annual price growth applied when no ``price_path`` is given.
+    price_path : list[float], optional
+        Price per year; the last value applies to later years.
+    sale_lag : int, optional
+        Steps between a vintage vesting and its sale, by default 0.
+    """
+    years = max(horizon // 12, 1)
+    shares = np.ones(years) if vesting is None else np.asarray(vesting, dtype=float)[:years]
+    shares = shares / shares.sum() if shares.sum() else shares
+    length = years * 12 + sale_lag
+    vest_steps = np.arange(len(shares)) * 12 + 11
+
+    vested = np.zeros(length)
+    vested[vest_steps] = credits * shares
+    sold = np.zeros(length)
+    sold[vest_steps + sale_lag] = credits * shares
+
+    year = np.arange(length) // 12
+    if price_path is not None:
+        path = np.asarray(price_path, dtype=float)
+        step_price = path[np.minimum(year, len(path) - 1)]
+    else:
+        step_price = price * (1.0 + price_growth) ** year
+    return CreditSchedule(vested, sold, step_price)
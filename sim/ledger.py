@@ -0,0 +1,120 @@
+"""Time-indexed cash-flow queries over the consolidated ledger.
+
+``LedgerIndex`` folds ledger transactions into per-step totals by project and
+by transaction type, and answers range questions from prefix sums:
+
+    index = portfolio.consolidated_account.index()
+    index.balance_at(27, project="Project Alpha")
+    index.min_balance()                      # (balance, step)
+    index.total(12, 24, kind="expenditure")  # spend over steps 12..23
+
+New transactions are folded in incrementally on the next query; the prefix
+sums (and the range-minimum table behind ``min_balance``) are rebuilt lazily
+only for the series that are queried. Balances are end-of-step balances, i.e.
+minus the cumulative sum of ledger amounts (income is stored negative).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class LedgerIndex:
+    """
+    Prefix sums of ledger amounts per step, project and transaction type.
+    Attributes:
+        register (Sequence): Transactions indexed (dicts with ``date``, ``project``,
+            ``type`` and ``amount``).
+        steps (int): Number of steps covered (last transaction date + 1).
+    """
+
+    def __init__(self, register):
+        self.register = register
+        self.steps = 0
+        self._seen = 0
+        self._flows = {}
+        self._prefix = {}
+        self._minima = {}
+
+    def refresh(self):
+        """Fold in transactions added to the register since the last query."""
+        count = len(self.register)
+        if count == self._seen:
+            return
+        for transaction in self.register[self._seen:count]:
+            date = int(transaction["date"])
+            amount = float(transaction["amount"])
+            project, kind = transaction.get("project"), transaction.get("type")
+            for key in ((None, None), (project, None), (None, kind), (project, kind)):
+                dates, amounts = self._flows.setdefault(key, ([], []))
+                dates.append(date)
+                amounts.append(amount)
+            self.steps = max(self.steps, date + 1)
+        self._seen = count
+        self._prefix.clear()
+        self._minima.clear()
+
+    def prefix(self, project: str | None = None, kind: str | None = None) -> np.ndarray:
+        """Cumulative ledger amount at the end of each step for a project and/or type."""
+        self.refresh()
+        key = (project, kind)
+        if key not in self._prefix:
+            dates, amounts = self._flows.get(key, ((), ()))
+            flows = np.bincount(np.asarray(dates, dtype=int), weights=amounts, minlength=self.steps)
+            self._prefix[key] = np.cumsum(flows[: self.steps])
+        return self._prefix[key]
+
+    def _cumulative(self, series: np.ndarray, step: int) -> float:
+        if step < 0 or not len(series):
+            return 0.0
+        return float(series[min(step, len(series) - 1)])
+
+    def total(self, start: int = 0, stop: int | None = None, project: str | None = None, kind: str | None = None) -> float:
+        """Sum of ledger amounts dated in steps ``start`` to ``stop`` (exclusive)."""
+        series = self.prefix(project, kind)
+        stop = self.steps if stop is None else stop
+        if stop <= start:
+            return 0.0
+        return self._cumulative(series, stop - 1) - self._cumulative(series, start - 1)
+
+    def spend(self, start: int = 0, stop: int | None = None, project: str | None = None) -> float:
+        """Expenditure over a window of steps."""
+        return self.total(start, stop, project, "expenditure")
+
+    def income(self, start: int = 0, stop: int | None = None, project: str | None = None) -> float:
+        """Income over a window of steps."""
+        return -self.total(start, stop, project, "income")
+
+    def balance_at(self, step: int, project: str | None = None) -> float:
+        """Balance at the end of ``step`` (a project's net contribution if ``project`` is given)."""
+        return -self._cumulative(self.prefix(project), step)
+
+    def balances(self, project: str | None = None) -> np.ndarray:
+        """End-of-step balance for every step."""
+        return -self.prefix(project)
+
+    def _table(self, project: str | None) -> list[np.ndarray]:
+        """Sparse table of argmin positions over power-of-two windows of the balance series."""
+        if project not in self._minima:
+            values = self.balances(project)
+            levels = [np.arange(len(values))]
+            width = 1
+            while width * 2 <= len(values):
+                left, right = levels[-1][:-width], levels[-1][width:]
+                levels.append(np.where(values[right] < values[left], right, left))
+                width *= 2
+            self._minima[project] = levels
+        return self._minima[project]
+
+    def min_balance(self, start: int = 0, stop: int | None = None, project: str | None = None) -> tuple[float, int] | None:
+        """Lowest end-of-step balance over steps ``start`` to ``stop`` (exclusive), and its first step."""
+        values = self.balances(project)
+        start = max(start, 0)
+        stop = len(values) if stop is None else min(stop, len(values))
+        if stop <= start:
+            return None
+        levels = self._table(project)
+        level = (stop - start).bit_length() - 1
+        left, right = levels[level][start], levels[level][stop - (1 << level)]
+        step = int(right if values[right] < values[left] else left)
+        return float(values[step]), step
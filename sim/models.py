@@ -2,10 +2,83 @@
 
 from __future__ import annotations
 
+import operator
+from bisect import bisect_right
+from collections.abc import Sequence
+from functools import lru_cache
+from itertools import chain, islice
+
+import numpy as np
 import pandas as pd
 
 from .constants import NIRATE, NITHRESHOLD, EMPLOYERPENSIONRATE, PENSIONFTETHRESHOLD
-from .utils import get_current_month, printtimestamp
+from .ledger import LedgerIndex
+from .tracing import AccountReport, tracer_of
+from .utils import get_current_month, intern_label, printtimestamp
+
+# Distinct salary terms kept as shared cost profiles; older ones are rebuilt on demand
+WORKER_COSTS_CACHE = 4096
+
+
+class WorkerCosts:
+    """
+    Immutable monthly cost profile shared by every worker with the same salary terms.
+    Obtain instances through :meth:`of`: identical definitions (by structural hash of
+    salary, FTE and pension rate) return the same object, so costs are computed once
+    per distinct role rather than once per person. The table keeps the most recently
+    used ``WORKER_COSTS_CACHE`` profiles, so a long-running server does not grow it
+    without bound.
+    Attributes:
+        salary (float): Monthly salary.
+        ni (float): Monthly employer National Insurance.
+        pension (float): Monthly employer pension contribution.
+        monthcost (float): Total monthly cost posted to the ledger.
+    """
+
+    __slots__ = ("salary", "ni", "pension", "monthcost", "_rows", "_key")
+
+    def __init__(self, salary: float, fte: float, employerpensionrate: float):
+        monthlysalary = salary / 12
+        monthlyThreshold = NITHRESHOLD / 7 * 365 / 12
+        ni = max(0, (monthlysalary - monthlyThreshold)) * NIRATE if salary > monthlyThreshold else 0
+        pension = monthlysalary * employerpensionrate if fte > PENSIONFTETHRESHOLD else 0
+        monthlycost = monthlysalary + ni + pension
+        values = {
+            "_key": (salary, fte, employerpensionrate),
+            "salary": monthlysalary,
+            "ni": ni,
+            "pension": pension,
+            # annual cost / 12, as Worker.getMonthSalaryCost computed it; dividing the
+            # annual figure rounds differently from monthlycost and keeps ledgers identical
+            "monthcost": monthlycost * 12 / 12,
+            "_rows": (
+                ("salary", monthlysalary, "Monthly salary"),
+                ("ni", ni, "National Insurance"),
+                ("pension", pension, "Pension contribution"),
+            ),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WorkerCosts is immutable")
+
+    def __reduce__(self):
+        # copies and unpickled instances resolve to the shared profile
+        return (WorkerCosts.of, self._key)
+
+    @classmethod
+    @lru_cache(maxsize=WORKER_COSTS_CACHE)
+    def of(cls, salary: float, fte: float, employerpensionrate: float) -> WorkerCosts:
+        """Return the shared cost profile for these salary terms."""
+        return cls(salary, fte, employerpensionrate)
+
+    def breakdown(self, month: int) -> list[dict]:
+        """Salary, NI and pension budget rows for a month."""
+        return [
+            {"step": month, "item": item, "budget": budget, "type": "1. Staffing", "description": description}
+            for item, budget, description in self._rows
+        ]
 
 
 class Worker:
@@ -19,16 +92,52 @@ class Worker:
         fte_salary (float): Full-time equivalent salary.
         fte (float): Full-time equivalent factor.
         salary (float): Total salary based on FTE and salary.
+        start (int): Project step at which the worker starts, by default 0.
+        end (int | None): Project step at which the worker leaves (exclusive), or
+            ``None`` to stay until the end of the project.
+        payrises (list[dict]): Pay rises, each with a ``step`` and either a new
+            FTE ``salary`` or a fractional ``rate`` applied to the previous salary.
     """
 
     def __init__(self, **kwargs):
-        self.position = kwargs.get("position", "undesignated")
-        self.department = kwargs.get("department", "unspecified")
+        self.position = intern_label(kwargs.get("position", "undesignated"))
+        self.department = intern_label(kwargs.get("department", "unspecified"))
         self.linemanagerrate = kwargs.get("linemanagerrate", 0)
         self.employerpensionrate = kwargs.get("employerpensionrate", EMPLOYERPENSIONRATE)
         self.fte_salary = kwargs.get("salary", 0)
         self.fte = kwargs.get("fte", 1)
         self.salary = self.fte * self.fte_salary
+        self.start = kwargs.get("start", 0)
+        self.end = kwargs.get("end")
+        self.payrises = []
+        fte_salary = self.fte_salary
+        for rise in sorted(kwargs.get("payrises", []), key=lambda r: r["step"]):
+            fte_salary = rise["salary"] if "salary" in rise else fte_salary * (1 + rise.get("rate", 0))
+            self.payrises.append((rise["step"], fte_salary))
+
+    @property
+    def costs(self) -> WorkerCosts:
+        """Shared cost profile for this worker's current salary terms."""
+        return WorkerCosts.of(self.salary, self.fte, self.employerpensionrate)
+
+    def costs_at(self, step: int) -> WorkerCosts:
+        """Cost profile in force at ``step``, after any pay rises due by then."""
+        index = bisect_right([rise[0] for rise in self.payrises], step) - 1
+        if index < 0:
+            return self.costs
+        return WorkerCosts.of(self.fte * self.payrises[index][1], self.fte, self.employerpensionrate)
+
+    def active(self, step: int) -> bool:
+        """Whether the worker is employed at ``step``."""
+        return self.start <= step and (self.end is None or step < self.end)
+
+    def intervals(self, term: int) -> list[tuple[int, int, WorkerCosts]]:
+        """``(first, stop, costs)`` pay periods within the project term, stop exclusive."""
+        first = max(self.start, 0)
+        stop = term if self.end is None else min(self.end, term)
+        changes = [step for step, _ in self.payrises if first < step < stop]
+        bounds = [first] + changes + [stop]
+        return [(lo, hi, self.costs_at(lo)) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
 
     def info(self):
         """Print worker information."""
@@ -37,13 +146,7 @@ class Worker:
 
     def getbreakdown(self, month: int):
         """Get cost breakdown for a specific month."""
-        salary = self.getMonthSalary(month)
-        data = [
-            {"step": month, "item": "salary", "budget": salary, "type": "1. Staffing", "description": "Monthly salary"},
-            {"step": month, "item": "ni", "budget": self.getNI(salary), "type": "1. Staffing", "description": "National Insurance"},
-            {"step": month, "item": "pension", "budget": self.getPension(salary, self.fte), "type": "1. Staffing", "description": "Pension contribution"},
-        ]
-        return data
+        return self.costs_at(month).breakdown(month)
 
     def getSalaryCost(self) -> float:
         """Get total annual salary cost including NI and pension."""
@@ -53,11 +156,11 @@ class Worker:
 
     def getMonthSalaryCost(self, month: int) -> float:
         """Get monthly salary cost."""
-        return self.getSalaryCost() / 12
+        return self.costs_at(month).monthcost
 
     def getMonthSalary(self, month: int) -> float:
-        """Get monthly salary."""
-        return self.salary / 12
+        """Get monthly salary, after any pay rises due by ``month``."""
+        return self.costs_at(month).salary
 
     def getNI(self, monthlySalary: float) -> float:
         """Calculate National Insurance contribution."""
@@ -77,6 +180,92 @@ class Worker:
         return pension
 
 
+class StaffIndex:
+    """
+    Interval index of a project's staff pay periods.
+    The term is split at every start, end and pay-rise step; each elementary
+    interval lists the ``(worker, costs)`` pairs active throughout it, in staff
+    order, so a step lookup is one bisection and touches only active staff.
+    """
+
+    def __init__(self, staff: list, term: int):
+        self.term = term
+        self.periods = [(lo, hi, worker, costs) for worker in staff for lo, hi, costs in worker.intervals(term)]
+        bounds = {0, term}
+        for lo, hi, _, _ in self.periods:
+            bounds.update((lo, hi))
+        self.bounds = sorted(bounds)
+        # sweep the bounds in order, opening and closing periods as they start and end
+        starts, ends = {}, {}
+        for i, (lo, hi, _, _) in enumerate(self.periods):
+            starts.setdefault(lo, []).append(i)
+            ends.setdefault(hi, []).append(i)
+        active = {}
+        self._active = []
+        for bound in self.bounds[:-1]:
+            for i in ends.get(bound, ()):
+                del active[i]
+            for i in starts.get(bound, ()):
+                active[i] = self.periods[i][2:]
+            self._active.append([active[i] for i in sorted(active)])
+
+    def at(self, step: int) -> list[tuple[Worker, WorkerCosts]]:
+        """Active workers and their cost profiles at ``step``."""
+        index = bisect_right(self.bounds, step) - 1
+        return self._active[index] if 0 <= index < len(self._active) else []
+
+    def vector(self) -> np.ndarray:
+        """Monthly staff costs over the term, filled one pay period slice at a time."""
+        total = np.zeros(self.term)
+        for lo, hi, _, costs in self.periods:
+            total[lo:hi] += costs.monthcost
+        return total
+
+
+class LedgerRegister(Sequence):
+    """
+    Append-only transaction register that can share a frozen prefix with another register.
+    Forked portfolios read the first ``length`` transactions of the parent's register
+    and append only their own divergent tail (copy-on-write).
+    """
+
+    def __init__(self, prefix: Sequence | None = None, length: int = 0):
+        self._prefix = prefix if prefix is not None else []
+        self._length = length
+        self._tail = []
+
+    def append(self, transaction: dict):
+        """Append a transaction to this register's own tail."""
+        self._tail.append(transaction)
+
+    def extend(self, transactions):
+        """Append several transactions to this register's own tail."""
+        self._tail.extend(transactions)
+
+    def truncate(self, length: int):
+        """Drop transactions from ``length`` onwards; the shared prefix is never modified."""
+        if length < self._length:
+            raise ValueError("Cannot truncate into a shared ledger prefix")
+        del self._tail[length - self._length:]
+
+    def __len__(self):
+        return self._length + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("register index out of range")
+        if index < self._length:
+            return self._prefix[index]
+        return self._tail[index - self._length]
+
+    def __iter__(self):
+        return chain(islice(self._prefix, self._length), self._tail)
+
+
 class ConsolidatedAccount:
     """Manages financial transactions for the portfolio."""
 
@@ -87,6 +276,14 @@ class ConsolidatedAccount:
         self.total_income = 0
         self.balance = 0
         self.register = []
+        self._index = None
+
+    def index(self):
+        """Prefix-sum index over the register for time-indexed cash-flow queries."""
+        index = getattr(self, "_index", None)
+        if index is None or index.register is not self.register:
+            self._index = LedgerIndex(self.register)
+        return self._index
 
     def update(self, transaction: dict):
         """Update account with a new transaction."""
@@ -96,15 +293,105 @@ class ConsolidatedAccount:
         if transaction["type"] == "income":
             self.total_income += transaction["amount"]
             transaction["amount"] = -transaction["amount"]
+        previous = self.balance
         self.balance = self.total_income - self.total_payments
         date = self.portfolio.now if self.portfolio is not None else 0
         transaction["date"] = date
         transaction["balance"] = self.balance
         self.register.append(transaction)
+        triggers = getattr(self.portfolio, "triggers", None)
+        if triggers:
+            triggers.balance_changed(previous, self.balance, date)
+
+    def update_many(self, transactions: list[dict]):
+        """Post several transactions at once.
+
+        Each transaction may carry its own ``date`` (e.g. a repayment schedule);
+        otherwise the portfolio's current step is used. Running totals are
+        accumulated in order exactly as repeated :meth:`update` calls would.
+        """
+        if not transactions:
+            return
+        default_date = self.portfolio.now if self.portfolio is not None else 0
+        amounts = np.array([float(t["amount"]) for t in transactions])
+        kinds = np.array([t["type"] for t in transactions])
+        payments = np.where(kinds == "expenditure", amounts, 0.0)
+        income = np.where(kinds == "income", amounts, 0.0)
+        # cumsum adds sequentially, so totals match the one-at-a-time loop
+        total_payments = np.cumsum(np.concatenate(([self.total_payments], payments)))[1:]
+        total_income = np.cumsum(np.concatenate(([self.total_income], income)))[1:]
+        balances = (total_income - total_payments).tolist()
+        for transaction, amount, kind, balance in zip(transactions, amounts.tolist(), kinds, balances):
+            transaction["amount"] = -amount if kind == "income" else amount
+            transaction.setdefault("date", default_date)
+            transaction["balance"] = balance
+        previous = self.balance
+        self.total_payments = float(total_payments[-1])
+        self.total_income = float(total_income[-1])
+        self.balance = balances[-1]
+        self.register.extend(transactions)
+        triggers = getattr(self.portfolio, "triggers", None)
+        if triggers:
+            for transaction in transactions:
+                triggers.balance_changed(previous, transaction["balance"], transaction["date"])
+                previous = transaction["balance"]
+
+    def compact(self, start: int = 0):
+        """Merge transactions from ``start`` onwards into one net entry per project and step.
+
+        Amounts keep their signs (income negative), so totals and the final
+        balance are unchanged; running balances are recomputed for the merged
+        entries.
+        """
+        register = self.register
+        groups = {}
+        for transaction in register[start:]:
+            key = (transaction["date"], transaction["project"])
+            if key in groups:
+                groups[key]["amount"] += transaction["amount"]
+            else:
+                groups[key] = {
+                    "type": "net",
+                    "title": "net flows",
+                    "project": transaction["project"],
+                    "amount": transaction["amount"],
+                    "date": transaction["date"],
+                }
+        balance = register[start - 1]["balance"] if start > 0 else 0
+        for entry in groups.values():
+            balance -= entry["amount"]
+            entry["balance"] = balance
+        if isinstance(register, LedgerRegister):
+            register.truncate(start)
+        else:
+            del register[start:]
+        register.extend(groups.values())
+        self._index = None
+
+    def sort_by_date(self, start: int = 0):
+        """Put transactions from ``start`` onwards in date order and recompute their running balances.
+
+        The sort is stable, so transactions of the same step keep the order
+        they were posted in.
+        """
+        register = self.register
+        tail = register[start:]
+        ordered = sorted(tail, key=lambda transaction: transaction["date"])
+        if all(map(operator.is_, tail, ordered)):
+            return
+        balance = register[start - 1]["balance"] if start > 0 else 0
+        for transaction in ordered:
+            balance -= transaction["amount"]
+            transaction["balance"] = balance
+        if isinstance(register, LedgerRegister):
+            register.truncate(start)
+        else:
+            del register[start:]
+        register.extend(ordered)
+        self._index = None
 
     def report(self):
-        """Print account summary."""
-        print(
-            f"Consolidated Account Report: Payments to date: {self.total_payments:.2f}, "
-            f"Income to date: {self.total_income:.2f}, Balance: {self.balance:.2f}"
+        """Report the account summary to the portfolio's tracer."""
+        tracer_of(self.portfolio).emit(
+            AccountReport, getattr(self.portfolio, "now", None), self.total_payments, self.total_income, self.balance
         )
@@ -0,0 +1,149 @@
+"""Process-pool execution of portfolio runs.
+
+Projects never read each other's state; they only append transactions to the
+shared consolidated account. Each project can therefore run its whole step loop
+in a worker process, recording a ledger fragment instead of posting directly.
+The fragments are merged in the order the serial loop would have posted them,
+(step, creation before stepping, project creation order, posting order), and
+replayed through the parent's account so running balances match exactly.
+Trace events recorded by the workers are passed on to the parent's tracer in
+step order.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import constants, refdata
+from .models import ConsolidatedAccount
+from .tracing import RingBufferSink, Tracer
+
+# Posting phases within a step: projects are created before any project steps.
+CREATE = 0
+STEP = 1
+
+
+class FragmentAccount(ConsolidatedAccount):
+    """Consolidated account that also records each raw transaction for later replay."""
+
+    def __init__(self, portfolio=None):
+        super().__init__(portfolio)
+        self.phase = CREATE
+        self.fragment = []
+
+    def update(self, transaction: dict):
+        """Record the transaction with its date and phase, then post it locally."""
+        date = self.portfolio.now if self.portfolio is not None else 0
+        self.fragment.append((date, self.phase, "update", dict(transaction)))
+        super().update(transaction)
+
+    def update_many(self, transactions: list[dict]):
+        """Record a bulk posting as one fragment entry so it is replayed in bulk."""
+        date = self.portfolio.now if self.portfolio is not None else 0
+        self.fragment.append((date, self.phase, "update_many", [dict(t) for t in transactions]))
+        super().update_many(transactions)
+
+
+def _init_worker(fcrdata: list[dict] | str, supportdata: list[dict] | str):
+    """Seed reference data in a worker process (needed with the spawn start method).
+
+    Catalogues published to shared memory are passed by digest and mapped rather
+    than copied into every worker; one the worker already holds is kept.
+    """
+    for target, source in ((constants.FCRDATA, fcrdata), (constants.SUPPORTDATA, supportdata)):
+        if isinstance(source, str):
+            if refdata.digest_of(target) == source:
+                continue
+            source = refdata.SharedCatalogue.attach(source).rows()
+        target[:] = source
+
+
+def _portable(rows: list) -> list[dict] | str:
+    return refdata.digest_of(rows) or list(rows)
+
+
+def _run_project(job: tuple[int, dict, int, dict, int | None]):
+    """Create one project and run its step loop in isolation."""
+    from .portfolio import Portfolio
+
+    index, event, steps, settings, trace_level = job
+    tracer = Tracer(RingBufferSink(), trace_level) if trace_level is not None else None
+    portfolio = Portfolio(**settings, tracer=tracer)
+    account = FragmentAccount(portfolio)
+    portfolio.consolidated_account = account
+    # only whole-number times are dispatched; 5.0 from a JSON body starts at step 5
+    start = int(event.get("time", 0))
+
+    portfolio.now = start
+    prj = portfolio.create_project(**event)
+    account.phase = STEP
+    for step in range(start, steps):
+        portfolio.now = step
+        if not prj.step():
+            break
+
+    # Detach before pickling so the worker's portfolio does not travel back.
+    prj.rebind(None)
+    return index, prj, account.fragment, tracer.events() if tracer else []
+
+
+def run_parallel(portfolio, steps: int, processes: int | None = None, start: int = 0):
+    """Run pending events of ``portfolio`` from ``start`` up to ``steps`` in a process pool.
+
+    Parameters
+    ----------
+    portfolio : Portfolio
+        Portfolio with scheduled events and no projects created yet.
+    steps : int
+        Number of simulation steps to run.
+    processes : int, optional
+        Number of worker processes, by default every available CPU.
+    start : int, optional
+        First step to simulate, by default 0.
+    """
+    if portfolio.projects:
+        raise ValueError("Parallel runs require a portfolio with no projects created yet")
+    if portfolio.triggers:
+        raise ValueError("Triggered events need a serial or event-driven run")
+
+    started = [e for e in portfolio._pending_events if e.get("time", 0) in range(start, steps)]
+    started.sort(key=lambda e: e.get("time", 0))
+    settings = portfolio.settings()
+    tracer = portfolio.tracer
+    trace_level = tracer.level if tracer.enabled(tracer.level) else None
+    jobs = [(index, event, steps, settings, trace_level) for index, event in enumerate(started)]
+
+    processes = processes or os.cpu_count() or 1
+    results = []
+    if jobs:
+        chunksize = max(1, len(jobs) // (processes * 4))
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(_portable(constants.FCRDATA), _portable(constants.SUPPORTDATA)),
+        ) as executor:
+            results = list(executor.map(_run_project, jobs, chunksize=chunksize))
+
+    merged, traced = [], []
+    for index, prj, fragment, events in results:
+        prj.rebind(portfolio)
+        portfolio.projects.append(prj)
+        merged.extend((date, phase, index, method, payload) for date, phase, method, payload in fragment)
+        traced.extend((event.step or 0, index, event) for event in events)
+    # Scheduled portfolio postings (finance servicing) go first in their step, as in the serial loop.
+    for due in sorted(d for d in portfolio.scheduled if d < steps):
+        merged.extend((max(due, start), -1, -1, "update", t) for t in portfolio.scheduled.pop(due))
+    # Stable sort keeps each project's own posting order within a step.
+    merged.sort(key=lambda entry: entry[:3])
+
+    account = portfolio.consolidated_account
+    for date, _, _, method, payload in merged:
+        portfolio.now = date
+        getattr(account, method)(payload)
+    traced.sort(key=lambda entry: entry[:2])
+    for _, _, event in traced:
+        tracer.sink.write(event)
+
+    portfolio.now = max(steps - 1, 0)
+    portfolio._pending_events = [e for e in portfolio._pending_events if e not in started]
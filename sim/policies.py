@@ -2,10 +2,45 @@
 
 from __future__ import annotations
 
+import numpy as np
 import simpy
 
 from .constants import FCRDATA
-from .utils import printtimestamp
+from .finance import amortize, credit_schedule
+from .tracing import CapitalReceived, CarbonProjection, FinanceCompleted, tracer_of
+
+
+class PolicySchedule:
+    """
+    Whole-term contribution of a policy, used instead of per-step ``calculate`` calls.
+    Attributes:
+        costs (np.ndarray): Cost added to the project at each step of the term.
+        income (np.ndarray): Income added to the project at each step of the term.
+        postings (dict): Ledger transactions to post directly, keyed by step.
+        fires (tuple): Steps at which the policy takes effect, signalled to triggered events.
+    """
+
+    def __init__(self, term: int, costs=None, income=None, postings: dict | None = None, fires=()):
+        self.costs = np.zeros(term) if costs is None else np.asarray(costs, dtype=float)
+        self.income = np.zeros(term) if income is None else np.asarray(income, dtype=float)
+        self.postings = postings or {}
+        self.fires = tuple(fires)
+
+    def apply(self, step: int, prj):
+        """Post this step's direct ledger transactions."""
+        for transaction in self.postings.get(step, ()):
+            prj.consolidated_account.update(dict(transaction))
+
+
+class StepPolicyAdapter:
+    """Runs a legacy per-step policy alongside scheduled ones."""
+
+    def __init__(self, policy):
+        self.policy = policy
+
+    def apply(self, step: int, prj):
+        """Delegate to the policy's ``calculate``."""
+        self.policy.calculate(step)
 
 
 class Policy:
@@ -19,6 +54,36 @@ class Policy:
         """Calculate policy effects for a step."""
         pass
 
+    def fire(self, step: int):
+        """Signal triggered events subscribed to this policy that it took effect at ``step``."""
+        triggers = getattr(self.env, "triggers", None)
+        if triggers:
+            triggers.policy_fired(self, self.prj, self.prj.startstep + step)
+
+    def breakpoints(self, term: int) -> set[int] | None:
+        """Steps at which this policy's effect may change, or ``None`` if unknown.
+
+        The event-driven engine only evaluates a project at the union of its
+        breakpoints; ``None`` makes it fall back to evaluating every step.
+        """
+        return None
+
+    def skip(self, start: int, stop: int):
+        """Account for steps ``start`` to ``stop`` advanced in closed form."""
+        pass
+
+    def schedule(self, term: int) -> PolicySchedule | None:
+        """Whole-term cost and income arrays, or ``None`` for per-step policies.
+
+        Policies returning a schedule are not called per step by vectorized
+        projects; ``budget_until`` then supplies their budget entries.
+        """
+        return None
+
+    def budget_until(self, stop: int) -> list[dict]:
+        """Budget entries a scheduled policy contributed to steps before ``stop``."""
+        return []
+
 
 class FullCostRecovery(Policy):
     """
@@ -49,7 +114,12 @@ class FullCostRecovery(Policy):
         return fcr
 
     def getfcr(self, person, step: int):
-        """Get FCR costs for a person and step."""
+        """Get FCR costs for a person and project step.
+
+        Oneoff items fall on the person's start step and annual items recur
+        every 12 steps from it.
+        """
+        local = step - getattr(person, "start", 0)
         register = []
         linemanagerrate = person.linemanagerrate
         for item in self.fcr:
@@ -62,11 +132,11 @@ class FullCostRecovery(Policy):
             except TypeError:
                 pass
             if frequency == "oneoff":
-                cost = cost if step == 0 else 0
+                cost = cost if local == 0 else 0
             if frequency == "monthly":  # monthly costs are applied every month, so using the cost directly
                 pass
             if frequency == "annual":
-                cost = cost if step % 12 == 0 else 0
+                cost = cost if local % 12 == 0 else 0
             register.append(
                 {
                     "step": step,
@@ -85,9 +155,9 @@ class FullCostRecovery(Policy):
         return sum(item["budget"] for item in register if "budget" in item)
 
     def calculate(self, step: int):
-        """Calculate FCR for all staff in the project."""
+        """Calculate FCR for all staff employed at this step."""
         totalcost = 0
-        for person in self.prj.staff:
+        for person in self.prj.active_staff(step):
             totalcost += self.calcfcr(person, step)
         self.prj.costs_thismonth += totalcost
 
@@ -95,6 +165,51 @@ class FullCostRecovery(Policy):
         """Get FCR budget entries."""
         return self.register
 
+    def breakpoints(self, term: int) -> set[int]:
+        """Oneoff items change cost at each person's start and annual items every 12 steps from it."""
+        points = set()
+        frequencies = {item["frequency"] for item in self.fcr}
+        for person in self.prj.staff:
+            start = getattr(person, "start", 0)
+            if "oneoff" in frequencies:
+                points.update((start, start + 1))
+            if "annual" in frequencies:
+                for s in range(start, term, 12):
+                    points.update((s, s + 1))
+        return points
+
+    def skip(self, start: int, stop: int):
+        """Fill the register for skipped steps so the budget stays complete."""
+        for step in range(start, stop):
+            for person in self.prj.active_staff(step):
+                self.register.extend(self.getfcr(person, step))
+
+    def schedule(self, term: int) -> PolicySchedule:
+        """FCR costs as monthly, oneoff and annual components over each person's employment."""
+        steps = np.arange(term)
+        costs = np.zeros(term)
+        for person in self.prj.staff:
+            start = getattr(person, "start", 0)
+            end = getattr(person, "end", None)
+            employed = (steps >= start) & (steps < (term if end is None else end))
+            for item, entry in zip(self.fcr, self.getfcr(person, start)):
+                if item["frequency"] == "oneoff":
+                    due = steps == start
+                elif item["frequency"] == "annual":
+                    due = (steps - start) % 12 == 0
+                else:
+                    due = True
+                costs += entry["budget"] * (employed & due)
+        return PolicySchedule(term, costs=costs)
+
+    def budget_until(self, stop: int) -> list[dict]:
+        """FCR entries for every employed staff member at each step before ``stop``."""
+        register = []
+        for step in range(stop):
+            for person in self.prj.active_staff(step):
+                register.extend(self.getfcr(person, step))
+        return register
+
 
 class Grant(Policy):
     """
@@ -120,6 +235,26 @@ class Grant(Policy):
         if step == self.startstep:
             prj.income_thismonth += amount
             self.register.append({"item": f"{self.fund} grant", "step": step, "budget": -amount, "type": "4. Funding"})
+            self.fire(step)
+
+    def breakpoints(self, term: int) -> set[int]:
+        """The grant only affects its own step."""
+        return {self.startstep, self.startstep + 1}
+
+    def schedule(self, term: int) -> PolicySchedule:
+        """Grant income at its start step."""
+        income = np.zeros(term)
+        fires = ()
+        if self.startstep in range(term):
+            income[int(self.startstep)] = self.amount
+            fires = (int(self.startstep),)
+        return PolicySchedule(term, income=income, fires=fires)
+
+    def budget_until(self, stop: int) -> list[dict]:
+        """The grant entry once its step has been simulated."""
+        if self.startstep in range(stop):
+            return [{"item": f"{self.fund} grant", "step": self.startstep, "budget": -self.amount, "type": "4. Funding"}]
+        return []
 
     def getbudget(self):
         """Get grant budget entries."""
@@ -155,6 +290,7 @@ class Finance(Policy):
     - term: Number of steps for repayment
     - capital: Initial capital amount
     - rate: Interest rate applied to the capital
+    - profile: Repayment profile (straight, annuity, interest_only), default straight
     """
 
     def __init__(self, env: simpy.Environment, prj, **kwargs):
@@ -162,19 +298,21 @@ class Finance(Policy):
         self.term = kwargs.get("term", prj.term)
         self.account = self.capital = kwargs.get("capital", 0)
         self.rate = kwargs.get("rate", 0)
+        self.profile = kwargs.get("profile", "straight")
+        self.loan = amortize(self.capital, self.rate, self.term, self.profile) if self.term > 0 else None
         self.consolidated_account = prj.consolidated_account
         self.totpay = 0
-        print(f"New capital received {self.capital}")
+        tracer_of(env).emit(CapitalReceived, getattr(env, "now", None), prj.name, self.capital)
         self.consolidated_account.update(
             {"type": "income", "title": "finance capitalisation", "project": "headoffice", "amount": self.capital}
         )
 
     def calculate(self, step: int):
-        """Calculate finance payments."""
-        repayment = self.capital / self.term
-        interest = self.rate * self.account
-        self.account -= repayment
-        payment = repayment + interest
+        """Post the finance payment scheduled for this step."""
+        if self.loan is None or step >= self.term:
+            return
+        payment = float(self.loan.payment[step])
+        self.account = float(self.loan.balance[step])
         self.totpay += payment
         self.consolidated_account.update(
             {"type": "expenditure", "title": "finance servicing", "project": "headoffice", "amount": payment}
@@ -182,10 +320,20 @@ class Finance(Policy):
         if step == self.term - 1:
             self.finalize()
 
+    def schedule(self, term: int) -> PolicySchedule:
+        """Finance servicing postings for each step of the loan within the project term."""
+        postings = {}
+        if self.loan is not None:
+            payments = self.loan.payment[: min(term, self.term)].tolist()
+            postings = {
+                step: [{"type": "expenditure", "title": "finance servicing", "project": "headoffice", "amount": payment}]
+                for step, payment in enumerate(payments)
+            }
+        return PolicySchedule(term, postings=postings)
+
     def finalize(self):
         """Finalize the finance policy."""
-        printtimestamp(self.env)
-        print(f"Finance: Final account {self.account:.2f}, total paid {self.totpay:.2f}")
+        tracer_of(self.env).emit(FinanceCompleted, getattr(self.env, "now", None), self.prj.name, self.account, self.totpay)
 
 
 class CarbonFinancing(Policy):
@@ -195,6 +343,20 @@ class CarbonFinancing(Policy):
         - investment: Total investment amount
         - tree_planting_cost_per_unit: Cost per tree planted
         - carbon_credit_per_unit: Income per carbon credit
+        - horizon: Steps over which credits vest in annual vintages (default 480)
+        - vesting: Relative share of credits vesting each year (default equal)
+        - price_growth: Annual growth of the credit price (default 0)
+        - price_path: Credit price per year, overriding price and growth
+        - sale_lag: Steps between a vintage vesting and its sale (default 0)
+        - book_sales: Add credit sale income to the project's income (default True)
+
+    The investment is income at step 0 and the planting cost (investment less
+    budget) is spent at once. The project also keeps the credit revenue: each
+    sale adds to the project's income at the step it falls, so only sales
+    within the project term (and the run) are booked; later ones appear in
+    ``report`` only. Set ``book_sales: false`` when the credits repay the
+    investor instead, or the financing would be counted twice; the schedule
+    is then reported but never reaches the ledger.
     """
     def __init__(self, env: simpy.Environment, prj, **kwargs):
         """
@@ -206,8 +368,18 @@ class CarbonFinancing(Policy):
         self.investment = kwargs.get("investment")
         self.tree_planting_cost_per_unit = kwargs.get("tree_planting_cost_per_unit")
         self.carbon_credit_per_unit = kwargs.get("carbon_credit_per_unit")
+        self.horizon = kwargs.get("horizon", 480)
         self.trees_planted = self.calculate_trees_planted()
         self.carbon_credits_generated = self.calculate_carbon_credits()
+        self.credits = credit_schedule(
+            self.carbon_credits_generated,
+            horizon=self.horizon,
+            vesting=kwargs.get("vesting"),
+            price=self.carbon_credit_per_unit,
+            price_growth=kwargs.get("price_growth", 0.0),
+            price_path=kwargs.get("price_path"),
+            sale_lag=kwargs.get("sale_lag", 0),
+        )
         self.prj.consolidated_account.update(
             {
                 "type": "expenditure",
@@ -216,11 +388,26 @@ class CarbonFinancing(Policy):
                 "amount": self.investment - self.budget,
             }
         )
-        print(
-            f"Trees planted: {self.trees_planted:.0f} will generate "
-            f"{self.calculate_carbon_credits():.0f} carbon credits over 40 years "
-            f"worth £{self.calculate_carbon_income():.2f}"
-        )
+        self.book_sales = kwargs.get("book_sales", True)
+        tracer = tracer_of(env)
+        if tracer.enabled():
+            tracer.emit(
+                CarbonProjection,
+                getattr(env, "now", None),
+                prj.name,
+                self.trees_planted,
+                self.calculate_carbon_credits(),
+                self.horizon // 12,
+                self.calculate_carbon_income(),
+            )
+
+    def sales(self, term: int) -> np.ndarray:
+        """Credit sale income booked at each step of the term (zero unless ``book_sales``)."""
+        income = np.zeros(term)
+        if self.book_sales:
+            booked = min(term, len(self.credits.income))
+            income[:booked] = self.credits.income[:booked]
+        return income
 
     def calculate_trees_planted(self) -> float:
         """Calculate number of trees planted."""
@@ -232,8 +419,8 @@ class CarbonFinancing(Policy):
         return self.trees_planted * unitpertreelifetime
 
     def calculate_carbon_income(self) -> float:
-        """Calculate income from carbon credits."""
-        return self.calculate_carbon_credits() * self.carbon_credit_per_unit
+        """Calculate income from carbon credits over the horizon, following the price path."""
+        return self.credits.total_income
 
     def report(self):
         """Generate carbon financing report."""
@@ -241,16 +428,36 @@ class CarbonFinancing(Policy):
             "investment": self.investment,
             "trees_planted": self.trees_planted,
             "carbon_credits_generated": self.carbon_credits_generated,
+            "carbon_credit_income": self.credits.total_income,
         }
 
     def calculate(self, step: int):
         """Calculate carbon financing effects."""
         if step == 0:
             carbonincome = self.investment
+            self.fire(step)
         else:
             carbonincome = 0
+        if self.book_sales and step < len(self.credits.income):
+            carbonincome += self.credits.income[step]
         self.prj.income_thismonth += carbonincome
 
+    def breakpoints(self, term: int) -> set[int]:
+        """The investment is booked at step 0 and, with ``book_sales``, each sale at its step."""
+        points = {0, 1}
+        if self.book_sales:
+            for step in self.credits.nonzero()[0]:
+                if step < term:
+                    points |= {step, step + 1}
+        return points
+
+    def schedule(self, term: int) -> PolicySchedule:
+        """Investment booked at step 0, plus credit sales with ``book_sales``."""
+        income = self.sales(term)
+        if term > 0:
+            income[0] += self.investment
+        return PolicySchedule(term, income=income, fires=(0,) if term > 0 else ())
+
 
 def get_policy_class(policy_name: str):
     """
@@ -4,19 +4,52 @@ from __future__ import annotations
 
 import pandas as pd
 
+from .constants import SUPPORTDATA
+from .finance import amortize
 from .models import ConsolidatedAccount
-from .utils import get_current_month, printtimestamp
+from .refdata import item_index
+from .tracing import CapitalReceived, EventStarted, FinanceCompleted, ProjectCreated, default_tracer
+from .triggers import TriggerIndex
+from .utils import BUDGET_LABELS, LEDGER_LABELS, categorize, get_current_month
 
 
 class Portfolio:
-    """Manages a portfolio of projects."""
-
-    def __init__(self, name: str = "My Portfolio"):
+    """
+    Manages a portfolio of projects.
+    Attributes:
+        name (str): Name of the portfolio.
+        vectorized (bool): Combine policy schedules with array additions instead
+            of calling every policy at every step.
+        sparse (bool): Omit zero-cost budget rows and zero-amount ledger postings.
+        compact_ledger (bool): Merge each run's ledger entries into one net entry
+            per project and step.
+        triggers (TriggerIndex): Events waiting on a signal instead of a fixed time.
+        scheduled (dict): Portfolio-level transactions to post at future steps, by step.
+        support_index (dict): Support catalogue rows by item name, built once per run.
+        tracer (Tracer): Receives the run's trace events (see :mod:`sim.tracing`).
+    """
+
+    def __init__(
+        self,
+        name: str = "My Portfolio",
+        vectorized: bool = False,
+        sparse: bool = False,
+        compact_ledger: bool = False,
+        tracer=None,
+    ):
         self.name = name
+        self.vectorized = vectorized
+        self.sparse = sparse
+        self.compact_ledger = compact_ledger
+        self.tracer = tracer or default_tracer
         self.now = 0
         self.consolidated_account = ConsolidatedAccount(self)
         self.projects: list = []
         self._pending_events: list[dict] = []
+        self.triggers = TriggerIndex(self)
+        self.scheduled: dict[int, list[dict]] = {}
+        self.support_index = None
+        self.next_step = 0
 
     def counter(self):
         """Counter process for debugging."""
@@ -24,8 +57,15 @@ class Portfolio:
             month = get_current_month(start_month="apr", month=i)
             print(f"\nMonth: {i} {month}")
 
+    def settings(self) -> dict:
+        """Engine settings needed to recreate an equivalent portfolio (e.g. in a worker)."""
+        return {"vectorized": self.vectorized, "sparse": self.sparse, "compact_ledger": self.compact_ledger}
+
     def set_event(self, event: dict):
-        """Schedule an event for a future step."""
+        """Schedule an event for a future step, or subscribe it to its ``trigger``."""
+        if "trigger" in event:
+            self.triggers.subscribe(event)
+            return
         self._pending_events.append(event)
         self._pending_events.sort(key=lambda e: e.get("time", 0))
 
@@ -35,13 +75,11 @@ class Portfolio:
             self.set_event(event)
 
     def getbudget(self) -> pd.DataFrame:
-        """Get consolidated budget for all projects."""
+        """Get consolidated budget for all projects, with categorical label columns."""
         data = {"item": [], "step": [], "budget": []}
-        consol_budget = pd.DataFrame(data)
-        for prj in self.projects:
-            budget = prj.getbudgetadjusted()
-            consol_budget = pd.concat([consol_budget, budget], ignore_index=True)
-        return consol_budget
+        frames = [pd.DataFrame(data)] + [prj.getbudgetadjusted() for prj in self.projects]
+        consol_budget = pd.concat(frames, ignore_index=True)
+        return categorize(consol_budget, BUDGET_LABELS)
 
     def list_projects(self) -> pd.DataFrame:
         """List all projects in the portfolio."""
@@ -55,27 +93,94 @@ class Portfolio:
 
         return df
 
-    def run(self, steps: int):
-        """Run the simulation for a number of steps."""
-        for step in range(steps):
-            self.now = step
-            # create projects whose start time matches current step
-            events_to_start = [e for e in self._pending_events if e.get("time", 0) == step]
-            for event in events_to_start:
-                printtimestamp(self)
-                message = event.get("message", event.get("name", "new project"))
-                print(f"Event {message} succeeds")
-                self.create_project(**event)
-            self._pending_events = [e for e in self._pending_events if e not in events_to_start]
-
-            # update active projects
-            for prj in list(self.projects):
-                prj.step()
+    def run(
+        self,
+        steps: int,
+        parallel: bool = False,
+        processes: int | None = None,
+        start: int = 0,
+        event_driven: bool = False,
+    ):
+        """Run the simulation from step ``start`` up to (not including) ``steps``.
+
+        With ``parallel=True`` each project's step loop runs in a process pool of
+        ``processes`` workers (default: every CPU) and the ledger fragments are
+        merged in serial order, so balances match the serial run exactly.
+
+        With ``event_driven=True`` projects are only evaluated at steps where
+        their costs or income change and steady stretches in between are
+        advanced in closed form (see :mod:`sim.discrete`).
+        """
+        first = len(self.consolidated_account.register)
+        # the support catalogue may have been replaced since the last run
+        self.support_index = None
+        if parallel:
+            from .parallel import run_parallel
+
+            run_parallel(self, steps, processes, start)
+        elif event_driven:
+            from .discrete import run_event_driven
+
+            run_event_driven(self, steps, start)
+        else:
+            for step in range(start, steps):
+                self.now = step
+                self.post_scheduled(step)
+                # create projects whose start time matches current step
+                self.start_events(step)
+
+                # update active projects
+                for prj in list(self.projects):
+                    prj.step()
+        if self.compact_ledger:
+            self.consolidated_account.compact(first)
+        self.next_step = max(steps, start)
+
+    def supports_by_item(self) -> dict:
+        """Support catalogue rows by item name (see :func:`sim.refdata.item_index`)."""
+        if self.support_index is None:
+            self.support_index = item_index(SUPPORTDATA)
+        return self.support_index
+
+    def start_events(self, step: int) -> list:
+        """Create the projects whose start time matches ``step``."""
+        events_to_start = [e for e in self._pending_events if e.get("time", 0) == step]
+        created = []
+        for event in events_to_start:
+            self.tracer.emit(EventStarted, step, event.get("message", event.get("name", "new project")))
+            created.append(self.create_project(**event))
+        self._pending_events = [e for e in self._pending_events if e not in events_to_start]
+        return created
+
+    def post_scheduled(self, step: int):
+        """Post the scheduled transactions due at or before ``step``, dated now."""
+        for due in sorted(d for d in self.scheduled if d <= step):
+            for transaction in self.scheduled.pop(due):
+                self.consolidated_account.update(dict(transaction))
+
+    def next_scheduled(self, step: int, steps: int) -> int | None:
+        """Earliest step after ``step`` and before ``steps`` with scheduled transactions."""
+        due = [d for d in self.scheduled if step < d < steps]
+        return min(due) if due else None
+
+    def resume(self, steps: int, **kwargs):
+        """Continue the simulation from the next unsimulated step up to ``steps``."""
+        self.run(steps, start=self.next_step, **kwargs)
+
+    def snapshot(self):
+        """Capture the in-flight state so that variants can be forked from this step.
+
+        The snapshot holds copies of pending events and projects and shares the
+        ledger prefix with every fork; see :class:`sim.snapshot.PortfolioSnapshot`.
+        """
+        from .snapshot import PortfolioSnapshot
+
+        return PortfolioSnapshot(self)
 
     def list_transactions(self) -> pd.DataFrame:
         """List all transactions in the consolidated account."""
         transactions = self.consolidated_account.register
-        df = pd.DataFrame(transactions)
+        df = categorize(pd.DataFrame(list(transactions)), LEDGER_LABELS)
         self.consolidated_account.report()
         return df
 
@@ -87,28 +192,25 @@ class Portfolio:
             cls = Project
         prj = cls(self, **kwargs)
         self.projects.append(prj)
-        staff_positions = ", ".join(person.position for person in prj.staff)
-        print(
-            f"Project {prj.name} created with budget {prj.budget:.2f} and assigned staff {staff_positions}"
-        )
+        self.tracer.emit(ProjectCreated, self.now, prj.name, prj.budget, prj.staff)
         return prj
 
-    def finance(self, term: int, capital: float, rate: float = 0.05):
-        """Finance the portfolio."""
-        repayment = capital / term
-        account = capital
-        print(f"New capital received {capital}")
+    def finance(self, term: int, capital: float, rate: float = 0.05, profile: str = "straight"):
+        """Finance the portfolio.
+
+        The capital and the first servicing payment are posted now. The later
+        payments are added to ``scheduled`` and posted as the run reaches each
+        step, so the ledger stays in date order.
+        """
+        loan = amortize(capital, rate, term, profile)
+        self.tracer.emit(CapitalReceived, self.now, "headoffice", capital)
         self.consolidated_account.update(
             {"type": "income", "title": "finance capitalisation", "project": "headoffice", "amount": capital}
         )
-        totpay = 0
-        for _ in range(term):
-            interest = rate * account
-            account -= repayment
-            payment = repayment + interest
-            totpay += payment
-            self.consolidated_account.update(
+        for period, payment in enumerate(loan.payment.tolist()):
+            self.scheduled.setdefault(self.now + period, []).append(
                 {"type": "expenditure", "title": "finance servicing", "project": "headoffice", "amount": payment}
             )
-        printtimestamp(self)
-        print(f"Finance: Final account {account:.2f}, total paid {totpay:.2f}")
+        self.post_scheduled(self.now)
+        self.tracer.emit(FinanceCompleted, self.now, "headoffice", float(loan.balance[-1]), float(loan.total_paid))
+        return loan
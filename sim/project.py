@@ -2,11 +2,24 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left
+
+import numpy as np
 import pandas as pd
 
-from .constants import SUPPORTDATA
-from .models import Worker
-from .utils import printtimestamp
+from .expressions import StepExpression, is_step_expression
+from .models import StaffIndex, Worker
+from .tracing import ProjectCompleted, tracer_of
+from .utils import BUDGET_LABELS, categorize, intern_label, intern_labels
+
+
+def _cost_line(directcost: dict) -> dict:
+    """Intern a direct cost line's labels and compile a step-dependent cost expression."""
+    line = intern_labels(directcost)
+    cost = line.get("cost", 0)
+    if isinstance(cost, str) and is_step_expression(cost.strip().strip("{}")):
+        line["cost"] = StepExpression(cost)
+    return line
 
 
 class Project:
@@ -23,10 +36,10 @@ class Project:
 
     def __init__(self, portfolio, **kwargs):
         self.kwargs = kwargs
-        self.name = kwargs.get("name", "New Project")
+        self.name = intern_label(kwargs.get("name", "New Project"))
         self.term = kwargs.get("term", 0)
-        self.directcosts = kwargs.get("directcosts", [])
-        self.supports = kwargs.get("supports", [])
+        self.directcosts = [_cost_line(d) for d in kwargs.get("directcosts", [])]
+        self.supports = [intern_labels(s) for s in kwargs.get("supports", [])]
         self.portfolio = portfolio
         self.startstep = kwargs.get("time", portfolio.now)
         self.consolidated_account = portfolio.consolidated_account
@@ -46,6 +59,7 @@ class Project:
 
         # Initialize staff
         self.staff = []
+        self._staffindex = None
         staffing = kwargs.get("staffing", [])
         for person in staffing:
             self.addstaff(Worker(**person))
@@ -55,46 +69,52 @@ class Project:
         self.cost = 0
         self.income = 0
         self.current_step = 0
+        # Combined policy schedules, built on first use by vectorized portfolios
+        self._sweep = None
 
     def calculate(self, step: int):
         """Calculate costs and income for a step."""
-        dcosts = self.getdirectcosts(step)
+        dcosts = self.getdirectcosts(step, sparse=True)
         directcost = sum(d["budget"] for d in dcosts if "budget" in d)
-        scosts = self.getsupports(step)
+        scosts = self.getsupports(step, sparse=True)
         supportcost = sum(d["budget"] for d in scosts if "budget" in d)
         self.costs_thismonth += self.getsalarycosts(step) + directcost + supportcost
         self.income_thismonth += 0
 
-    def getsupports(self, step: int):
-        """Get support costs for a step."""
+    def getsupports(self, step: int, sparse: bool = False):
+        """Get support costs for a step, omitting zero-cost lines if ``sparse``."""
         costs = []
+        catalogue = self.portfolio.supports_by_item() if self.supports else {}
         for support in self.supports:
             item = support.get("item", "unspecified")
             applystep = support.get("step", 0)
             description = support.get("description", "")
             freq = support.get("frequency", "oneoff")
-            matching = [d for d in SUPPORTDATA if d.get("item") == item]
+            lookup = catalogue.get(item)
             eligiblestep = (
                 freq == "monthly"
                 or (freq == "oneoff" and applystep == step)
                 or (freq == "annual" and (step - applystep) % 12 == 0)
             )
-            if eligiblestep and matching:
-                lookup = matching[0]
+            if eligiblestep and lookup is not None:
                 cost = support["units"] * lookup["dayrate"] * lookup["daysperunit"]
             else:
                 cost = 0
+            if sparse and not cost:
+                continue
             costs.append({"step": step, "item": item, "budget": cost, "description": description})
         return costs
 
-    def getdirectcosts(self, step: int):
-        """Get direct costs for a step."""
+    def getdirectcosts(self, step: int, sparse: bool = False):
+        """Get direct costs for a step, omitting zero-cost lines if ``sparse``."""
         costs = []
         for directcost in self.directcosts:
             freq = directcost.get("frequency", "oneoff")
             applystep = directcost.get("step", 0)
             item = directcost.get("item", "unspecified")
             cost = directcost.get("cost", 0)
+            if isinstance(cost, StepExpression):
+                cost = cost.at(step, self.term)
             description = directcost.get("description", "")
             type_desc = directcost.get("type", "2. Standard")
             if (
@@ -105,6 +125,8 @@ class Project:
                 pass
             else:
                 cost = 0
+            if sparse and not cost:
+                continue
             costs.append({"step": step, "item": item, "budget": cost, "description": description, "type": type_desc})
         return costs
 
@@ -116,8 +138,8 @@ class Project:
 
         def getstep(step: int):
             stepregister = []
-            for person in self.staff:
-                breakdown = person.getbreakdown(step)
+            for person, costs in self.staffindex().at(step):
+                breakdown = costs.breakdown(step)
                 for entry in breakdown:
                     entry["position"] = person.position
                 stepregister.extend(breakdown)
@@ -134,21 +156,33 @@ class Project:
         else:
             for s in range(self.term):
                 register.extend(getstep(s))
-        return pd.DataFrame(register)
+        return categorize(pd.DataFrame(register), BUDGET_LABELS)
 
     def getbudget(self) -> pd.DataFrame:
-        """Get budget for the entire project."""
+        """Get budget for the entire project.
+
+        In a sparse portfolio rows with a zero budget are omitted; pivots and
+        totals are unchanged.
+        """
+        sparse = getattr(self.portfolio, "sparse", False)
         budget = []
         for i in range(self.term):
-            directcosts = self.getdirectcosts(i)
-            supportcosts = self.getsupports(i)
+            directcosts = self.getdirectcosts(i, sparse)
+            supportcosts = self.getsupports(i, sparse)
             budget.extend(directcosts)
             budget.extend(supportcosts)
-            for st in self.staff:
-                budget.extend(st.getbreakdown(i))
+            for _, costs in self.staffindex().at(i):
+                breakdown = costs.breakdown(i)
+                budget.extend([row for row in breakdown if row["budget"]] if sparse else breakdown)
+        scheduled = self._scheduled if self._sweep is not None else []
         for policy in self.policies:
-            if hasattr(policy, "getbudget") and callable(policy.getbudget):
-                budget.extend(policy.getbudget())
+            if policy in scheduled:
+                entries = policy.budget_until(self.current_step)
+            elif hasattr(policy, "getbudget") and callable(policy.getbudget):
+                entries = policy.getbudget()
+            else:
+                continue
+            budget.extend([row for row in entries if row.get("budget")] if sparse else entries)
         df = pd.DataFrame(budget)
         return df
 
@@ -161,19 +195,90 @@ class Project:
 
     def getsalarycosts(self, step: int) -> float:
         """Get salary costs for a step."""
+        if getattr(self.portfolio, "vectorized", False):
+            if self._sweep is None:
+                self.build_schedule()
+            return self._salary_costs[step]
         cost = 0
-        for worker in self.staff:
-            cost += worker.getMonthSalaryCost(step)
+        for _, costs in self.staffindex().at(step):
+            cost += costs.monthcost
         return cost
 
+    def staffindex(self) -> StaffIndex:
+        """Interval index of the staff's pay periods, rebuilt when staff are added."""
+        if self._staffindex is None:
+            self._staffindex = StaffIndex(self.staff, self.term)
+        return self._staffindex
+
+    def active_staff(self, step: int) -> list[Worker]:
+        """Staff employed at ``step``."""
+        return [worker for worker, _ in self.staffindex().at(step)]
+
+    def salary_vector(self) -> np.ndarray:
+        """Monthly staff costs over the term."""
+        return self.staffindex().vector()
+
+    def rebind(self, portfolio):
+        """Attach the project and its policies to another portfolio and its account."""
+        account = portfolio.consolidated_account if portfolio is not None else None
+        self.portfolio = portfolio
+        self.consolidated_account = account
+        for policy in self.policies:
+            policy.env = portfolio
+            if hasattr(policy, "consolidated_account"):
+                policy.consolidated_account = account
+
     def addstaff(self, staff: Worker):
         """Add a staff member to the project."""
         self.staff.append(staff)
+        self._staffindex = None
+        self._sweep = None
+        self.__dict__.pop("_breakpoints", None)
+
+    def build_schedule(self):
+        """Combine the policies' whole-term schedules with array additions.
+
+        Policies without a schedule are wrapped in a :class:`StepPolicyAdapter`
+        and still called every step, in their original order relative to
+        scheduled policies that post ledger transactions.
+        """
+        from .policies import StepPolicyAdapter
+
+        costs = np.zeros(self.term)
+        income = np.zeros(self.term)
+        self._scheduled = []
+        self._sweep = []
+        self._fires = {}
+        for policy in self.policies:
+            schedule = policy.schedule(self.term)
+            if schedule is None:
+                self._sweep.append(StepPolicyAdapter(policy))
+                continue
+            self._scheduled.append(policy)
+            costs += schedule.costs
+            income += schedule.income
+            if schedule.postings:
+                self._sweep.append(schedule)
+            for step in schedule.fires:
+                self._fires.setdefault(step, []).append(policy)
+        self._policy_costs = costs.tolist()
+        self._policy_income = income.tolist()
+        self._salary_costs = self.salary_vector().tolist()
 
     def sweep_policies(self, step: int):
         """Apply all policies for a step."""
-        for policy in self.policies:
-            policy.calculate(step)
+        if not getattr(self.portfolio, "vectorized", False):
+            for policy in self.policies:
+                policy.calculate(step)
+            return
+        if self._sweep is None:
+            self.build_schedule()
+        self.costs_thismonth += self._policy_costs[step]
+        self.income_thismonth += self._policy_income[step]
+        for part in self._sweep:
+            part.apply(step, self)
+        for policy in self._fires.get(step, ()):
+            policy.fire(step)
 
     def step(self) -> bool:
         """Advance the project by one step."""
@@ -185,18 +290,109 @@ class Project:
         self.sweep_policies(i)
         self.income += self.income_thismonth
         self.cost += self.costs_thismonth
-        cons = self.portfolio.consolidated_account
-        cons.update(
-            {"type": "expenditure", "title": "project costs", "project": self.name, "amount": self.costs_thismonth}
-        )
-        cons.update(
-            {"type": "income", "title": "project income", "project": self.name, "amount": self.income_thismonth}
-        )
+        self.post(self.costs_thismonth, self.income_thismonth)
         self.current_step += 1
         if self.current_step == self.term:
-            printtimestamp(self.portfolio)
-            print(
-                f"Project {self.name} cost {self.cost:.2f} and generated {self.income:.2f} "
-                f"with budget {self.budget:.2f}"
-            )
+            self.complete()
         return True
+
+    def post(self, costs: float, income: float):
+        """Post project costs and income to the consolidated account.
+
+        Sparse portfolios skip postings of zero amounts.
+        """
+        sparse = getattr(self.portfolio, "sparse", False)
+        cons = self.portfolio.consolidated_account
+        if costs or not sparse:
+            cons.update({"type": "expenditure", "title": "project costs", "project": self.name, "amount": costs})
+        if income or not sparse:
+            cons.update({"type": "income", "title": "project income", "project": self.name, "amount": income})
+
+    def complete(self):
+        """Report the finished project and signal its completion to triggered events."""
+        self.report_completion()
+        triggers = getattr(self.portfolio, "triggers", None)
+        if triggers:
+            triggers.completed(self, self.startstep + self.term - 1)
+
+    def report_completion(self):
+        """Report the project's totals once its term is complete."""
+        tracer_of(self.portfolio).emit(
+            ProjectCompleted, getattr(self.portfolio, "now", None), self.name, self.cost, self.income, self.budget
+        )
+
+    def breakpoints(self) -> list[int] | None:
+        """Steps at which this project's per-step costs or income may change.
+
+        Between consecutive breakpoints every step repeats the previous one, so
+        the event-driven engine can advance over them in closed form. Returns
+        ``None`` if a policy cannot tell, meaning every step must be evaluated.
+        """
+        if hasattr(self, "_breakpoints"):
+            return self._breakpoints
+        points = {0}
+        for line in list(self.directcosts) + list(self.supports):
+            freq = line.get("frequency", "oneoff")
+            applystep = line.get("step", 0)
+            if freq == "monthly" and isinstance(line.get("cost"), StepExpression):
+                points.update(line["cost"].changes(self.term))
+            elif freq == "oneoff":
+                points.update((applystep, applystep + 1))
+            elif freq == "annual":
+                for s in range(applystep % 12, self.term, 12):
+                    points.update((s, s + 1))
+        points.update(self.staffindex().bounds)
+        for policy in self.policies:
+            policy_points = policy.breakpoints(self.term)
+            if policy_points is None:
+                points = None
+                break
+            points.update(policy_points)
+        self._breakpoints = sorted(p for p in points if 0 <= p < self.term) if points is not None else None
+        return self._breakpoints
+
+    def next_breakpoint(self, step: int) -> int:
+        """First breakpoint at or after ``step`` (``term`` if there is none)."""
+        points = self.breakpoints()
+        if points is None:
+            return step
+        index = bisect_left(points, step)
+        return points[index] if index < len(points) else self.term
+
+    def advance(self, steps: int):
+        """Repeat the last evaluated step's costs and income for ``steps`` further steps.
+
+        Used by the event-driven engine over steady-state stretches: the
+        accumulators are updated in closed form and the stretch's postings,
+        one pair per step, are appended to the ledger in a single bulk update.
+        """
+        start = self.current_step
+        self.cost += self.costs_thismonth * steps
+        self.income += self.income_thismonth * steps
+        scheduled = self._scheduled if self._sweep is not None else []
+        for policy in self.policies:
+            if policy not in scheduled:
+                policy.skip(start, start + steps)
+        self.post_stretch(self.costs_thismonth, self.income_thismonth, steps)
+        self.current_step += steps
+        if self.current_step == self.term:
+            self.complete()
+
+    def post_stretch(self, costs: float, income: float, steps: int):
+        """Post the same costs and income at each of ``steps`` steps from the portfolio's current step.
+
+        Each posting is dated at its own step, as :meth:`post` would date it.
+        """
+        sparse = getattr(self.portfolio, "sparse", False)
+        first = self.portfolio.now
+        transactions = []
+        for date in range(first, first + steps):
+            if costs or not sparse:
+                transactions.append(
+                    {"type": "expenditure", "title": "project costs", "project": self.name, "amount": costs, "date": date}
+                )
+            if income or not sparse:
+                transactions.append(
+                    {"type": "income", "title": "project income", "project": self.name, "amount": income, "date": date}
+                )
+        self.portfolio.consolidated_account.update_many(transactions)
@@ -0,0 +1,437 @@
+"""Shared-memory reference catalogues.
+
+FCR and support catalogues are identical across requests and worker processes.
+Instead of every process holding its own parsed copy, a catalogue is published
+once into a read-only, columnar shared-memory segment named after the content
+hash of its rows. Other processes map the segment and read rows through lazy
+views, so the catalogue is held once per host rather than once per process.
+An item index stored with the segment lets ``item_index`` look rows up by item
+name without scanning them.
+
+The "current" version of each kind of catalogue (``"fcr"``, ``"support"``) is a
+small pointer file replaced atomically, so a new upload swaps in for every
+worker at once; requests without reference data keep using it. Pointer files
+live in a directory per process group, so a restarted server starts without
+catalogues. A version is unlinked once it is replaced; current versions outlive
+the worker that published them and are reclaimed, with their directory, by the
+next server once every process of their group has exited.
+
+Usage example:
+    digest = publish("fcr", fcr_rows)      # in the process receiving the upload
+    install()                              # in any worker, before a run
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import operator
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from collections.abc import Mapping
+from multiprocessing import resource_tracker, shared_memory
+
+from . import constants
+
+SEGMENT_PREFIX = "simref-"
+REGISTRY_PREFIX = "simrefdata-"
+KINDS = {"fcr": constants.FCRDATA, "support": constants.SUPPORTDATA}
+
+_MISSING = object()
+_HEADER = struct.Struct("<Q")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_BOUNDS = struct.Struct("<2q")
+
+# Per-process cache of attached catalogues, keyed by digest.
+_attached: dict[str, "SharedCatalogue"] = {}
+# Digests of the segments this process created.
+_published: set[str] = set()
+
+
+def content_digest(rows: list[dict]) -> str:
+    """Return the content hash identifying a catalogue."""
+    canonical = json.dumps(rows, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+def registry_dir() -> str:
+    """Directory holding the pointer files for current catalogue versions.
+
+    Defaults to one directory per process group, shared by a server's workers.
+    Creating it reclaims the directories of process groups that have exited.
+    """
+    path = os.environ.get("SIM_REFDATA_DIR")
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), f"{REGISTRY_PREFIX}{os.getpgrp()}")
+        if not os.path.isdir(path):
+            _reclaim_stale()
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _group_alive(pgid: int) -> bool:
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _reclaim_stale():
+    """Unlink the current catalogues of exited process groups and remove their directories.
+
+    A digest still named by a live group's registry is kept, since segments
+    are shared by content.
+    """
+    root = tempfile.gettempdir()
+    live, stale = set(), []
+    for name in os.listdir(root):
+        pgid = name[len(REGISTRY_PREFIX):]
+        if not name.startswith(REGISTRY_PREFIX) or not pgid.isdigit():
+            continue
+        path = os.path.join(root, name)
+        digests = set()
+        for kind in KINDS:
+            try:
+                with open(os.path.join(path, f"{kind}.current"), "r") as f:
+                    digests.add(f.read().strip())
+            except OSError:
+                pass
+        if _group_alive(int(pgid)):
+            live |= digests
+        else:
+            stale.append((path, digests))
+    for path, digests in stale:
+        for digest in digests - live - {""}:
+            try:
+                SharedCatalogue.attach(digest).unlink()
+            except (OSError, ValueError):
+                pass
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    """Stop the resource tracker unlinking the segment when this process exits."""
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _encode_columns(rows: list[dict]):
+    """Lay rows out as typed columns, returning the header and the data buffer."""
+    names = []
+    for row in rows:
+        for key in row:
+            if key not in names:
+                names.append(key)
+
+    columns = []
+    chunks = []
+    offset = 0
+    for name in names:
+        values = [row.get(name, _MISSING) for row in rows]
+        present = [v for v in values if v is not _MISSING]
+        complete = len(present) == len(values)
+        # ints beyond 64 bits fall through to JSON, which keeps them exact
+        fixed = [type(v) is int and -(2**63) <= v < 2**63 for v in values]
+        if complete and all(fixed):
+            kind, data = "int", struct.pack(f"<{len(values)}q", *values)
+        elif complete and all(ok or type(v) is float for ok, v in zip(fixed, values)):
+            kind, data = "float", struct.pack(f"<{len(values)}d", *values)
+        else:
+            if complete and all(isinstance(v, str) for v in values):
+                kind, encoded = "str", [v.encode("utf-8") for v in values]
+            else:
+                # Irregular columns are stored as JSON text; an empty entry means "missing".
+                kind = "json"
+                encoded = [b"" if v is _MISSING else json.dumps(v).encode("utf-8") for v in values]
+            bounds = [0]
+            for value in encoded:
+                bounds.append(bounds[-1] + len(value))
+            data = struct.pack(f"<{len(bounds)}q", *bounds) + b"".join(encoded)
+        padding = -len(data) % 8
+        columns.append({"name": name, "kind": kind, "offset": offset})
+        chunks.append(data + b"\0" * padding)
+        offset += len(data) + padding
+
+    # First row of each item name, for lookups by item without a scan
+    index = {}
+    for position, row in enumerate(rows):
+        item = row.get("item")
+        if item is None or isinstance(item, (str, int, float)):
+            index.setdefault(item, position)
+
+    # pairs rather than an object, so non-string item names keep their type
+    header = json.dumps({"rows": len(rows), "columns": columns, "index": list(index.items())}).encode("utf-8")
+    return header, b"".join(chunks)
+
+
+def _reader(buf: memoryview, kind: str, start: int, nrows: int):
+    """Return a function reading row ``index`` of a column straight from ``buf``.
+
+    Values are read with struct.unpack_from, and strings decoded from a slice
+    released at once, so no views of the buffer stay exported.
+    """
+    if kind == "int":
+        unpack = _INT.unpack_from
+        return lambda index: unpack(buf, start + 8 * index)[0]
+    if kind == "float":
+        unpack = _FLOAT.unpack_from
+        return lambda index: unpack(buf, start + 8 * index)[0]
+    bounds = _BOUNDS.unpack_from
+    blob = start + 8 * (nrows + 1)
+    if kind == "str":
+
+        def read(index):
+            lo, hi = bounds(buf, start + 8 * index)
+            return str(buf[blob + lo:blob + hi], "utf-8")
+
+    else:
+
+        def read(index):
+            lo, hi = bounds(buf, start + 8 * index)
+            return json.loads(bytes(buf[blob + lo:blob + hi])) if hi > lo else _MISSING
+
+    return read
+
+
+class CatalogueRow(Mapping):
+    """Read-only view of one catalogue row backed by shared memory."""
+
+    __slots__ = ("_catalogue", "_index")
+
+    def __init__(self, catalogue: "SharedCatalogue", index: int):
+        self._catalogue = catalogue
+        self._index = index
+
+    def __getitem__(self, key):
+        reader = self._catalogue._readers.get(key)
+        if reader is not None:
+            value = reader(self._index)
+            if value is not _MISSING:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        for name in self._catalogue.columns:
+            if self._catalogue.value(name, self._index) is not _MISSING:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        # Rows leaving the process (pickling to a pool, checkpoints) travel as plain dicts.
+        return (dict, (dict(self),))
+
+
+class SharedCatalogue:
+    """Columnar, read-only catalogue stored in a shared-memory segment."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, digest: str):
+        self.shm = shm
+        self.digest = digest
+        (header_len,) = _HEADER.unpack_from(shm.buf, 0)
+        header = json.loads(bytes(shm.buf[_HEADER.size:_HEADER.size + header_len]))
+        self.nrows = header["rows"]
+        base = _HEADER.size + header_len
+        base += -base % 8
+        self._readers = {
+            column["name"]: _reader(shm.buf, column["kind"], base + column["offset"], self.nrows)
+            for column in header["columns"]
+        }
+        self._rows = [CatalogueRow(self, i) for i in range(self.nrows)]
+        self.index = {item: self._rows[position] for item, position in header["index"]}
+
+    @property
+    def columns(self) -> list[str]:
+        """Column names in first-seen order."""
+        return list(self._readers)
+
+    @classmethod
+    def publish(cls, rows: list[dict], digest: str | None = None) -> "SharedCatalogue":
+        """Store ``rows`` in shared memory, reusing an existing segment with the same content.
+
+        ``digest`` may be passed when the content hash of ``rows`` is already known.
+        """
+        digest = digest or content_digest(rows)
+        if digest in _attached:
+            return _attached[digest]
+        try:
+            return cls.attach(digest)
+        except FileNotFoundError:
+            pass
+        try:
+            header, data = _encode_columns(rows)
+        except (TypeError, ValueError, struct.error) as e:
+            raise ValueError(f"Catalogue cannot be stored in shared memory: {e}") from None
+        start = _HEADER.size + len(header)
+        start += -start % 8
+        try:
+            shm = shared_memory.SharedMemory(name=SEGMENT_PREFIX + digest, create=True, size=max(start + len(data), 1))
+        except FileExistsError:
+            return cls.attach(digest)
+        _untrack(shm)
+        _published.add(digest)
+        _HEADER.pack_into(shm.buf, 0, len(header))
+        shm.buf[_HEADER.size:_HEADER.size + len(header)] = header
+        shm.buf[start:start + len(data)] = data
+        catalogue = _attached[digest] = cls(shm, digest)
+        return catalogue
+
+    @classmethod
+    def attach(cls, digest: str) -> "SharedCatalogue":
+        """Map an existing catalogue segment by digest."""
+        if digest in _attached:
+            return _attached[digest]
+        shm = shared_memory.SharedMemory(name=SEGMENT_PREFIX + digest)
+        _untrack(shm)
+        catalogue = _attached[digest] = cls(shm, digest)
+        return catalogue
+
+    def value(self, name: str, index: int):
+        """Return the value of column ``name`` in row ``index``, or the missing sentinel."""
+        reader = self._readers.get(name)
+        return _MISSING if reader is None else reader(index)
+
+    def rows(self) -> list[CatalogueRow]:
+        """Row views over the catalogue."""
+        return self._rows
+
+    def __len__(self):
+        return self.nrows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def unlink(self):
+        """Remove the segment; processes that already mapped it keep their view."""
+        _attached.pop(self.digest, None)
+        _published.discard(self.digest)
+        # SharedMemory.unlink unregisters from the tracker, so balance the earlier _untrack.
+        resource_tracker.register(self.shm._name, "shared_memory")
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _pointer_path(kind: str) -> str:
+    return os.path.join(registry_dir(), f"{kind}.current")
+
+
+def current_digest(kind: str) -> str | None:
+    """Return the digest of the current catalogue of ``kind``, if any."""
+    try:
+        with open(_pointer_path(kind), "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish(kind: str, rows: list[dict], digest: str | None = None) -> str:
+    """Publish ``rows`` as the current ``kind`` catalogue and return its digest.
+
+    The pointer file is swapped atomically; the previous version is unlinked but
+    stays readable for processes that have already mapped it.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown catalogue kind: {kind}")
+    if digest and digest == current_digest(kind):
+        install(kind)
+        return digest
+    catalogue = SharedCatalogue.publish(rows, digest)
+    previous = current_digest(kind)
+    path = _pointer_path(kind)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(catalogue.digest)
+    os.replace(tmp, path)
+    if previous and previous != catalogue.digest and previous not in _in_use():
+        try:
+            SharedCatalogue.attach(previous).unlink()
+        except FileNotFoundError:
+            pass
+    KINDS[kind][:] = catalogue.rows()
+    return catalogue.digest
+
+
+def _in_use() -> set[str]:
+    return {d for d in (current_digest(kind) for kind in KINDS) if d}
+
+
+def digest_of(rows: list) -> str | None:
+    """Return the digest if ``rows`` are exactly the rows of one shared catalogue."""
+    if not rows or not isinstance(rows[0], CatalogueRow):
+        return None
+    catalogue = rows[0]._catalogue
+    expected = catalogue.rows()
+    if len(rows) != len(expected) or not all(map(operator.is_, rows, expected)):
+        return None
+    return catalogue.digest
+
+
+def item_index(rows: list) -> dict:
+    """Map each item name in ``rows`` to its first row.
+
+    The rows of a shared catalogue use the index stored with it; other lists
+    are indexed here.
+    """
+    if digest_of(rows):
+        return rows[0]._catalogue.index
+    index = {}
+    for row in rows:
+        index.setdefault(row.get("item"), row)
+    return index
+
+
+def install(kind: str | None = None):
+    """Point ``FCRDATA``/``SUPPORTDATA`` at the current shared catalogues.
+
+    Only kinds whose current digest differs from what this process holds are
+    re-attached, so calling this per request is cheap.
+    """
+    for name in [kind] if kind else list(KINDS):
+        digest = current_digest(name)
+        target = KINDS[name]
+        if digest is None or digest_of(target) == digest:
+            continue
+        try:
+            target[:] = SharedCatalogue.attach(digest).rows()
+        except FileNotFoundError:
+            # Swapped again between reading the pointer and attaching.
+            digest = current_digest(name)
+            if digest:
+                target[:] = SharedCatalogue.attach(digest).rows()
+
+
+@atexit.register
+def _cleanup():
+    """Unlink the segments this process published that are no longer current.
+
+    Current versions stay for the other workers of the server; they are
+    unlinked when replaced, or by ``_reclaim_stale`` after the server exits.
+    """
+    try:
+        current = _in_use()
+    except OSError:
+        return
+    for digest in list(_published - current):
+        try:
+            SharedCatalogue.attach(digest).unlink()
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,241 @@
+"""Structured tracing of simulation runs.
+
+The engine reports what happens during a run (projects created and completed,
+events starting, capital received, parsing notes) as typed trace events
+instead of printing. Each portfolio sends its events to a :class:`Tracer`,
+which filters them by level and hands them to a sink:
+
+    tracer = Tracer(RingBufferSink(1000))
+    portfolio = Portfolio(tracer=tracer)
+    portfolio.run(24)
+    [event.message() for event in tracer.events()]
+
+Call sites pass the event class and its raw values; the event is only built
+if the tracer accepts its level, and only formatted if a sink asks for its
+message, so a disabled tracer costs one comparison per call.
+
+The default tracer, used by portfolios and ``parseYAML`` when none is given,
+is configured from the environment.
+
+Environment variables:
+    SIM_TRACE: Default sink: null, console, json or ring (default null)
+    SIM_TRACE_LEVEL: Lowest level recorded: debug, info or warning (default info)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import deque
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING}
+DISABLED = logging.CRITICAL + 10
+
+
+class TraceEvent:
+    """
+    Base class of trace events.
+    Attributes:
+        step (int | None): Simulation step the event happened at (``None`` outside a run).
+        kind (str): Event type name used in serialised traces.
+        level (int): Severity, one of ``DEBUG``, ``INFO`` and ``WARNING``.
+        template (str): ``str.format`` template of the event's message.
+    """
+
+    __slots__ = ("step",)
+    kind = "event"
+    level = INFO
+    fields = ()
+    template = ""
+
+    def __init__(self, step, *values):
+        self.step = step
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+
+    def values(self) -> dict:
+        return {name: getattr(self, name) for name in self.fields}
+
+    def message(self) -> str:
+        return self.template.format(**self.values())
+
+    def to_dict(self) -> dict:
+        return {"step": self.step, "kind": self.kind, "level": logging.getLevelName(self.level), **self.values()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(step={self.step}, {self.values()})"
+
+
+class EventStarted(TraceEvent):
+    __slots__ = fields = ("event",)
+    kind = "event_started"
+    template = "Event {event} succeeds"
+
+
+class ProjectCreated(TraceEvent):
+    __slots__ = fields = ("project", "budget", "staff")
+    kind = "project_created"
+
+    def __init__(self, step, project, budget, staff):
+        # staff is the project's workers; their positions are only read when needed
+        super().__init__(step, project, budget, tuple(staff))
+
+    def values(self) -> dict:
+        return {"project": self.project, "budget": self.budget, "staff": [person.position for person in self.staff]}
+
+    def message(self) -> str:
+        values = self.values()
+        return f"Project {self.project} created with budget {self.budget:.2f} and assigned staff {', '.join(values['staff'])}"
+
+
+class ProjectCompleted(TraceEvent):
+    __slots__ = fields = ("project", "cost", "income", "budget")
+    kind = "project_completed"
+    template = "Project {project} cost {cost:.2f} and generated {income:.2f} with budget {budget:.2f}"
+
+
+class CapitalReceived(TraceEvent):
+    __slots__ = fields = ("project", "capital")
+    kind = "capital_received"
+    template = "New capital received {capital}"
+
+
+class FinanceCompleted(TraceEvent):
+    __slots__ = fields = ("project", "account", "paid")
+    kind = "finance_completed"
+    template = "Finance: Final account {account:.2f}, total paid {paid:.2f}"
+
+
+class CarbonProjection(TraceEvent):
+    __slots__ = fields = ("project", "trees", "credits", "years", "income")
+    kind = "carbon_projection"
+    template = "Trees planted: {trees:.0f} will generate {credits:.0f} carbon credits over {years} years worth £{income:.2f}"
+
+
+class AccountReport(TraceEvent):
+    __slots__ = fields = ("payments", "income", "balance")
+    kind = "account_report"
+    template = "Consolidated Account Report: Payments to date: {payments:.2f}, Income to date: {income:.2f}, Balance: {balance:.2f}"
+
+
+class ParseNote(TraceEvent):
+    __slots__ = fields = ("text",)
+    kind = "parse"
+    level = DEBUG
+    template = "{text}"
+
+
+class ParseWarning(ParseNote):
+    __slots__ = ()
+    kind = "parse_warning"
+    level = WARNING
+
+
+class NullSink:
+    """Sink that discards everything; a tracer with it records nothing."""
+
+    enabled = False
+
+    def write(self, event: TraceEvent):
+        pass
+
+
+class RingBufferSink:
+    """
+    Keep the most recent events in memory.
+    Attributes:
+        capacity (int): Number of events kept; older events are dropped.
+        dropped (int): Number of events dropped so far.
+    """
+
+    enabled = True
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self.buffer = deque(maxlen=capacity)
+        self.dropped = 0
+
+    def write(self, event: TraceEvent):
+        if len(self.buffer) == self.capacity:
+            self.dropped += 1
+        self.buffer.append(event)
+
+    def events(self) -> list[TraceEvent]:
+        return list(self.buffer)
+
+
+class ConsoleSink:
+    """Print each event's message, prefixed with its step, as the engine used to."""
+
+    enabled = True
+
+    def write(self, event: TraceEvent):
+        prefix = "" if event.step is None else f"[{event.step}] "
+        print(prefix + event.message())
+
+
+class JSONLogSink:
+    """
+    Write each event as one JSON object per line to a logger.
+    Attributes:
+        logger (logging.Logger): Logger receiving the lines (``sim.trace`` by default).
+    """
+
+    enabled = True
+
+    def __init__(self, logger: logging.Logger | None = None):
+        self.logger = logger or logging.getLogger("sim.trace")
+
+    def write(self, event: TraceEvent):
+        if self.logger.isEnabledFor(event.level):
+            self.logger.log(event.level, json.dumps(event.to_dict(), default=str))
+
+
+class Tracer:
+    """
+    Level filter in front of a sink.
+    Attributes:
+        sink: Object with ``enabled`` and ``write(event)``.
+        level (int): Lowest level passed to the sink.
+    """
+
+    def __init__(self, sink=None, level: int = INFO):
+        self.sink = sink or NullSink()
+        self.level = level
+        self._threshold = level if self.sink.enabled else DISABLED
+
+    def enabled(self, level: int = INFO) -> bool:
+        return level >= self._threshold
+
+    def emit(self, event_type: type, step, *values):
+        """Record an ``event_type`` event if its level passes the filter."""
+        if event_type.level >= self._threshold:
+            self.sink.write(event_type(step, *values))
+
+    def events(self) -> list[TraceEvent]:
+        """Events kept by the sink (empty unless it keeps them)."""
+        return self.sink.events() if hasattr(self.sink, "events") else []
+
+    def __reduce__(self):
+        # copies sent to worker processes or snapshots use the default tracer there
+        return (tracer_of, (None,))
+
+
+def tracer_of(owner) -> Tracer:
+    """Tracer of a portfolio (or any object with a ``tracer``), else the default tracer."""
+    return getattr(owner, "tracer", None) or default_tracer
+
+
+def tracer_from_env() -> Tracer:
+    """Tracer configured by ``SIM_TRACE`` and ``SIM_TRACE_LEVEL``."""
+    sinks = {"null": NullSink, "console": ConsoleSink, "json": JSONLogSink, "ring": RingBufferSink}
+    sink = sinks.get(os.environ.get("SIM_TRACE", "null").strip().lower(), NullSink)()
+    level = LEVELS.get(os.environ.get("SIM_TRACE_LEVEL", "info").strip().lower(), INFO)
+    return Tracer(sink, level)
+
+
+default_tracer = tracer_from_env()
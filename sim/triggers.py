@@ -0,0 +1,118 @@
+"""Conditional events started by signals from the running simulation.
+
+An event with a ``trigger`` instead of a fixed ``time`` starts at the step after
+its signal fires (plus an optional ``delay``):
+
+    - name: Bridge funding
+      trigger: {on: balance_below, threshold: 0}
+    - name: Phase 2
+      trigger: {on: completion, project: Phase 1}
+      delay: 3
+    - name: Match funding
+      trigger: {on: policy, policy: Grant, project: Phase 1}
+
+Subscriptions are indexed by signal: completions and policy firings by project
+(and policy) name, balance thresholds in sorted lists searched by bisection.
+A state change therefore only looks at the subscriptions it can affect, however
+many conditional events are waiting. Each subscription fires once.
+
+Thresholds are conditions on the balance, not only on its movement: an event
+subscribed while the balance is already below (``balance_below``) or at or
+above (``balance_above``) its threshold fires at the current step; otherwise
+it fires at the step whose posting first crosses the threshold.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right, insort
+
+SIGNALS = ("completion", "balance_below", "balance_above", "policy")
+
+
+class TriggerIndex:
+    """
+    Index of triggered events by the signal they subscribe to.
+    Attributes:
+        portfolio (Portfolio): Portfolio whose pending events fired events are added to.
+        fired (list): ``(step, signal, event name)`` for every subscription fired so far.
+    """
+
+    def __init__(self, portfolio=None):
+        self.portfolio = portfolio
+        self.fired = []
+        self._completion = {}
+        self._policy = {}
+        self._below = []
+        self._above = []
+        self._events = {}
+        self._count = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def subscribe(self, event: dict):
+        """Register an event whose ``trigger`` names the signal that starts it."""
+        trigger = event["trigger"]
+        signal = trigger.get("on")
+        if signal not in SIGNALS:
+            raise ValueError(f"Unknown trigger '{signal}', expected one of {SIGNALS}")
+        key = self._count
+        self._count += 1
+        self._events[key] = event
+        if signal == "completion":
+            self._completion.setdefault(trigger.get("project"), []).append(key)
+        elif signal == "policy":
+            self._policy.setdefault((trigger.get("policy"), trigger.get("project")), []).append(key)
+        else:
+            threshold = float(trigger.get("threshold", 0))
+            if self.portfolio is not None:
+                # a threshold the balance is already past fires now instead of waiting for a crossing
+                balance = self.portfolio.consolidated_account.balance
+                if balance < threshold if signal == "balance_below" else balance >= threshold:
+                    self._fire([key], self.portfolio.now, signal)
+                    return
+            thresholds = self._below if signal == "balance_below" else self._above
+            insort(thresholds, (threshold, key))
+
+    def watches_balance(self) -> bool:
+        """Whether any event is waiting on a balance threshold."""
+        return bool(self._below or self._above)
+
+    def completed(self, prj, step: int):
+        """Signal that ``prj`` completed its term at global ``step``."""
+        if self._completion:
+            keys = self._completion.pop(prj.name, []) + self._completion.pop(None, [])
+            self._fire(keys, step, "completion")
+
+    def policy_fired(self, policy, prj, step: int):
+        """Signal that ``policy`` of ``prj`` took effect at global ``step``."""
+        if self._policy:
+            name = type(policy).__name__
+            keys = self._policy.pop((name, prj.name), []) + self._policy.pop((name, None), [])
+            self._fire(keys, step, "policy")
+
+    def balance_changed(self, old: float, new: float, step: int):
+        """Signal a balance change; fires thresholds crossed between ``old`` and ``new``."""
+        if new < old and self._below:
+            # falling below t: new < t <= old
+            lo = bisect_right(self._below, (new, float("inf")))
+            hi = bisect_right(self._below, (old, float("inf")))
+            crossed, self._below[lo:hi] = self._below[lo:hi], []
+            self._fire([key for _, key in crossed], step, "balance_below")
+        elif new > old and self._above:
+            # rising to or above t: old < t <= new
+            lo = bisect_right(self._above, (old, float("inf")))
+            hi = bisect_right(self._above, (new, float("inf")))
+            crossed, self._above[lo:hi] = self._above[lo:hi], []
+            self._fire([key for _, key in crossed], step, "balance_above")
+
+    def _fire(self, keys: list[int], step: int, signal: str):
+        for key in sorted(keys):
+            event = self._events.pop(key, None)
+            if event is None:
+                continue
+            time = step + 1 + int(event.get("delay", 0))
+            event = {k: v for k, v in event.items() if k not in ("trigger", "delay")} | {"time": time}
+            self.fired.append((step, signal, event.get("name")))
+            if self.portfolio is not None:
+                self.portfolio.set_event(event)
@@ -3,12 +3,42 @@
 from __future__ import annotations
 
 import json
+import sys
 import yaml
 import pandas as pd
 from uuid import uuid4
 import ast
 
 from .constants import ALL_MONTHS
+from .expressions import StepExpression, is_step_expression
+from .tracing import DEBUG, ParseNote, ParseWarning, tracer_of
+
+
+# Label columns repeated on every budget row and ledger entry
+BUDGET_LABELS = ("item", "type", "description", "position")
+LEDGER_LABELS = ("type", "title", "project")
+
+
+def intern_label(value):
+    """Intern a string label so that every row repeating it shares one object."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_labels(row: dict, keys=BUDGET_LABELS) -> dict:
+    """Return a copy of ``row`` with its label fields interned."""
+    return {key: intern_label(value) if key in keys else value for key, value in row.items()}
+
+
+def categorize(df: pd.DataFrame, columns=BUDGET_LABELS) -> pd.DataFrame:
+    """Convert the label ``columns`` of ``df`` to categoricals in place.
+
+    Records produced by ``to_dict`` are unchanged; memory use and
+    groupby/pivot time drop with the number of repeated labels.
+    """
+    for column in columns:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    return df
 
 
 def get_current_month(start_month: str = "apr", month: int = 0) -> str:
@@ -30,11 +60,14 @@ def printtimestamp(env_or_step):
 
 def pivotbudget(db: pd.DataFrame) -> pd.DataFrame:
     """Pivot budget data for reporting."""
-    df = db.pivot_table(index=["item"], columns=["step"], values="budget", aggfunc="sum", fill_value=0)
-    lookup_dict_description = {row["item"]: row.get("description", "") for _, row in db.iterrows()}
-    lookup_dict_type = {row["item"]: row.get("type", "") for _, row in db.iterrows()}
-    df["description"] = df.index.map(lookup_dict_description).fillna("")
-    df["type"] = df.index.map(lookup_dict_type).fillna("")
+    df = db.pivot_table(
+        index=["item"], columns=["step"], values="budget", aggfunc="sum", fill_value=0, observed=True
+    )
+    # the last row for each item provides its description and type
+    last = db.drop_duplicates("item", keep="last").set_index("item")
+    for column in ("description", "type"):
+        lookup = last[column].astype(object) if column in last.columns else {}
+        df[column] = pd.Series(df.index.map(lookup), index=df.index, dtype=object).fillna("")
     columns_except_extra = [col for col in df.columns if col not in ["description", "type", "item"]]
     # Guard for 'item' not in index
     if "item" in df.columns:
@@ -47,19 +80,55 @@ def pivotbudget(db: pd.DataFrame) -> pd.DataFrame:
     return pf
 
 
-def parseYAML(yamltext: str, variables: dict = None):
+def expand_staffing_templates(events, templates: dict):
+    """Replace ``{template: name}`` staffing entries with the people of the named template.
+
+    Every project using a template shares the template's person definitions, so
+    their workers share one cost profile (see :class:`sim.models.WorkerCosts`).
+    """
+    if not isinstance(events, list):
+        return events
+    for event in events:
+        staffing = event.get("staffing") if isinstance(event, dict) else None
+        if not staffing:
+            continue
+        expanded = []
+        for entry in staffing if isinstance(staffing, list) else [staffing]:
+            if isinstance(entry, dict) and "template" in entry:
+                name = entry["template"]
+                if name not in templates:
+                    raise ValueError(f"Unknown staffing template: {name}")
+                people = templates[name]
+                expanded.extend(people if isinstance(people, list) else [people])
+            else:
+                expanded.append(entry)
+        event["staffing"] = expanded
+    return events
+
+
+def parseYAML(yamltext: str, variables: dict = None, tracer=None):
     """Parse YAML text and convert class strings to objects.
 
     Supports both root-level dictionary format (recommended) and legacy list format.
     Also handles mathematical expressions in curly braces {} and variable substitution.
+    Direct cost expressions referring to ``step``, ``year`` or ``month`` become
+    :class:`~sim.expressions.StepExpression` objects evaluated by the engine;
+    in any other field they are a parse error. A variable named ``step``,
+    ``year`` or ``month`` takes precedence over the step value.
 
     Root-level dictionary format (recommended):
     ```yaml
     variables:
       var1: value1
       var2: value2
+    staffing_templates:
+      core_team:
+        - {position: PM, salary: 45000, fte: 0.5}
+        - {position: Officer, salary: 30000, fte: 1.0}
     events:
-      - event1...
+      - name: event1
+        staffing:
+          - template: core_team
       - event2...
     ```
 
@@ -75,11 +144,13 @@ def parseYAML(yamltext: str, variables: dict = None):
     Args:
         yamltext: The YAML text to parse
         variables: Optional dictionary of variables to use in expressions
+        tracer: Tracer for parsing notes and warnings (default: the default tracer)
     """
     import re
     import operator
 
-    print("DEBUG: STARTING YAML PARSING WITH THE NEW CODE")
+    tracer = tracer or tracer_of(None)
+    tracer.emit(ParseNote, None, "Starting YAML parsing")
 
     # Default variables that can be used in expressions
     default_variables = {
@@ -134,20 +205,34 @@ def parseYAML(yamltext: str, variables: dict = None):
         except Exception as e:
             raise ValueError(f"Cannot evaluate expression '{expr}': {e}")
 
-    def process_expressions(data, variables):
-        """Process mathematical expressions in curly braces and substitute variables."""
+    def process_expressions(data, variables, path=()):
+        """Process mathematical expressions in curly braces and substitute variables.
+
+        ``path`` holds the keys leading to ``data`` (list positions are skipped).
+        """
         if isinstance(data, dict):
             processed = {}
             for key, value in data.items():
-                processed[key] = process_expressions(value, variables)
+                processed[key] = process_expressions(value, variables, path + (key,))
             return processed
         elif isinstance(data, list):
-            return [process_expressions(item, variables) for item in data]
+            return [process_expressions(item, variables, path) for item in data]
         elif isinstance(data, str):
             # Look for expressions in curly braces
             expr_pattern = r"\{([^}]+)\}"
             matches = re.findall(expr_pattern, data)
 
+            if len(matches) == 1 and data.strip() == f"{{{matches[0]}}}" and is_step_expression(matches[0], variables):
+                # evaluated per step by the engine, see sim.expressions; only
+                # direct cost lines are evaluated per step
+                if path[-2:] != ("directcosts", "cost"):
+                    field = ".".join(str(key) for key in path) or "value"
+                    raise ValueError(
+                        f"Expression '{matches[0]}' in '{field}' depends on step, year or month, "
+                        "which is only supported for directcosts cost"
+                    )
+                return StepExpression(matches[0], variables)
+
             if matches:
                 result = data
                 for match in matches:
@@ -159,17 +244,17 @@ def parseYAML(yamltext: str, variables: dict = None):
                         import math
 
                         if isinstance(value, float) and math.isnan(value):
-                            print(f"Warning: Expression '{match}' resulted in NaN, using 0 instead")
+                            tracer.emit(ParseWarning, None, f"Expression '{match}' resulted in NaN, using 0 instead")
                             value = 0
                         elif isinstance(value, float) and math.isinf(value):
-                            print(f"Warning: Expression '{match}' resulted in infinity, using 0 instead")
+                            tracer.emit(ParseWarning, None, f"Expression '{match}' resulted in infinity, using 0 instead")
                             value = 0
 
                         # Replace the expression with the calculated value
                         result = result.replace(f"{{{match}}}", str(value))
                     except Exception as e:
                         # If evaluation fails, leave the expression as is
-                        print(f"Warning: Could not evaluate expression '{match}': {e}")
+                        tracer.emit(ParseWarning, None, f"Could not evaluate expression '{match}': {e}")
                         continue
 
                 # Try to convert to number if the entire string is now numeric
@@ -180,10 +265,10 @@ def parseYAML(yamltext: str, variables: dict = None):
                         import math
 
                         if math.isnan(final_value):
-                            print("Warning: Final result is NaN, using 0 instead")
+                            tracer.emit(ParseWarning, None, "Final result is NaN, using 0 instead")
                             return 0
                         elif math.isinf(final_value):
-                            print("Warning: Final result is infinity, using 0 instead")
+                            tracer.emit(ParseWarning, None, "Final result is infinity, using 0 instead")
                             return 0
                         return final_value
                     else:
@@ -224,7 +309,6 @@ def parseYAML(yamltext: str, variables: dict = None):
                     and val.strip().endswith("}")
                 ):
                     # If the value is a string and contains another expression, try to resolve recursively - check
-                    print("THIS IS THE NEW CODE")
                     if isinstance(val, str) and "{" in val and "}" in val:
                         import re
                         expr_pattern = r"\{([^}]+)\}"
@@ -282,6 +366,7 @@ def parseYAML(yamltext: str, variables: dict = None):
     if data is None:
         return []
 
+    templates = {}
     # Handle root-level dictionary format (recommended approach)
     if isinstance(data, dict):
         # Extract variables if they exist
@@ -290,7 +375,11 @@ def parseYAML(yamltext: str, variables: dict = None):
             # Use resolve_with_two_dicts to resolve variables and expressions
             resolved_vars = resolve_with_two_dicts(yaml_variables, default_variables)
             default_variables.update(resolved_vars)
-            print(f"Debug: Loaded variables from root-level dict: {resolved_vars}")
+            if tracer.enabled(DEBUG):
+                tracer.emit(ParseNote, None, f"Loaded variables from root-level dict: {resolved_vars}")
+
+        if "staffing_templates" in data:
+            templates = process_expressions(data.pop("staffing_templates") or {}, default_variables)
 
         # Return the events or projects section, or the entire dict if no specific section
         if "events" in data:
@@ -309,10 +398,13 @@ def parseYAML(yamltext: str, variables: dict = None):
             variables_item = data.pop(0)
             yaml_variables = variables_item["variables"]
             default_variables.update(yaml_variables)
-            print(f"Debug: Loaded variables from legacy list format: {yaml_variables}")
+            if tracer.enabled(DEBUG):
+                tracer.emit(ParseNote, None, f"Loaded variables from legacy list format: {yaml_variables}")
 
     # Process mathematical expressions and variable substitution
     data = process_expressions(data, default_variables)
+    if templates:
+        data = expand_staffing_templates(data, templates)
 
     # Then handle class strings
     return map_cls_strings_to_objects(data)
@@ -9,7 +9,7 @@ window.addEventListener("DOMContentLoaded", () => {
         policy: ["FullCostRecovery", "Grant", "Finance", "CarbonFinancing"],
         Grant: ["amount", "fund", "step"],
         Finance: ["term", "capital", "rate"],
-        CarbonFinancing: ["term", "capital", "rate", "investment", "tree_planting_cost_per_unit", "carbon_credit_per_unit"],
+        CarbonFinancing: ["term", "capital", "rate", "investment", "tree_planting_cost_per_unit", "carbon_credit_per_unit", "horizon", "vesting", "price_growth", "price_path", "sale_lag", "book_sales"],
 
         item: [],
         frequency: ["monthly", "annual", "oneoff"],
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture
+def app():
+    """The Flask app, skipped where its optional service clients are not installed."""
+    pytest.importorskip("openai")
+    pytest.importorskip("astrapy")
+    from app import app
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
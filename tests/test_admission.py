@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+EVENTS = [{"name": "P", "time": 0, "term": 3, "supports": [{"item": "Legal", "units": 1, "frequency": "monthly"}]}]
+SUPPORTS = [{"item": "Legal", "dayrate": 600, "daysperunit": 2}]
+
+
+@pytest.fixture
+def routes(app):
+    from app import routes
+
+    return routes
+
+
+def wait(client, job_id: str) -> dict:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        job = client.get(f"/simulate/jobs/{job_id}").get_json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_queued_jobs_reuse_one_worker_pool(client, routes, monkeypatch):
+    from app.admission_utils import Admission, JobQueue
+
+    queue = JobQueue(workers=2, processes=1)
+    monkeypatch.setattr(routes, "admission", Admission(async_work=0))
+    monkeypatch.setattr(routes, "jobs", queue)
+    try:
+        workers = set()
+        for _ in range(3):
+            response = client.post("/simulate", json={"events": EVENTS, "steps": 3, "supportdata": SUPPORTS})
+            assert response.status_code == 202
+            job = wait(client, response.get_json()["job_id"])
+            assert job["status"] == "done"
+            assert job["result"]["transactions"][-1]["balance"] == -3 * 600 * 2
+            workers |= set(queue._pool._processes)
+        assert len(workers) == 1
+    finally:
+        queue._pool.shutdown()
+
+
+def test_oversized_runs_are_refused(client, routes, monkeypatch):
+    from app.admission_utils import Admission
+
+    monkeypatch.setattr(routes, "admission", Admission(max_work=1))
+    response = client.post("/simulate", json={"events": EVENTS, "steps": 3, "supportdata": SUPPORTS})
+    assert response.status_code == 413
+    body = response.get_json()
+    assert "exceeds the limit of 1" in body["error"]
+    assert body["estimate"]["projects"] == 1
+
+
+def test_async_runs_are_queued(client, routes, monkeypatch):
+    from app.admission_utils import Admission, JobQueue
+
+    queue = JobQueue(workers=1, processes=1)
+    monkeypatch.setattr(routes, "admission", Admission())
+    monkeypatch.setattr(routes, "jobs", queue)
+    try:
+        response = client.post("/simulate", json={"events": EVENTS, "steps": 3, "supportdata": SUPPORTS, "async": True})
+        assert response.status_code == 202
+        assert response.get_json()["status"] == "queued"
+        job = wait(client, response.get_json()["job_id"])
+        assert job["status"] == "done"
+        assert job["result"]["transactions"][-1]["balance"] == -3 * 600 * 2
+    finally:
+        if queue._pool is not None:
+            queue._pool.shutdown()
+
+
+def test_heavy_runs_get_503_while_every_slot_is_taken(client, routes, monkeypatch):
+    from app.admission_utils import HEAVY, Admission
+
+    admission = Admission(heavy_work=0, concurrency=1, wait=0.01)
+    monkeypatch.setattr(routes, "admission", admission)
+    request = {"events": EVENTS, "steps": 3, "supportdata": SUPPORTS}
+    with admission.slot(HEAVY):
+        response = client.post("/simulate", json=request)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert client.post("/simulate", json=request).status_code == 200
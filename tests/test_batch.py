@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+import pytest
+
+from sim import Portfolio, parseYAML
+from sim.__main__ import main
+
+SCENARIO = """
+events:
+  - name: P
+    time: 0
+    term: 6
+    directcosts:
+      - {{item: Rent, cost: {cost}, frequency: monthly}}
+"""
+
+
+def write(path, cost) -> str:
+    text = SCENARIO.format(cost=cost)
+    path.write_text(text)
+    return text
+
+
+def balance(text: str, steps: int) -> float:
+    portfolio = Portfolio()
+    portfolio.set_portfolio(parseYAML(text))
+    portfolio.run(steps)
+    return portfolio.consolidated_account.balance
+
+
+def test_batch_consolidates_scenarios_and_resumes_failures(tmp_path, capsys):
+    scenarios, output = tmp_path / "scenarios", tmp_path / "out"
+    scenarios.mkdir()
+    texts = {"low": write(scenarios / "low.yaml", 100), "high": write(scenarios / "high.yaml", 250)}
+    (scenarios / "broken.yaml").write_text("events: [\n")
+    args = [str(scenarios), "--steps", "8", "--output", str(output), "--format", "csv", "--processes", "2"]
+
+    assert main(args) == 1
+    manifest = json.loads((output / "manifest.json").read_text())["scenarios"]
+    assert {name: entry["status"] for name, entry in manifest.items()} == {"broken": "failed", "high": "done", "low": "done"}
+    ledger = pd.read_csv(output / "ledger.csv")
+    assert set(ledger["scenario"]) == {"low", "high"}
+    for name, text in texts.items():
+        assert manifest[name]["balance"] == pytest.approx(balance(text, 8))
+        assert ledger[ledger["scenario"] == name]["balance"].iloc[-1] == pytest.approx(balance(text, 8))
+
+    # rerunning retries only the failed scenario
+    write(scenarios / "broken.yaml", 50)
+    capsys.readouterr()
+    assert main(args) == 0
+    assert "3 scenarios, 2 up to date, 1 to run" in capsys.readouterr().out
+    budget = pd.read_csv(output / "budget.csv")
+    assert set(budget["scenario"]) == {"low", "high", "broken"}
+    assert budget.groupby("scenario")["budget"].sum().to_dict() == {"broken": 300, "high": 1500, "low": 600}
@@ -0,0 +1,65 @@
+import pytest
+
+from sim import Portfolio
+
+
+def forest(book_sales: bool | None, term: int = 30) -> dict:
+    policy = {
+        "policy": "CarbonFinancing",
+        "investment": 5000,
+        "tree_planting_cost_per_unit": 5,
+        "carbon_credit_per_unit": 20,
+        "horizon": 48,
+    }
+    if book_sales is not None:
+        policy["book_sales"] = book_sales
+    return {
+        "name": "Forest",
+        "time": 2,
+        "term": term,
+        "budget": 0,
+        "policies": [policy],
+    }
+
+
+def run(event: dict, steps: int, **options) -> Portfolio:
+    settings = {key: options.pop(key) for key in ("vectorized",) if key in options}
+    portfolio = Portfolio(**settings)
+    portfolio.set_portfolio([event])
+    portfolio.run(steps, **options)
+    return portfolio
+
+
+def test_sales_are_booked_as_project_income_within_term_and_run():
+    ledger = run(forest(True), 24).list_transactions()
+    assert (ledger["date"].diff().dropna() >= 0).all()
+    assert ledger["date"].max() < 24
+    assert "carbon credit sales" not in set(ledger["title"])
+    # sales fall at the last step of each vesting year: local 11 (run step 13) is in the run, local 23 is not
+    balance = ledger.groupby("date")["balance"].last()
+    without = run(forest(False), 24).list_transactions().groupby("date")["balance"].last()
+    extra = balance - without
+    assert extra[extra.diff().fillna(extra) != 0].index.tolist() == [13]
+    assert extra.iloc[-1] == pytest.approx(1100 * 20 / 4)
+
+def test_sales_are_booked_by_default_and_kept_off_the_ledger_on_request():
+    default, booked, unbooked = (run(forest(setting), 24) for setting in (None, True, False))
+    assert default.consolidated_account.balance == pytest.approx(booked.consolidated_account.balance)
+    assert default.projects[0].income == pytest.approx(5000 + 1100 * 20 / 4)
+    # without booking only the investment is income; the schedule is still reported
+    assert unbooked.projects[0].income == pytest.approx(5000)
+    assert unbooked.projects[0].policies[0].report()["carbon_credit_income"] == pytest.approx(1100 * 20)
+
+
+def test_sales_after_the_term_are_not_booked():
+    short = run(forest(True, term=6), 48)
+    plain = run(forest(False, term=6), 48)
+    assert short.consolidated_account.balance == pytest.approx(plain.consolidated_account.balance)
+    assert short.projects[0].policies[0].report()["carbon_credit_income"] == pytest.approx(1100 * 20)
+
+
+@pytest.mark.parametrize("options", [{"vectorized": True}, {"event_driven": True}])
+def test_engines_agree(options):
+    serial = run(forest(True), 40)
+    other = run(forest(True), 40, **options)
+    assert other.consolidated_account.balance == pytest.approx(serial.consolidated_account.balance)
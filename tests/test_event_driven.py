@@ -0,0 +1,58 @@
+import pytest
+
+from sim import Portfolio
+
+
+def events():
+    return [
+        {"name": "A", "time": 0, "term": 12, "directcosts": [{"item": "Rent", "cost": 100, "frequency": "oneoff"}]},
+        {"name": "B", "time": 5.0, "term": 12, "directcosts": [{"item": "Rent", "cost": 200, "frequency": "oneoff"}]},
+    ]
+
+
+@pytest.mark.parametrize("options", [{}, {"event_driven": True}, {"parallel": True, "processes": 2}])
+def test_whole_number_float_start_time(options):
+    portfolio = Portfolio()
+    portfolio.set_portfolio(events())
+    portfolio.run(12, **options)
+    assert [prj.name for prj in portfolio.projects] == ["A", "B"]
+    assert portfolio.consolidated_account.balance == pytest.approx(-300)
+
+
+def steady_events():
+    staff = [{"position": "Officer", "salary": 30000, "fte": 0.5, "start": 2}]
+    return [
+        {"name": "A", "time": 0, "term": 18, "staffing": staff, "directcosts": [{"item": "Rent", "cost": 100, "frequency": "monthly"}]},
+        {"name": "B", "time": 3, "term": 9, "directcosts": [{"item": "Fee", "cost": 500, "frequency": "annual", "step": 4}]},
+        {"name": "C", "time": 6, "term": 12, "policies": [{"policy": "Grant", "amount": 5000, "fund": "F", "step": 2}]},
+    ]
+
+
+def flows(portfolio) -> dict:
+    totals = {}
+    for transaction in portfolio.consolidated_account.register:
+        key = (transaction["date"], transaction["project"])
+        totals[key] = totals.get(key, 0) + transaction["amount"]
+    return totals
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_event_driven_ledger_is_step_resolved(sparse):
+    serial = Portfolio(sparse=sparse)
+    serial.set_portfolio(steady_events())
+    serial.run(24)
+    driven = Portfolio(sparse=sparse)
+    driven.set_portfolio(steady_events())
+    driven.run(24, event_driven=True)
+
+    assert flows(driven).keys() == flows(serial).keys()
+    for key, amount in flows(serial).items():
+        assert flows(driven)[key] == pytest.approx(amount)
+    dates = [t["date"] for t in driven.consolidated_account.register]
+    assert dates == sorted(dates)
+
+    expected, actual = serial.consolidated_account.index(), driven.consolidated_account.index()
+    assert actual.balances() == pytest.approx(expected.balances())
+    assert actual.min_balance() == pytest.approx(expected.min_balance())
+    last = {t["date"]: t["balance"] for t in driven.consolidated_account.register}
+    assert [last[d] for d in sorted(last)] == pytest.approx([actual.balance_at(d) for d in sorted(last)])
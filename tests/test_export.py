@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+from sim import Portfolio
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("pyarrow.parquet")
+
+from sim import export  # noqa: E402
+
+
+def project(name: str, time: int) -> dict:
+    return {
+        "name": name,
+        "time": time,
+        "term": 6,
+        "budget": 10000,
+        "staffing": [{"position": "Officer", "salary": 30000, "fte": 0.5}],
+        "directcosts": [{"item": "Travel", "cost": 200, "frequency": "monthly", "step": 0}],
+    }
+
+
+def run(events: list[dict], steps: int = 12) -> Portfolio:
+    portfolio = Portfolio()
+    portfolio.set_portfolio(events)
+    portfolio.run(steps)
+    return portfolio
+
+
+def read(data: bytes, format: str):
+    if format == "parquet":
+        return pa.parquet.read_table(io.BytesIO(data))
+    return pa.ipc.open_stream(data).read_all()
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_written_and_streamed_budgets_match(format):
+    portfolio = run([project("A", 0), project("B", 3)])
+    buffer = io.BytesIO()
+    export.write(portfolio, buffer, table="budget", format=format)
+    written = read(buffer.getvalue(), format)
+    streamed = read(b"".join(export.stream(portfolio, table="budget", format=format)), format)
+
+    assert written.schema == streamed.schema == export.schema("budget")
+    assert written.to_pandas().astype(str).equals(streamed.to_pandas().astype(str))
+    assert set(written.column("project").to_pylist()) == {"A", "B"}
+
+
+def test_empty_budget_keeps_the_schema():
+    assert export.budget_table(run([], 3)).schema == export.schema("budget")
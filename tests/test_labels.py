@@ -0,0 +1,49 @@
+import pandas as pd
+
+from sim import Portfolio
+from sim.utils import BUDGET_LABELS, LEDGER_LABELS
+
+
+def label(*parts: str) -> str:
+    # built at runtime, so only interning makes equal labels the same object
+    return "".join(parts)
+
+
+def run() -> Portfolio:
+    events = [
+        {
+            "name": label("Pro", "ject"),
+            "time": time,
+            "term": 6,
+            "staffing": [{"position": label("Off", "icer"), "salary": 30000, "fte": 0.5}],
+            "directcosts": [{"item": label("Re", "nt"), "cost": 100, "frequency": "monthly"}],
+        }
+        for time in (0, 2)
+    ]
+    portfolio = Portfolio()
+    portfolio.set_portfolio(events)
+    portfolio.run(8)
+    return portfolio
+
+
+def test_repeated_labels_share_one_object():
+    portfolio = run()
+    register = list(portfolio.consolidated_account.register)
+    assert len({id(t["project"]) for t in register}) == 1
+    assert len({id(t["title"]) for t in register if t["title"] == "project costs"}) == 1
+    rows = [row for prj in portfolio.projects for step in range(6) for row in prj.getdirectcosts(step)]
+    assert len(rows) == 12
+    assert len({id(row["item"]) for row in rows}) == 1
+
+
+def test_frames_use_categoricals_without_changing_records():
+    portfolio = run()
+    budget, ledger = portfolio.getbudget(), portfolio.list_transactions()
+    for frame, columns in ((budget, BUDGET_LABELS), (ledger, LEDGER_LABELS)):
+        for column in set(columns) & set(frame.columns):
+            assert isinstance(frame[column].dtype, pd.CategoricalDtype)
+
+    plain = ledger.astype({column: object for column in LEDGER_LABELS})
+    assert ledger.to_dict("records") == plain.to_dict("records")
+    totals = budget.groupby("item", observed=True)["budget"].sum().to_dict()
+    assert totals == budget.astype({"item": object}).groupby("item")["budget"].sum().to_dict()
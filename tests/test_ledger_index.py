@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from sim import LedgerIndex
+
+
+def ledger(seed: int = 7, steps: int = 40) -> list[dict]:
+    rng = random.Random(seed)
+    register = []
+    for date in range(steps):
+        # some steps post nothing, so prefix sums must carry over gaps
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            kind = rng.choice(("expenditure", "income"))
+            amount = rng.randint(1, 50) * (1 if kind == "expenditure" else -1)
+            register.append({"date": date, "project": rng.choice("AB"), "type": kind, "amount": float(amount)})
+    return register
+
+
+def balance(register, step, project=None) -> float:
+    return -sum(t["amount"] for t in register if t["date"] <= step and project in (None, t["project"]))
+
+
+def lowest(register, start, stop, project=None):
+    balances = [(balance(register, step, project), step) for step in range(start, stop)]
+    return min(balances, key=lambda pair: pair[0]) if balances else None
+
+
+def test_queries_match_a_scan_of_the_ledger():
+    register = ledger()
+    index = LedgerIndex(register)
+    steps = register[-1]["date"] + 1
+    for project in (None, "A", "B"):
+        assert index.balances(project).tolist() == [balance(register, s, project) for s in range(steps)]
+        assert index.balance_at(-1, project) == 0
+        for step in (0, steps // 2, steps - 1, steps + 5):
+            assert index.balance_at(step, project) == balance(register, step, project)
+        for start in range(steps):
+            for stop in range(start + 1, steps + 1):
+                assert index.min_balance(start, stop, project) == lowest(register, start, stop, project)
+        assert index.min_balance(5, 5, project) is None
+    assert index.steps == steps
+
+    window = [t for t in register if 10 <= t["date"] < 20]
+    assert index.total(10, 20) == pytest.approx(sum(t["amount"] for t in window))
+    assert index.spend(10, 20, "A") == sum(t["amount"] for t in window if t["project"] == "A" and t["type"] == "expenditure")
+    assert index.income(10, 20) == -sum(t["amount"] for t in window if t["type"] == "income")
+
+
+def test_single_rows_and_appends():
+    register = [{"date": 3, "project": "A", "type": "expenditure", "amount": 100.0}]
+    index = LedgerIndex(register)
+    assert index.balances().tolist() == [0, 0, 0, -100]
+    assert index.min_balance(3, 4) == (-100, 3)
+    assert index.min_balance(0, 1) == (0, 0)
+    assert index.total(3, 4) == 100
+
+    register.append({"date": 5, "project": "B", "type": "income", "amount": -250.0})
+    assert index.min_balance() == (-100, 3)
+    assert index.balance_at(5) == 150
+    assert index.min_balance(4, 6, "B") == (0, 4)
+
+
+def test_empty_ledger():
+    index = LedgerIndex([])
+    assert index.balances().tolist() == []
+    assert index.balance_at(0) == 0
+    assert index.total() == 0
+    assert index.min_balance() is None
+    assert index.min_balance(0, 10) is None
@@ -0,0 +1,47 @@
+import re
+
+import pytest
+
+EVENTS = [{"name": "P", "time": 0, "term": 3, "directcosts": [{"item": "Rent", "cost": 100, "frequency": "monthly"}]}]
+
+
+@pytest.fixture
+def metrics(app):
+    from app import metrics_utils
+
+    return metrics_utils
+
+
+def sample(text: str, series: str) -> float:
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+def test_phases_are_timed_only_within_a_request(metrics):
+    assert metrics.phase("run") is metrics.phase("parse")
+    timer = metrics.start("sim.test")
+    with metrics.phase("run"):
+        pass
+    with metrics.phase("run"):
+        pass
+    assert metrics.finish() is timer
+    assert metrics.finish() is None
+    assert list(timer.phases) == ["run"]
+    assert re.fullmatch(r"run;dur=\d+\.\d\d, total;dur=\d+\.\d\d", timer.server_timing())
+    assert sample(metrics.render(), 'sim_request_seconds_count{endpoint="sim.test"}') == 1
+
+
+def test_simulations_report_server_timing_and_metrics(client, metrics):
+    before = client.get("/metrics").get_data(as_text=True)
+    response = client.post("/simulate", json={"events": EVENTS, "steps": 3})
+    assert response.status_code == 200
+
+    timing = dict(part.split(";", 1) for part in response.headers["Server-Timing"].split(", "))
+    assert {"admission", "run", "budget", "encode", "total"} <= timing.keys()
+    assert timing["projects"] == 'desc="1"'
+    assert timing["transactions"] == 'desc="6"'
+
+    after = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE sim_phase_seconds histogram" in after
+    for series in ('sim_phase_seconds_count{phase="run"}', 'sim_run_size_count{quantity="projects"}'):
+        assert sample(after, series) == sample(before, series) + 1
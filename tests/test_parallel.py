@@ -0,0 +1,65 @@
+import pytest
+
+from sim import Portfolio
+
+
+def events():
+    staff = [{"position": "Officer", "salary": 30000, "fte": 0.5}]
+    return [
+        {"name": "A", "time": 0, "term": 10, "staffing": staff, "directcosts": [{"item": "Rent", "cost": 100, "frequency": "monthly"}]},
+        {"name": "B", "time": 2, "term": 6, "directcosts": [{"item": "Fee", "cost": 700, "frequency": "oneoff", "step": 0}]},
+        {
+            "name": "C",
+            "time": 2,
+            "term": 8,
+            "policies": [
+                {"policy": "Grant", "amount": 5000, "fund": "F", "step": 0},
+                {"policy": "Finance", "term": 4, "capital": 3000, "rate": 0.05},
+            ],
+        },
+        {"name": "D", "time": 5, "term": 4, "directcosts": [{"item": "Rent", "cost": 50, "frequency": "monthly"}]},
+    ]
+
+
+def run(**options) -> Portfolio:
+    portfolio = Portfolio()
+    portfolio.set_portfolio(events())
+    portfolio.finance(6, 2000, 0.05)
+    portfolio.run(12, **options)
+    return portfolio
+
+
+def test_fragments_merge_into_the_serial_ledger():
+    serial = run()
+    merged = run(parallel=True, processes=2)
+
+    assert [prj.name for prj in merged.projects] == [prj.name for prj in serial.projects]
+    assert list(merged.consolidated_account.register) == list(serial.consolidated_account.register)
+    assert merged.consolidated_account.balance == serial.consolidated_account.balance
+    assert not merged.scheduled
+
+    # balances run on from posting to posting
+    balance = 0
+    for transaction in merged.consolidated_account.register:
+        balance -= transaction["amount"]
+        assert transaction["balance"] == pytest.approx(balance)
+
+
+def test_merge_orders_by_date_then_phase_then_creation_order():
+    register = list(run(parallel=True, processes=2).consolidated_account.register)
+    dates = [t["date"] for t in register]
+    assert dates == sorted(dates)
+
+    # step 2: the portfolio's scheduled repayment (phase -1), C's capitalisation
+    # posted on creation (CREATE), then A, B and C stepping in creation order (STEP)
+    assert [(t["project"], t["title"]) for t in register if t["date"] == 2] == [
+        ("headoffice", "finance servicing"),
+        ("headoffice", "finance capitalisation"),
+        ("A", "project costs"),
+        ("A", "project income"),
+        ("B", "project costs"),
+        ("B", "project income"),
+        ("headoffice", "finance servicing"),
+        ("C", "project costs"),
+        ("C", "project income"),
+    ]
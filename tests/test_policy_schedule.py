@@ -0,0 +1,38 @@
+import pytest
+
+from sim import Portfolio
+from sim.policies import Finance, Grant, PolicySchedule, StepPolicyAdapter, Subsidy
+
+
+def events():
+    policies = [
+        {"policy": "Grant", "amount": 5000, "fund": "F", "step": 3},
+        {"policy": "Finance", "term": 4, "capital": 1200, "rate": 0.05},
+        {"policy": "Subsidy"},
+    ]
+    staff = [{"position": "Officer", "salary": 30000, "fte": 0.5}]
+    return [{"name": "P", "time": 1, "term": 8, "staffing": staff, "policies": policies}]
+
+
+def run(vectorized: bool) -> Portfolio:
+    portfolio = Portfolio(vectorized=vectorized)
+    portfolio.set_portfolio(events())
+    portfolio.run(10)
+    return portfolio
+
+
+def test_vectorized_schedules_post_the_per_step_ledger():
+    stepped, vectorized = run(False), run(True)
+    assert list(vectorized.consolidated_account.register) == list(stepped.consolidated_account.register)
+    assert vectorized.projects[0].income == pytest.approx(stepped.projects[0].income)
+
+
+def test_per_step_policies_are_adapted_in_their_original_order():
+    prj = run(True).projects[0]
+    # Grant only adds to the income array; Finance posts its servicing and
+    # Subsidy still runs per step, after Finance as declared
+    assert [type(part) for part in prj._sweep] == [PolicySchedule, StepPolicyAdapter]
+    assert isinstance(prj._sweep[1].policy, Subsidy)
+    assert [type(policy) for policy in prj._scheduled] == [Grant, Finance]
+    assert prj._policy_income[3] == 5000
+    assert sum(prj._policy_income) == 5000
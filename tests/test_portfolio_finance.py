@@ -0,0 +1,58 @@
+import pytest
+
+from sim import LedgerIndex, Portfolio
+
+
+def financed(**options) -> Portfolio:
+    settings = {key: options.pop(key) for key in ("vectorized",) if key in options}
+    portfolio = Portfolio(**settings)
+    portfolio.set_portfolio(
+        [{"name": "P1", "time": 1, "term": 8, "directcosts": [{"item": "Rent", "cost": 50, "frequency": "monthly"}]}]
+    )
+    portfolio.finance(4, 1000, 0.05)
+    portfolio.run(10, **options)
+    return portfolio
+
+
+def test_repayments_are_posted_as_the_run_reaches_them():
+    portfolio = Portfolio()
+    portfolio.finance(4, 1000, 0.05)
+    assert len(portfolio.consolidated_account.register) == 2
+    portfolio.run(2)
+    ledger = portfolio.list_transactions()
+    assert ledger["date"].tolist() == [0, 0, 1]
+    assert portfolio.consolidated_account.balance == pytest.approx(1000 - 300 - 287.5)
+    portfolio.resume(10)
+    ledger = portfolio.list_transactions()
+    assert ledger["date"].tolist() == [0, 0, 1, 2, 3]
+    assert (ledger["title"] == "finance servicing").sum() == 4
+    assert not portfolio.scheduled
+
+
+def test_balance_queries_exclude_later_payments():
+    portfolio = financed()
+    ledger = portfolio.list_transactions()
+    assert ledger["date"].is_monotonic_increasing
+    index = LedgerIndex(portfolio.consolidated_account.register)
+    assert index.balance_at(0) == pytest.approx(700)
+
+
+@pytest.mark.parametrize(
+    "options", [{"vectorized": True}, {"event_driven": True}, {"parallel": True, "processes": 2}]
+)
+def test_engines_agree(options):
+    serial = financed()
+    other = financed(**options)
+    assert other.consolidated_account.balance == pytest.approx(serial.consolidated_account.balance)
+    assert other.list_transactions()["date"].is_monotonic_increasing
+
+
+def test_forks_keep_the_remaining_repayments():
+    portfolio = Portfolio()
+    portfolio.finance(6, 600, 0.0)
+    portfolio.run(3)
+    fork = portfolio.snapshot().fork()
+    fork.resume(10)
+    portfolio.resume(10)
+    assert fork.consolidated_account.balance == pytest.approx(0)
+    assert portfolio.consolidated_account.balance == pytest.approx(0)
@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+from sim import Portfolio, constants, refdata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUPPORTS = [
+    {"item": "Comms", "dayrate": 400, "daysperunit": 1.5},
+    {"item": "Legal", "dayrate": 600, "daysperunit": 2},
+]
+PUBLISH = """
+import json, sys
+from sim import refdata
+print(refdata.publish("support", json.loads(sys.argv[1])), flush=True)
+sys.stdin.read()
+"""
+INSTALL = """
+from sim import constants, refdata
+refdata.install()
+print(refdata.digest_of(constants.SUPPORTDATA), constants.SUPPORTDATA[1]["dayrate"])
+"""
+
+
+def python(code: str, *args: str, registry=None, **options):
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    env.pop("SIM_REFDATA_DIR", None)
+    if registry is not None:
+        env["SIM_REFDATA_DIR"] = str(registry)
+    return subprocess.Popen([sys.executable, "-c", code, *args], env=env, text=True, **options)
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIM_REFDATA_DIR", str(tmp_path))
+    saved = list(constants.SUPPORTDATA)
+    yield tmp_path
+    constants.SUPPORTDATA[:] = saved
+    digest = refdata.current_digest("support")
+    if digest:
+        refdata.SharedCatalogue.attach(digest).unlink()
+
+
+def test_rows_are_read_from_the_segment_and_looked_up_by_item(registry):
+    digest = refdata.publish("support", SUPPORTS)
+    assert all(isinstance(row, refdata.CatalogueRow) for row in constants.SUPPORTDATA)
+    assert [dict(row) for row in constants.SUPPORTDATA] == SUPPORTS
+    index = refdata.item_index(constants.SUPPORTDATA)
+    assert index is refdata.SharedCatalogue.attach(digest).index
+    assert index["Legal"] is constants.SUPPORTDATA[1]
+
+    event = {"name": "P", "time": 0, "term": 3, "supports": [{"item": "Legal", "units": 2, "frequency": "monthly"}]}
+    shared = Portfolio()
+    shared.set_portfolio([dict(event)])
+    shared.run(3)
+    constants.SUPPORTDATA[:] = SUPPORTS
+    plain = Portfolio()
+    plain.set_portfolio([dict(event)])
+    plain.run(3)
+    assert shared.consolidated_account.balance == plain.consolidated_account.balance == -3 * 2 * 600 * 2
+
+
+def test_current_catalogue_outlives_the_process_that_published_it(registry):
+    publisher = python(PUBLISH, json.dumps(SUPPORTS), registry=registry, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    digest = publisher.stdout.readline().strip()
+    refdata.install("support")
+    assert refdata.digest_of(constants.SUPPORTDATA) == digest
+
+    publisher.communicate("")
+    assert publisher.returncode == 0
+    assert refdata.current_digest("support") == digest
+    assert constants.SUPPORTDATA[1]["dayrate"] == 600
+    # a worker started after the publisher exited still finds the catalogue
+    worker = python(INSTALL, registry=registry, stdout=subprocess.PIPE)
+    assert worker.communicate()[0].split() == [digest, "600"]
+
+
+def test_catalogues_of_exited_process_groups_are_reclaimed():
+    rows = [{"item": "Reclaimed", "dayrate": 1, "daysperunit": 1}]
+    publisher = python(PUBLISH, json.dumps(rows), start_new_session=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    digest = publisher.stdout.readline().strip()
+    publisher.communicate("")
+    # the group lives on until the publisher's resource tracker has exited too
+    deadline = time.monotonic() + 10
+    while refdata._group_alive(publisher.pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    path = os.path.join(tempfile.gettempdir(), f"{refdata.REGISTRY_PREFIX}{publisher.pid}")
+    assert os.path.isdir(path)
+    refdata.SharedCatalogue.attach(digest)
+    refdata._attached.pop(digest)
+
+    refdata._reclaim_stale()
+    assert not os.path.exists(path)
+    with pytest.raises(FileNotFoundError):
+        refdata.SharedCatalogue.attach(digest)
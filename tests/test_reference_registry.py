@@ -0,0 +1,41 @@
+import pytest
+
+ROWS = [
+    {"item": "Comms", "dayrate": 400, "daysperunit": 1.5},
+    {"item": "Legal", "dayrate": 600, "daysperunit": 2},
+    {"item": "Comms", "dayrate": 1, "daysperunit": 1},
+]
+
+
+@pytest.fixture
+def registry(app, tmp_path, monkeypatch):
+    from app import routes
+    from app.reference_utils import ReferenceRegistry
+
+    registry = ReferenceRegistry(str(tmp_path))
+    monkeypatch.setattr(routes, "reference_registry", registry)
+    return registry
+
+
+def test_same_rows_registered_as_both_kinds_get_separate_ids(registry):
+    fcr = registry.register("fcr", ROWS)
+    support = registry.register("support", ROWS)
+    assert fcr["id"] != support["id"]
+    assert fcr["items"] == support["items"] == ["Comms", "Legal"]
+
+    reloaded = type(registry)(registry.directory)
+    assert reloaded.get(fcr["id"])["kind"] == "fcr"
+    assert reloaded.get(support["id"])["kind"] == "support"
+    assert reloaded.get(support["id"])["index"]["Comms"] is reloaded.get(support["id"])["rows"][0]
+
+
+def test_dataset_of_the_wrong_kind_is_rejected(client, registry):
+    support = registry.register("support", ROWS)
+    events = [{"name": "P", "time": 0, "term": 2, "supports": [{"item": "Legal", "units": 1, "frequency": "monthly"}]}]
+
+    response = client.post("/simulate", json={"events": events, "steps": 2, "fcrdata_id": support["id"]})
+    assert response.status_code == 400
+
+    response = client.post("/simulate", json={"events": events, "steps": 2, "supportdata_id": support["id"]})
+    assert response.status_code == 200
+    assert response.get_json()["transactions"][-1]["balance"] == -2 * 600 * 2
@@ -0,0 +1,34 @@
+import pytest
+
+EVENTS = [
+    {"name": "A", "time": 0, "term": 4, "directcosts": [{"item": "Rent", "cost": 100, "frequency": "monthly"}]},
+    {"name": "B", "time": 2, "term": 4, "policies": [{"policy": "Grant", "amount": 500, "fund": "F", "step": 1}]},
+]
+
+
+@pytest.fixture
+def result_id(client):
+    response = client.post("/simulate", json={"events": EVENTS, "steps": 6})
+    assert response.status_code == 200
+    return response.get_json()["result_id"]
+
+
+def test_stored_results_answer_balance_and_flow_queries(client, result_id):
+    base = f"/simulate/results/{result_id}"
+    assert client.get(f"{base}/balance?step=1").get_json()["balance"] == -200
+    assert client.get(f"{base}/balance?step=3&project=B").get_json()["balance"] == 500
+    assert client.get(f"{base}/balance?step=3").get_json()["balance"] == 100
+
+    lowest = client.get(f"{base}/min_balance").get_json()
+    assert (lowest["balance"], lowest["step"]) == (-300, 2)
+    assert client.get(f"{base}/min_balance?start=3&stop=4").get_json()["step"] == 3
+
+    flows = client.get(f"{base}/flows?start=0&stop=2&type=expenditure").get_json()
+    assert flows["total"] == 200
+    assert client.get(f"{base}/flows?project=B&type=income").get_json()["total"] == -500
+
+
+def test_bad_result_queries(client, result_id):
+    assert client.get(f"/simulate/results/{result_id}/balance").status_code == 400
+    assert client.get("/simulate/results/unknown/balance?step=1").status_code == 404
+    assert client.get("/simulate/results/unknown/flows").status_code == 404
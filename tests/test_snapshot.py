@@ -0,0 +1,76 @@
+import pickle
+
+import pytest
+
+from sim import LedgerRegister, Portfolio, PortfolioSnapshot, snapshot
+
+
+def events():
+    staff = [{"position": "Officer", "salary": 30000, "fte": 0.5}]
+    return [
+        {"name": "A", "time": 0, "term": 12, "staffing": staff, "directcosts": [{"item": "Rent", "cost": 100, "frequency": "monthly"}]},
+        {"name": "B", "time": 4, "term": 6, "policies": [{"policy": "Grant", "amount": 5000, "fund": "F", "step": 2}]},
+        {"name": "C", "time": 8, "term": 6, "directcosts": [{"item": "Fee", "cost": 700, "frequency": "oneoff", "step": 0}]},
+    ]
+
+
+def started(steps: int) -> Portfolio:
+    portfolio = Portfolio()
+    portfolio.set_portfolio(events())
+    portfolio.finance(6, 2000, 0.05)
+    portfolio.run(steps)
+    return portfolio
+
+
+def test_forked_and_resumed_runs_match_an_uninterrupted_run(tmp_path):
+    uninterrupted = started(16)
+    expected = list(uninterrupted.consolidated_account.register)
+
+    fork = started(6).snapshot().fork()
+    fork.resume(16)
+    path = tmp_path / "checkpoint.pkl"
+    started(6).snapshot().save(path)
+    resumed = PortfolioSnapshot.load(path).fork()
+    resumed.resume(16)
+
+    for portfolio in (fork, resumed):
+        assert list(portfolio.consolidated_account.register) == expected
+        assert portfolio.consolidated_account.balance == uninterrupted.consolidated_account.balance
+        assert [prj.name for prj in portfolio.projects] == ["A", "B", "C"]
+
+
+def test_forks_share_the_prefix_without_leaking_postings():
+    base = started(6)
+    prefix = list(base.consolidated_account.register)
+    snap = base.snapshot()
+    first, second = snap.fork(), snap.fork()
+    assert isinstance(first.consolidated_account.register, LedgerRegister)
+
+    first.projects[0].directcosts.clear()
+    first.resume(10)
+    second.resume(12)
+    base.resume(8)
+
+    # the untouched fork and the source continue exactly as fresh runs would
+    assert list(second.consolidated_account.register) == list(started(12).consolidated_account.register)
+    assert list(base.consolidated_account.register) == list(started(8).consolidated_account.register)
+    tail = list(first.consolidated_account.register)[len(prefix) :]
+    assert max(t["date"] for t in tail) == 9
+    assert list(first.consolidated_account.register)[: len(prefix)] == prefix
+    assert tail != list(second.consolidated_account.register)[len(prefix) : len(prefix) + len(tail)]
+    # a later fork still starts from the snapshot's prefix
+    late = snap.fork()
+    assert list(late.consolidated_account.register) == prefix
+
+
+def test_checkpoints_of_another_version_are_rejected(tmp_path):
+    path = tmp_path / "checkpoint.pkl"
+    started(3).snapshot().save(path)
+    with open(path, "rb") as f:
+        checkpoint = pickle.load(f)
+    checkpoint["version"] = snapshot.CHECKPOINT_VERSION + 1
+    with open(path, "wb") as f:
+        pickle.dump(checkpoint, f)
+
+    with pytest.raises(ValueError, match="Unsupported checkpoint version"):
+        PortfolioSnapshot.load(path)
@@ -0,0 +1,66 @@
+import pytest
+
+from sim import Portfolio
+
+
+def events():
+    staff = [{"position": "Officer", "salary": 30000, "fte": 0.5, "start": 3}]
+    return [
+        {"name": "A", "time": 0, "term": 12, "staffing": staff, "directcosts": [{"item": "Rent", "cost": 100, "frequency": "monthly"}]},
+        {"name": "B", "time": 2, "term": 8, "directcosts": [{"item": "Fee", "cost": 700, "frequency": "oneoff", "step": 0}]},
+    ]
+
+
+def run(steps: int = 12, **settings) -> Portfolio:
+    portfolio = Portfolio(**settings)
+    portfolio.set_portfolio(events())
+    portfolio.run(steps)
+    return portfolio
+
+
+def flows(portfolio) -> dict:
+    totals = {}
+    for transaction in portfolio.consolidated_account.register:
+        key = (transaction["date"], transaction["project"])
+        totals[key] = totals.get(key, 0) + transaction["amount"]
+    return {key: amount for key, amount in totals.items() if amount}
+
+
+def test_sparse_runs_drop_zero_rows_only():
+    dense, sparse = run(), run(sparse=True)
+    register = list(sparse.consolidated_account.register)
+    assert len(register) < len(dense.consolidated_account.register)
+    assert all(t["amount"] for t in register)
+    assert flows(sparse) == pytest.approx(flows(dense))
+    assert sparse.consolidated_account.balance == pytest.approx(dense.consolidated_account.balance)
+
+    budget = sparse.projects[1].getbudget()
+    assert (budget["budget"] != 0).all()
+    assert budget["budget"].sum() == pytest.approx(dense.projects[1].getbudget()["budget"].sum())
+
+
+def test_compacted_ledger_nets_each_project_step():
+    dense, compact = run(), run(compact_ledger=True)
+    register = list(compact.consolidated_account.register)
+    keys = [(t["date"], t["project"]) for t in register]
+    assert len(keys) == len(set(keys))
+    assert {t["title"] for t in register} == {"net flows"}
+    assert flows(compact) == pytest.approx(flows(dense))
+    balance = 0
+    for transaction in register:
+        balance -= transaction["amount"]
+        assert transaction["balance"] == pytest.approx(balance)
+    assert balance == pytest.approx(dense.consolidated_account.balance)
+
+
+def test_resumed_compaction_leaves_earlier_entries_alone():
+    portfolio = Portfolio()
+    portfolio.set_portfolio(events())
+    portfolio.run(4)
+    before = list(portfolio.consolidated_account.register)
+    portfolio.compact_ledger = True
+    portfolio.resume(12)
+    register = list(portfolio.consolidated_account.register)
+    assert register[: len(before)] == before
+    assert {t["title"] for t in register[len(before) :]} == {"net flows"}
+    assert portfolio.consolidated_account.balance == pytest.approx(run().consolidated_account.balance)
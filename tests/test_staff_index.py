@@ -0,0 +1,35 @@
+import pytest
+
+from sim import Worker
+from sim.models import StaffIndex
+
+
+def staff():
+    return [
+        Worker(position="Lead", salary=48000, fte=1.0, payrises=[{"step": 6, "rate": 0.1}, {"step": 3, "salary": 50000}]),
+        Worker(position="Temp", salary=24000, fte=0.5, start=2, end=6, payrises=[{"step": 2, "rate": 0.05}]),
+        Worker(position="Late", salary=30000, fte=0.8, start=6, payrises=[{"step": 12, "salary": 40000}]),
+        Worker(position="Never", salary=30000, start=4, end=4),
+    ]
+
+
+def test_lookups_match_a_scan_of_start_end_and_pay_rises():
+    workers = staff()
+    index = StaffIndex(workers, term=10)
+    assert index.bounds == [0, 2, 3, 6, 10]
+    for step in range(-1, 12):
+        expected = [(w, w.costs_at(step)) for w in workers if w.active(step)] if 0 <= step < 10 else []
+        assert index.at(step) == expected
+    assert [w.position for w, _ in index.at(5)] == ["Lead", "Temp"]
+    assert [w.position for w, _ in index.at(6)] == ["Lead", "Late"]
+    monthly = [sum(costs.monthcost for _, costs in index.at(step)) for step in range(10)]
+    assert index.vector().tolist() == pytest.approx(monthly)
+
+
+def test_pay_rises_apply_in_step_order():
+    lead = staff()[0]
+    # the rises are sorted by step: 50000 from step 3, then 10% on top from step 6
+    assert [lead.getMonthSalary(step) for step in (0, 3, 6)] == pytest.approx([4000, 50000 / 12, 55000 / 12])
+    assert [lead.getMonthSalaryCost(step) for step in (2, 3)] == [lead.costs.monthcost, lead.costs_at(3).monthcost]
+    temp = staff()[1]
+    assert temp.getMonthSalary(2) == pytest.approx(0.5 * 24000 * 1.05 / 12)
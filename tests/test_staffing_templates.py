@@ -0,0 +1,66 @@
+import pytest
+
+from sim import Portfolio, parseYAML
+
+SCENARIO = """
+variables:
+  pm_salary: 45000
+staffing_templates:
+  core_team:
+    - {position: PM, salary: "{pm_salary}", fte: 0.5}
+    - {position: Officer, salary: 30000, fte: 1.0}
+events:
+  - name: A
+    time: 0
+    term: 6
+    staffing:
+      - template: core_team
+  - name: B
+    time: 2
+    term: 6
+    staffing:
+      - template: core_team
+      - {position: Analyst, salary: 28000, fte: 0.8}
+"""
+
+INLINE = """
+events:
+  - name: A
+    time: 0
+    term: 6
+    staffing:
+      - {position: PM, salary: 45000, fte: 0.5}
+      - {position: Officer, salary: 30000, fte: 1.0}
+  - name: B
+    time: 2
+    term: 6
+    staffing:
+      - {position: PM, salary: 45000, fte: 0.5}
+      - {position: Officer, salary: 30000, fte: 1.0}
+      - {position: Analyst, salary: 28000, fte: 0.8}
+"""
+
+
+def run(yamltext: str) -> Portfolio:
+    portfolio = Portfolio()
+    portfolio.set_portfolio(parseYAML(yamltext))
+    portfolio.run(8)
+    return portfolio
+
+
+def test_templated_staff_share_cost_profiles_and_cost_the_same():
+    templated = run(SCENARIO)
+    a, b = templated.projects
+    assert [w.position for w in b.staff] == ["PM", "Officer", "Analyst"]
+    assert a.staff[0].salary == 22500
+    for left, right in zip(a.staff, b.staff):
+        assert left is not right
+        assert left.costs is right.costs
+
+    inline = run(INLINE)
+    assert list(templated.consolidated_account.register) == list(inline.consolidated_account.register)
+
+
+def test_unknown_templates_are_rejected():
+    with pytest.raises(ValueError, match="Unknown staffing template: missing"):
+        parseYAML(SCENARIO.replace("- template: core_team\n  - name: B", "- template: missing\n  - name: B"))
@@ -0,0 +1,90 @@
+import pytest
+
+from sim import Portfolio, StepExpression, parseYAML
+
+
+def run(yamltext: str, steps: int = 24) -> Portfolio:
+    portfolio = Portfolio()
+    portfolio.set_portfolio(parseYAML(yamltext))
+    portfolio.run(steps)
+    return portfolio
+
+
+def test_direct_cost_expression_is_evaluated_per_step():
+    events = parseYAML(
+        """
+variables:
+  growth: 1.5
+events:
+  - name: P1
+    time: 0
+    term: 24
+    directcosts:
+      - {item: Rent, cost: "{100 * growth ** year}", frequency: monthly}
+"""
+    )
+    cost = events[0]["directcosts"][0]["cost"]
+    assert isinstance(cost, StepExpression)
+    assert cost.at(0, 24) == 100
+    assert cost.at(12, 24) == 150
+
+
+@pytest.mark.parametrize(
+    "field",
+    [
+        "staffing:\n      - {position: PM, salary: \"{30000 * growth ** year}\", fte: 1.0}",
+        "policies:\n      - {policy: Grant, amount: \"{1000 * month}\"}",
+    ],
+)
+def test_step_expression_outside_direct_costs_is_a_parse_error(field):
+    yamltext = f"""
+variables:
+  growth: 1.5
+events:
+  - name: P1
+    time: 0
+    term: 24
+    {field}
+"""
+    with pytest.raises(ValueError, match="only supported for directcosts cost"):
+        parseYAML(yamltext)
+
+
+def test_user_defined_step_name_takes_precedence():
+    events = parseYAML(
+        """
+variables:
+  year: 2
+  growth: 1.5
+events:
+  - name: P1
+    time: 0
+    term: 12
+    staffing:
+      - {position: PM, salary: "{30000 * growth ** year}", fte: 1.0}
+    directcosts:
+      - {item: Rent, cost: "{100 * growth ** year + step}", frequency: monthly}
+"""
+    )
+    assert events[0]["staffing"][0]["salary"] == 67500
+    cost = events[0]["directcosts"][0]["cost"]
+    assert isinstance(cost, StepExpression)
+    assert cost.at(0, 12) == 225
+    assert cost.at(5, 12) == 230
+
+
+def test_user_defined_step_name_runs():
+    portfolio = run(
+        """
+variables:
+  year: 1
+events:
+  - name: P1
+    time: 0
+    term: 12
+    directcosts:
+      - {item: Rent, cost: "{100 * (year + 1) + 0 * month}", frequency: monthly}
+""",
+        steps=12,
+    )
+    assert portfolio.getbudget()["budget"].tolist() == [200.0] * 12
@@ -0,0 +1,34 @@
+from sim import Portfolio
+
+
+def project(name: str, **fields) -> dict:
+    rent = {"item": "Rent", "cost": 100, "frequency": "monthly", "step": 0}
+    return {"name": name, "term": 6, "budget": 0, "directcosts": [rent], **fields}
+
+
+def test_threshold_already_passed_fires_on_subscribe():
+    portfolio = Portfolio()
+    portfolio.set_portfolio([project("A", time=0)])
+    portfolio.run(4)
+    assert portfolio.consolidated_account.balance < 0
+
+    portfolio.set_event(project("B", trigger={"on": "balance_below", "threshold": 0}))
+    assert portfolio.triggers.fired == [(portfolio.now, "balance_below", "B")]
+    assert [e["time"] for e in portfolio._pending_events] == [portfolio.now + 1]
+    assert not portfolio.triggers.watches_balance()
+
+
+def test_thresholds_not_yet_reached_wait_for_a_crossing():
+    portfolio = Portfolio()
+    portfolio.set_portfolio(
+        [
+            project("A", time=0),
+            project("B", trigger={"on": "balance_above", "threshold": 0}),
+            project("C", trigger={"on": "balance_below", "threshold": -250}),
+        ]
+    )
+    # the opening balance of 0 is already at or above 0, but not below -250
+    assert portfolio.triggers.fired == [(0, "balance_above", "B")]
+    portfolio.run(8)
+    assert portfolio.triggers.fired[1][1:] == ("balance_below", "C")
+    assert [prj.name for prj in portfolio.projects] == ["A", "B", "C"]